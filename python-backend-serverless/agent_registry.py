@@ -0,0 +1,108 @@
+import hashlib
+import json
+from collections import deque
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Optional, Dict, Any, Iterable, List, Mapping, Tuple
+
+from agents import Agent, Handoff
+
+
+def guardrail_name(g) -> str:
+    """Extract a friendly guardrail name."""
+    name_attr = getattr(g, "name", None)
+    if isinstance(name_attr, str) and name_attr:
+        return name_attr
+    guard_fn = getattr(g, "guardrail_function", None)
+    if guard_fn is not None and hasattr(guard_fn, "__name__"):
+        return guard_fn.__name__.replace("_", " ").title()
+    fn_name = getattr(g, "__name__", None)
+    if isinstance(fn_name, str) and fn_name:
+        return fn_name.replace("_", " ").title()
+    return str(g)
+
+
+def _handoff_target(h, known: Mapping[str, Agent]) -> Optional[Agent]:
+    """Target agent of a handoff entry (an Agent, or a Handoff resolved by its public ``agent_name``)."""
+    if isinstance(h, Agent):
+        return h
+    return known.get(_handoff_name(h))
+
+
+def _handoff_name(h) -> str:
+    return h.agent_name if isinstance(h, Handoff) else getattr(h, "name", "")
+
+
+def _catalog_entry(agent: Agent) -> Dict[str, Any]:
+    return {
+        "name": agent.name,
+        "description": agent.handoff_description or "",
+        "handoffs": [_handoff_name(h) for h in agent.handoffs],
+        "tools": [getattr(t, "name", getattr(t, "__name__", "")) for t in agent.tools],
+        "input_guardrails": [guardrail_name(g) for g in agent.input_guardrails],
+    }
+
+
+@dataclass(frozen=True)
+class AgentRegistry:
+    """에이전트 그래프에서 한 번 계산하는 이름 -> 에이전트 색인과 카탈로그
+
+    루트 에이전트에서 핸드오프를 따라가며(너비 우선) 도달 가능한 에이전트를 모읍니다.
+    ``handoff()``로 만든 핸드오프의 대상은 그래프를 선언할 때 ``handoff()``에 넘긴 에이전트
+    목록(``agents``)에서 ``agent_name``으로 찾습니다 (SDK 내부 속성에 의존하지 않음). 카탈로그는 직렬화된 JSON과
+    그 해시(``version``, ETag로 사용)까지 미리 만들어 두고 요청마다 다시 만들지 않습니다.
+    """
+    root: Agent
+    agents: Mapping[str, Agent]
+    # 응답에 그대로 넣는 카탈로그 (공유 객체이므로 수정하지 말 것)
+    catalog: Tuple[Dict[str, Any], ...]
+    catalog_json: bytes
+    version: str
+
+    @classmethod
+    def from_graph(cls, root: Agent, agents: Iterable[Agent] = ()) -> "AgentRegistry":
+        known = {agent.name: agent for agent in agents}
+        known.setdefault(root.name, root)
+        reachable: Dict[str, Agent] = {}
+        queue = deque([root])
+        while queue:
+            agent = queue.popleft()
+            if agent.name in reachable:
+                continue
+            reachable[agent.name] = agent
+            for h in agent.handoffs:
+                target = _handoff_target(h, known)
+                if target is None:
+                    raise ValueError(f"핸드오프 대상 에이전트를 찾을 수 없습니다: {_handoff_name(h)}")
+                queue.append(target)
+
+        catalog = tuple(_catalog_entry(agent) for agent in reachable.values())
+        catalog_json = json.dumps(list(catalog), ensure_ascii=False, separators=(",", ":")).encode()
+        return cls(
+            root=root,
+            agents=MappingProxyType(reachable),
+            catalog=catalog,
+            catalog_json=catalog_json,
+            version=hashlib.sha256(catalog_json).hexdigest()[:16],
+        )
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.version}"'
+
+    def get(self, name: Optional[str]) -> Agent:
+        """이름에 해당하는 에이전트 (모르는 이름이면 루트 에이전트)"""
+        return self.agents.get(name, self.root)
+
+    def catalog_for(self, client_version: Optional[str]) -> Optional[List[Dict[str, Any]]]:
+        """클라이언트가 가진 카탈로그 버전이 최신이면 None, 아니면 전체 카탈로그"""
+        if client_version == self.version:
+            return None
+        return list(self.catalog)
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """If-None-Match 헤더에 현재 버전이 포함되어 있는지"""
+        if not if_none_match:
+            return False
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or any(tag.removeprefix("W/") == self.etag for tag in tags)
@@ -1,30 +1,54 @@
-from conversation_store import create_conversation_store
+from conversation_store import (
+    connect_conversation_store,
+    ConversationStore,
+    LazyConversationStore,
+    RedisConversationStore,
+    SQLiteConversationStore,
+    TieredConversationStore,
+    StateCodec,
+    ConversationLock,
+    ConversationBusyError,
+    ConversationConflictError,
+)
+from guardrail_runner import run_guarded
+from guardrail_prefilter import LocalVerdict, prefilter as guardrail_prefilter, normalize
+from guardrail_cache import verdict_cache
+from seat_inventory import seat_inventory
+from profile_store import profile_store
+from history_policy import HistoryPolicy
+import metrics
+import structured_logging
+from structured_logging import configure_logging, should_dump_run
 from agents import (
     Runner,
-    ItemHelpers,
     MessageOutputItem,
     HandoffOutputItem,
     ToolCallItem,
     ToolCallOutputItem,
     InputGuardrailTripwireTriggered,
-    Handoff,
 )
 from main import (
     triage_agent,
-    faq_agent,
-    intro_agent,
-    career_agent,
-    project_agent,
-    tech_agent,
     create_initial_context,
+    DeveloperProfileContext,
+    get_faq_index,
+    relevance_guardrail,
+    jailbreak_guardrail,
+    run_config,
+    agent_registry,
 )
+from agent_registry import guardrail_name
+import asyncio
+import functools
+import json
 import logging
 import time
 from uuid import uuid4
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, AsyncIterator, Tuple
 from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi import FastAPI
+from fastapi.responses import StreamingResponse, PlainTextResponse, Response
+from fastapi import FastAPI, HTTPException, Header
 import os
 from dotenv import load_dotenv
 
@@ -32,8 +56,8 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# 구조화된 JSON 로그 (큐에 넣기만 하고 포맷/stdout 기록은 백그라운드 스레드에서)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 app = FastAPI()
@@ -49,6 +73,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 단계별 소요 시간을 Server-Timing 응답 헤더로 노출 (브라우저 개발자 도구 Network 탭에서 확인)
+if metrics.SERVER_TIMING_ENABLED:
+    app.add_middleware(metrics.ServerTimingMiddleware)
+
 # =========================
 # Models
 # =========================
@@ -57,6 +85,12 @@ app.add_middleware(
 class ChatRequest(BaseModel):
     conversation_id: Optional[str] = None
     message: str
+    # 클라이언트 재시도 시 같은 값을 보내면 모델을 다시 실행하지 않고 같은 응답을 돌려줌
+    idempotency_key: Optional[str] = None
+    # 클라이언트가 가진 에이전트 카탈로그 버전 (최신이면 응답에서 agents 생략)
+    agents_version: Optional[str] = None
+    # 클라이언트가 가진 컨텍스트 버전 (서버의 현재 버전과 같으면 바뀐 키만 응답)
+    context_version: Optional[str] = None
 
 
 class MessageResponse(BaseModel):
@@ -80,6 +114,10 @@ class GuardrailCheck(BaseModel):
     reasoning: str
     passed: bool
     timestamp: float
+    # 가드레일 판정에 걸린 시간 (트립와이어로 취소된 경우 취소 시점까지)
+    duration_ms: Optional[float] = None
+    # 판정 출처: local(사전 판정) / cache(판정 캐시) / model(가드레일 에이전트)
+    source: Optional[str] = None
 
 
 class ChatResponse(BaseModel):
@@ -87,8 +125,13 @@ class ChatResponse(BaseModel):
     current_agent: str
     messages: List[MessageResponse]
     events: List[AgentEvent]
-    context: dict
-    agents: List[dict]
+    # 클라이언트의 context_version이 최신이면 None이고 바뀐 키만 context_delta로 전달
+    context: Optional[dict] = None
+    context_delta: Optional[dict] = None
+    context_version: Optional[str] = None
+    # 클라이언트의 agents_version이 최신이면 None (목록은 /agents 또는 이전 응답의 것을 사용)
+    agents: Optional[List[dict]] = None
+    agents_version: str = agent_registry.version
     guardrails: List[GuardrailCheck]
 
 # =========================
@@ -96,8 +139,41 @@ class ChatResponse(BaseModel):
 # =========================
 
 
-# 환경에 따라 자동으로 적절한 스토어 선택 (Redis 또는 InMemory 폴백)
-conversation_store = create_conversation_store()
+async def _connect_store() -> ConversationStore:
+    """환경에 따라 적절한 스토어 선택 (Redis / SQLite 또는 InMemory 폴백)"""
+    # 컨텍스트 모델은 타입을 유지한 채 저장/복원되도록 코덱에 등록
+    store = await connect_conversation_store(codec=StateCodec(models=[DeveloperProfileContext]))
+    backend = store.inner if isinstance(store, TieredConversationStore) else store
+    # 좌석 재고는 인스턴스마다 따로 두면 같은 좌석이 중복 예약되므로 공유 저장소가 있으면 항상 공유
+    # 프로필도 사용자 단위 데이터이므로 공유 (대화 TTL과 별도로 유지)
+    if isinstance(backend, RedisConversationStore):
+        seat_inventory.redis = backend.redis
+        profile_store.redis = backend.redis
+        # 가드레일 판정 캐시도 인스턴스 간에 공유
+        if os.getenv("GUARDRAIL_CACHE_SHARED", "1") != "0":
+            verdict_cache.redis = backend.redis
+    elif isinstance(backend, SQLiteConversationStore):
+        # 같은 SQLite 파일(테이블만 따로)과 전용 스레드를 사용
+        # 판정 캐시는 워커마다 따로 두어도 정확성에 영향이 없으므로 공유하지 않음 (적중률만 낮아짐)
+        seat_inventory.sqlite = backend
+        profile_store.sqlite = backend
+    return store
+
+
+# 콜드 스타트를 줄이기 위해 Redis 연결(ping 포함)은 첫 요청 또는 /health 웜업 때 수행
+conversation_store = LazyConversationStore(_connect_store)
+
+# 오래된 기록은 요약으로 접어 프롬프트/저장 크기를 제한
+history_policy = HistoryPolicy()
+
+
+async def warmup() -> ConversationStore:
+    """Finish deferred setup (store connection, FAQ index) and return the resolved store."""
+    store = conversation_store
+    if isinstance(store, LazyConversationStore):
+        store = await store.resolve()
+    get_faq_index()
+    return store
 
 
 # =========================
@@ -106,14 +182,51 @@ conversation_store = create_conversation_store()
 
 @app.get("/health")
 async def health_check():
-    """서버리스 환경에서 헬스체크 및 웜업용 엔드포인트"""
+    """서버리스 환경에서 헬스체크 및 웜업용 엔드포인트 (지연된 초기화를 여기서 끝냄)"""
+    store = await warmup()
     return {
         "status": "healthy",
         "timestamp": time.time(),
-        "store_type": type(conversation_store).__name__
+        "store_type": type(store).__name__,
+        "store_stats": store.stats(),
+        "guardrail_prefilter": guardrail_prefilter.stats(),
+        "guardrail_cache": verdict_cache.stats(),
+        "profile_store": profile_store.stats(),
+        "fast_path": _fast_path_summary(),
     }
 
 
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus 형식 메트릭 (단계별 지연, 모델 호출 수, 핸드오프, 가드레일, 저장소 바이트)"""
+    return PlainTextResponse(metrics.registry.render(),
+                             media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/agents")
+async def agents_endpoint(if_none_match: Optional[str] = Header(default=None)):
+    """에이전트 카탈로그 (미리 직렬화된 JSON, ETag로 조건부 요청 지원)"""
+    headers = {"ETag": agent_registry.etag, "Cache-Control": "public, max-age=300"}
+    if agent_registry.matches(if_none_match):
+        return Response(status_code=304, headers=headers)
+    return Response(agent_registry.catalog_json, media_type="application/json", headers=headers)
+
+
+@app.get("/flights/{flight_number}/seats")
+async def flight_seats_endpoint(flight_number: str):
+    """항공편 좌석 현황 (UI 좌석 배치도의 점유 좌석 표시용, 조회는 상태를 만들지 않음)"""
+    await warmup()
+    try:
+        return {
+            "flight_number": flight_number,
+            "occupied": await seat_inventory.occupied(flight_number),
+            "available": await seat_inventory.available(flight_number),
+            "capacity": seat_inventory.layout.capacity,
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @app.get("/")
 async def root():
     """루트 엔드포인트"""
@@ -122,7 +235,11 @@ async def root():
         "version": "2.0.0-serverless",
         "endpoints": {
             "chat": "/chat",
+            "chat_stream": "/chat/stream",
+            "agents": "/agents",
+            "flight_seats": "/flights/{flight_number}/seats",
             "health": "/health",
+            "metrics": "/metrics",
             "docs": "/docs"
         }
     }
@@ -132,62 +249,23 @@ async def root():
 # =========================
 
 
-def safe_context_to_dict(ctx):
-    if isinstance(ctx, dict):
-        return ctx
-    elif hasattr(ctx, "model_dump"):
-        return ctx.model_dump()
-    elif hasattr(ctx, "dict"):
-        return ctx.dict()
-    else:
-        return {}
-
-
-def _get_agent_by_name(name: str):
-    """Return the agent object by name."""
-    agents = {
-        triage_agent.name: triage_agent,
-        faq_agent.name: faq_agent,
-        intro_agent.name: intro_agent,
-        career_agent.name: career_agent,
-        project_agent.name: project_agent,
-        tech_agent.name: tech_agent,
-    }
-    return agents.get(name, triage_agent)
-
-
-def _get_guardrail_name(g) -> str:
-    """Extract a friendly guardrail name."""
-    name_attr = getattr(g, "name", None)
-    if isinstance(name_attr, str) and name_attr:
-        return name_attr
-    guard_fn = getattr(g, "guardrail_function", None)
-    if guard_fn is not None and hasattr(guard_fn, "__name__"):
-        return guard_fn.__name__.replace("_", " ").title()
-    fn_name = getattr(g, "__name__", None)
-    if isinstance(fn_name, str) and fn_name:
-        return fn_name.replace("_", " ").title()
-    return str(g)
-
-
-def _build_agents_list() -> List[Dict[str, Any]]:
-    """Build a list of all available agents and their metadata."""
-    def make_agent_dict(agent):
-        return {
-            "name": agent.name,
-            "description": getattr(agent, "handoff_description", ""),
-            "handoffs": [getattr(h, "agent_name", getattr(h, "name", "")) for h in getattr(agent, "handoffs", [])],
-            "tools": [getattr(t, "name", getattr(t, "__name__", "")) for t in getattr(agent, "tools", [])],
-            "input_guardrails": [],
-        }
-    return [
-        make_agent_dict(triage_agent),
-        make_agent_dict(faq_agent),
-        make_agent_dict(intro_agent),
-        make_agent_dict(career_agent),
-        make_agent_dict(project_agent),
-        make_agent_dict(tech_agent),
-    ]
+def _attach_profile(conversation_id: str, state: Dict[str, Any]) -> str:
+    """Prepare the turn's profile context and return its version (no profile store round trip).
+
+    버전은 대화 상태에 저장된 리비전으로 계산하고, 프로필 본문은 도구가 필요할 때나
+    클라이언트에 전체 컨텍스트를 보내야 할 때만 읽습니다.
+    """
+    context = state["context"]
+    if not isinstance(context, DeveloperProfileContext):
+        # 모델을 등록하지 않은 코덱은 dict로 복원하므로 다시 모델로 변환
+        context = state["context"] = DeveloperProfileContext.model_validate(context or {})
+    # 인증된 사용자 ID가 없으므로 프로필은 대화 ID로만 구분 (클라이언트가 보낸 ID로 남의 프로필을 열 수 없게,
+    # 이전에 요청의 user_id로 만든 대화 상태도 대화 ID로 다시 묶음)
+    if context.user_id != conversation_id:
+        context.user_id = conversation_id
+        context.profile_revision = 0
+    context.start_turn()
+    return context.version
 
 
 def get_agent_name(agent):
@@ -197,6 +275,113 @@ def get_agent_name(agent):
         return agent.name
     return None
 
+
+def _item_text(item) -> str:
+    """Extract plain text from a run item (or a dict-like message item)."""
+    content = getattr(item, "content", None)
+    # MessageOutputItem의 경우 content가 None이고, raw_item.content에 텍스트가 있음
+    if content is None and hasattr(item, "raw_item"):
+        raw_item = getattr(item, "raw_item")
+        if hasattr(raw_item, "content"):
+            raw_content = getattr(raw_item, "content")
+            if isinstance(raw_content, list):
+                return "".join(
+                    [c.text for c in raw_content if hasattr(c, "text")]
+                )
+            return str(raw_content)
+        return ""
+    if isinstance(content, list):
+        return "".join(
+            [c.text for c in content if hasattr(c, "text")]
+        )
+    return content or ""
+
+
+async def _context_fields(req: ChatRequest, old_version: str, context: DeveloperProfileContext,
+                          changes: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """ChatResponse context fields: only the changed keys if the client holds ``old_version``."""
+    if req.context_version == old_version:
+        # 대화 상태의 리비전은 다른 곳의 기록을 모르므로 저장소의 리비전을 확인 (값 하나만 왕복)
+        with metrics.phase("profile_load"):
+            await context.check_revision()
+        if not context.changed_elsewhere:
+            return {"context_delta": changes or {}, "context_version": context.version}
+    # 버전을 보내지 않았거나 다른 버전을 가진 클라이언트(기존 UI 포함)는 전체 컨텍스트 (이때만 프로필을 읽음)
+    with metrics.phase("profile_load"):
+        await context.load()
+    return {"context": context.view(), "context_version": context.version}
+
+# =========================
+# Fast path (모델 호출 없이 응답)
+# =========================
+
+GREETING_REPLY = (
+    "안녕하세요! 개발자 자기소개서와 포트폴리오 작성을 도와드릴게요. "
+    "자기소개, 경력, 프로젝트, 기술스택 중 무엇부터 정리해 볼까요?"
+)
+GREETINGS = frozenset(normalize(g) for g in [
+    "안녕", "안녕하세요", "안녕하십니까", "반가워", "반가워요", "반갑습니다", "hi", "hello",
+])
+
+# 가드레일 이름 -> 로컬 판정 (fast path는 모든 가드레일이 로컬에서 통과할 때만 사용)
+_LOCAL_GUARDRAILS = {
+    relevance_guardrail.name: guardrail_prefilter.relevance,
+    jailbreak_guardrail.name: guardrail_prefilter.jailbreak,
+}
+
+_FAQ_EXACT_VERDICT = LocalVerdict(tripwire=False, reasoning="FAQ 질문 정확 일치", rule="faq_exact")
+
+# 전체 턴 수와 fast path 종류별 적중 수 (모델 호출을 생략한 비율 산정용)
+fast_path_stats: Dict[str, int] = {"turns": 0, "greeting": 0, "faq": 0}
+
+
+def _fast_path_reply(message: str, current_agent) -> Optional[Tuple[str, MessageResponse, List[GuardrailCheck]]]:
+    """Answer high-confidence greetings and exact FAQ hits locally (None = use the model)."""
+    if normalize(message) in GREETINGS:
+        # 트라이에이지/FAQ 에이전트는 인사말에 직접 답하도록 지시받으므로 현재 에이전트가 답함
+        kind, reply = "greeting", MessageResponse(content=GREETING_REPLY, agent=current_agent.name)
+    else:
+        entry = get_faq_index().exact_match(message)
+        if entry is None:
+            return None
+        # 실제 핸드오프는 일어나지 않으므로 현재 에이전트가 답한 것으로 기록 (current_agent 유지)
+        kind, reply = "faq", MessageResponse(content=entry.answer, agent=current_agent.name)
+
+    checks: List[GuardrailCheck] = []
+    for g in getattr(current_agent, "input_guardrails", []):
+        local_check = _LOCAL_GUARDRAILS.get(guardrail_name(g))
+        started = time.perf_counter()
+        verdict = local_check(message) if local_check else None
+        if verdict is None and local_check and kind == "faq":
+            # 색인된 FAQ 질문/별칭과 정확히 일치하는 입력은 주입 패턴만 없으면 검수된 문장으로 통과
+            verdict = _FAQ_EXACT_VERDICT
+        if verdict is None or verdict.tripwire:
+            return None
+        checks.append(GuardrailCheck(
+            id=uuid4().hex,
+            name=guardrail_name(g),
+            input=message,
+            reasoning="",
+            passed=True,
+            timestamp=time.time() * 1000,
+            duration_ms=round((time.perf_counter() - started) * 1000, 3),
+            source="local",
+        ))
+    return kind, reply, checks
+
+
+def _record_fast_path(kind: str):
+    fast_path_stats[kind] += 1
+    summary = _fast_path_summary()
+    logger.info("⚡ fast path (%s): 모델 호출 생략 %d/%d턴 (%.1f%%)",
+                kind, summary["hits"], summary["turns"], summary["hit_ratio"] * 100)
+
+
+def _fast_path_summary() -> Dict[str, Any]:
+    hits = fast_path_stats["greeting"] + fast_path_stats["faq"]
+    turns = fast_path_stats["turns"]
+    return {**fast_path_stats, "hits": hits, "hit_ratio": hits / turns if turns else 0.0}
+
 # =========================
 # Main Chat Endpoint
 # =========================
@@ -205,55 +390,154 @@ def get_agent_name(agent):
 @app.post("/chat", response_model=ChatResponse)
 async def chat_endpoint(req: ChatRequest):
     """개발자 자기소개서/포트폴리오 대화 API"""
-    conversation_id = req.conversation_id or uuid4().hex
-    state = conversation_store.get(conversation_id) or {
-        "input_items": [],
-        "context": create_initial_context(),
-        "current_agent": triage_agent.name,
-    }
-    old_context = safe_context_to_dict(state["context"])
-    guardrail_checks: List[GuardrailCheck] = []
+    if not req.idempotency_key:
+        return await _locked_chat_turn(req, req.conversation_id or uuid4().hex)
+    # 키만으로 대화 ID를 만들면 같은 키("1" 등)를 고른 다른 클라이언트끼리 대화가 섞이므로
+    # 새 대화의 재시도는 클라이언트가 정한 conversation_id(UUID 등)로 묶음
+    if not req.conversation_id:
+        raise HTTPException(
+            status_code=400, detail="idempotency_key는 conversation_id와 함께 보내야 합니다.")
+
+    conversation_id = req.conversation_id
+    # 같은 대화에서 같은 키로 진행 중인 실행이 있으면 새로 실행하지 않고 그 결과를 기다림
+    # (다른 대화의 같은 키는 별개의 요청)
+    inflight_key = _idempotency_scope(conversation_id, req.idempotency_key)
+    inflight = _inflight_turns.get(inflight_key)
+    if inflight is None:
+        task = asyncio.ensure_future(_locked_chat_turn(req, conversation_id))
+        inflight = _inflight_turns[inflight_key] = (req.message, task)
+        task.add_done_callback(lambda _: _inflight_turns.pop(inflight_key, None))
+    message, task = inflight
+    if message != req.message:
+        raise HTTPException(
+            status_code=422, detail="idempotency_key가 다른 메시지에 이미 사용되었습니다.")
+    # 먼저 온 요청의 연결이 끊겨도 실행은 계속되어 다른 요청이 결과를 받도록 shield
+    return await asyncio.shield(task)
+
+
+# (대화 ID, idempotency 키) -> (메시지, 진행 중인 턴) (프로세스 내 중복 요청 병합)
+_inflight_turns: Dict[str, Tuple[str, "asyncio.Future[ChatResponse]"]] = {}
+
+
+def _idempotency_scope(conversation_id: str, idempotency_key: str) -> str:
+    """Idempotency keys are only unique within a conversation."""
+    return f"{conversation_id}:{idempotency_key}"
+
+
+async def _locked_chat_turn(req: ChatRequest, conversation_id: str) -> ChatResponse:
+    """Run a turn while holding the conversation lock, replaying idempotent retries."""
+    # 이 요청에서 남기는 모든 로그에 대화 ID를 붙임
+    structured_logging.conversation_id.set(conversation_id)
+    # 같은 대화의 턴은 직렬화 (중복 제출/재시도로 인한 턴 유실 방지)
+    waiting = time.perf_counter()
+    try:
+        async with conversation_store.lock(conversation_id) as turn_lock:
+            metrics.record_phase("lock", time.perf_counter() - waiting)
+            if req.idempotency_key:
+                # 락을 기다리는 동안 다른 인스턴스가 같은 요청을 끝냈을 수 있으므로 락 안에서 확인
+                cached = await conversation_store.get_cached_response(
+                    _idempotency_scope(conversation_id, req.idempotency_key))
+                # 다른 대화의 응답(컨텍스트 포함)은 절대 재전송하지 않음
+                if cached is not None and cached.get("conversation_id") == conversation_id:
+                    if cached["message"] != req.message:
+                        raise HTTPException(
+                            status_code=422,
+                            detail="idempotency_key가 다른 메시지에 이미 사용되었습니다.")
+                    return ChatResponse.model_validate(cached["response"])
+            return await _run_chat_turn(req, conversation_id, turn_lock)
+    except (ConversationBusyError, ConversationConflictError) as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+async def _run_chat_turn(req: ChatRequest, conversation_id: str, turn_lock: ConversationLock) -> ChatResponse:
+    """Run a single turn while holding the conversation lock."""
+    started = time.perf_counter()
+    with metrics.phase("store_load"):
+        state = await conversation_store.get(conversation_id) or {
+            "input_items": [],
+            "context": create_initial_context(conversation_id),
+            "current_agent": triage_agent.name,
+        }
+    old_version = _attach_profile(conversation_id, state)
+    persisted_count = len(state["input_items"])
 
     # 메시지 추가
     state["input_items"].append({"role": "user", "content": req.message})
-    current_agent = _get_agent_by_name(state["current_agent"])
-
-    try:
-        result = await Runner.run(current_agent, state["input_items"], context=state["context"])
-    except InputGuardrailTripwireTriggered as e:
-        failed = e.guardrail_result.guardrail
-        gr_output = e.guardrail_result.output.output_info
-        gr_reasoning = getattr(gr_output, "reasoning", "")
-        gr_input = req.message
-        gr_timestamp = time.time() * 1000
-        for g in getattr(current_agent, "input_guardrails", []):
-            guardrail_checks.append(GuardrailCheck(
-                id=uuid4().hex,
-                name=g,
-                input=gr_input,
-                reasoning=(gr_reasoning if g == failed else ""),
-                passed=(g != failed),
-                timestamp=gr_timestamp,
-            ))
+    current_agent = agent_registry.get(state["current_agent"])
+
+    # 인사말/FAQ 정확 일치는 모델 없이 응답
+    fast_path_stats["turns"] += 1
+    with metrics.phase("fast_path"):
+        fast = _fast_path_reply(req.message, current_agent)
+    if fast is not None:
+        kind, reply, guardrail_checks = fast
+        _record_fast_path(kind)
+        state["input_items"].append({"role": "assistant", "content": reply.content})
+        response = ChatResponse(
+            conversation_id=conversation_id,
+            current_agent=current_agent.name,
+            messages=[reply],
+            events=[],
+            **await _context_fields(req, old_version, state["context"]),
+            agents=agent_registry.catalog_for(req.agents_version),
+            guardrails=guardrail_checks,
+        )
+        # 턴이 저장된 경우에만 재전송용 응답을 기록 (락은 아직 보유 중)
+        if await _save_turn(conversation_id, state, persisted_count, turn_lock) is not None:
+            await _remember_response(req, response)
+        _record_turn("fast_path", started, guardrail_checks)
+        return response
+
+    # 가드레일은 에이전트와 동시에 실행되고, 모두 통과해야 에이전트의 결과(컨텍스트 변경 포함)를 반영
+    with metrics.phase("agent"):
+        guarded = await run_guarded(
+            current_agent, state["input_items"], state["context"],
+            run=functools.partial(Runner.run, run_config=run_config))
+    if guarded.outcomes:
+        # 가드레일은 agent 단계와 겹쳐 실행되므로 가장 오래 걸린 가드레일 시간만 별도로 기록
+        metrics.record_phase("guardrails", max(o.duration_ms for o in guarded.outcomes) / 1000)
+    guardrail_checks = [
+        GuardrailCheck(
+            id=uuid4().hex,
+            name=guardrail_name(o.guardrail),
+            input=req.message,
+            reasoning=(o.reasoning if o.tripped else ""),
+            passed=not o.tripped,
+            timestamp=o.timestamp,
+            duration_ms=round(o.duration_ms, 2),
+            source=o.source,
+        )
+        for o in guarded.outcomes
+    ]
+    if guarded.tripped:
         refusal = "Sorry, I can only answer questions related to developer profiles."
         state["input_items"].append({"role": "assistant", "content": refusal})
-        return ChatResponse(
+        response = ChatResponse(
             conversation_id=conversation_id,
             current_agent=current_agent.name,
             messages=[MessageResponse(
                 content=refusal, agent=current_agent.name)],
             events=[],
-            context=safe_context_to_dict(state["context"]),
-            agents=_build_agents_list(),
+            **await _context_fields(req, old_version, state["context"]),
+            agents=agent_registry.catalog_for(req.agents_version),
             guardrails=guardrail_checks,
         )
+        await _remember_response(req, response)
+        _record_turn("refused", started, guardrail_checks)
+        return response
+    result = guarded.result
+    # 가드레일을 통과한 턴의 프로필 변경만 저장 (거절된 턴의 변경은 복사본과 함께 버려짐)
+    state["context"] = guarded.context
+    # 변경 이벤트는 도구가 남긴 변경 집합에서 바로 만들고, 같은 변경만 저장소에 기록
+    with metrics.phase("context_diff"):
+        changes = state["context"].changed_view()
+    with metrics.phase("profile_save"):
+        await state["context"].commit()
 
     messages: List[MessageResponse] = []
     events: List[AgentEvent] = []
 
-    # 꼭 필요한 핵심 프린트만 유지
-    print("=== RUNNER RESULT ===")
-    print(result)
+    extract_started = time.perf_counter()
     items = next(
         (v for v in [
             getattr(result, "new_items", None),
@@ -261,44 +545,27 @@ async def chat_endpoint(req: ChatRequest):
             getattr(result, "messages", None)
         ] if v), []
     )
-    print(f"=== items (len={len(items)}) ===")
-    for idx, item in enumerate(items):
-        print(
-            f"Item {idx}: type={type(item)}, agent={getattr(item, 'agent', None)}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("run items", extra={"items": [
+            {"type": type(item).__name__, "agent": get_agent_name(getattr(item, "agent", None))}
+            for item in items]})
+    # 전체 실행 결과는 샘플링된 요청만 덤프 (repr은 리스너 스레드에서 계산)
+    if should_dump_run():
+        logger.info("run dump", extra={"run": result})
 
     for item in items:
+        if isinstance(item, HandoffOutputItem):
+            metrics.handoffs_total.inc(agent=item.target_agent.name)
         # role이 'assistant'이거나, role이 없으면 모두 추가
         role = getattr(item, "role", None)
-        content = getattr(item, "content", None)
-        # MessageOutputItem의 경우 content가 None이고, raw_item.content에 텍스트가 있음
-        if content is None and hasattr(item, "raw_item"):
-            raw_item = getattr(item, "raw_item")
-            if hasattr(raw_item, "content"):
-                raw_content = getattr(raw_item, "content")
-                if isinstance(raw_content, list):
-                    content_text = "".join(
-                        [c.text for c in raw_content if hasattr(c, "text")]
-                    )
-                else:
-                    content_text = str(raw_content)
-            else:
-                content_text = ""
-        elif isinstance(content, list):
-            content_text = "".join(
-                [c.text for c in content if hasattr(c, "text")]
-            )
-        else:
-            content_text = content
-
+        content_text = _item_text(item)
         agent_name = get_agent_name(getattr(item, "agent", None))
         if (role is None or role == "assistant") and content_text:
             messages.append(MessageResponse(
                 content=content_text, agent=agent_name))
         # 기타 이벤트 등은 필요시 확장
+    metrics.record_phase("extract", time.perf_counter() - extract_started)
 
-    new_context = safe_context_to_dict(state["context"])
-    changes = {k: new_context[k]
-               for k in new_context if old_context.get(k) != new_context[k]}
     if changes:
         events.append(
             AgentEvent(
@@ -314,34 +581,311 @@ async def chat_endpoint(req: ChatRequest):
     ) if hasattr(result, "to_input_list") else []
     state["current_agent"] = current_agent.name
 
-    # 상태 저장 및 Redis TTL 연장 (활성 대화 세션 유지)
-    conversation_store.save(conversation_id, state)
-    if hasattr(conversation_store, 'extend_ttl'):
-        conversation_store.extend_ttl(conversation_id)
+    response = ChatResponse(
+        conversation_id=conversation_id,
+        current_agent=current_agent.name,
+        messages=messages,
+        events=events,
+        **await _context_fields(req, old_version, state["context"], changes),
+        agents=agent_registry.catalog_for(req.agents_version),
+        guardrails=guardrail_checks,
+    )
+    # 턴이 저장된 경우에만 재전송용 응답을 기록 (락은 lock()을 벗어날 때 해제되므로 아직 보유 중)
+    if await _save_turn(conversation_id, state, persisted_count, turn_lock) is not None:
+        await _remember_response(req, response)
+    _record_turn("model", started, guardrail_checks, len(getattr(result, "raw_responses", [])))
+    return response
+
+
+def _record_turn(path: str, started: float, guardrail_checks: List[GuardrailCheck],
+                 agent_model_calls: int = 0):
+    """Record end-to-end latency, model calls and guardrail verdicts of a finished turn."""
+    elapsed = time.perf_counter() - started
+    metrics.turn_seconds.observe(elapsed, path=path)
+    guardrail_model_calls = 0
+    for check in guardrail_checks:
+        # 취소된 가드레일(source 없음)은 판정이 없으므로 제외
+        if check.source is not None:
+            metrics.guardrail_checks_total.inc(guardrail=check.name, source=check.source)
+            guardrail_model_calls += check.source == "model"
+        if not check.passed:
+            metrics.guardrail_trips_total.inc(guardrail=check.name)
+    metrics.model_calls_per_turn.observe(agent_model_calls + guardrail_model_calls)
+    logger.info("turn completed", extra={
+        "path": path,
+        "duration_ms": round(elapsed * 1000, 2),
+        "model_calls": agent_model_calls + guardrail_model_calls,
+        "guardrails_tripped": [check.name for check in guardrail_checks if not check.passed],
+    })
+
+
+async def _save_turn(conversation_id: str, state: Dict[str, Any], persisted_count: int,
+                     turn_lock: ConversationLock) -> Optional[int]:
+    """Persist the turn, folding old history into the rolling summary when it outgrows the window.
+
+    Returns the new state version, or None if the store could not write it.
+    """
+    with metrics.phase("store_save"):
+        compacted = history_policy.compact(state["input_items"])
+        state["input_items"] = compacted.items
+        if compacted.folded:
+            # 요약이 기록 앞부분을 다시 쓰므로 전체 저장
+            return await conversation_store.save(conversation_id, state, lock=turn_lock)
+        # 이번 턴에 추가된 항목만 저장 (TTL 갱신 포함, 한 번의 왕복)
+        return await conversation_store.append(
+            conversation_id, state, state["input_items"][persisted_count:], lock=turn_lock)
+
+
+async def _remember_response(req: ChatRequest, response: ChatResponse):
+    """Cache a completed response under the request's idempotency key (if any).
+
+    턴이 저장된 뒤, 락을 가진 채로 호출해야 저장되지 않은 턴이 재전송되지 않습니다.
+    """
+    if not req.idempotency_key:
+        return
+    await conversation_store.cache_response(_idempotency_scope(response.conversation_id, req.idempotency_key), {
+        "conversation_id": response.conversation_id,
+        "message": req.message,
+        "response": response.model_dump(mode="json"),
+    })
 
-    # Build guardrail results: mark failures (if any), and any others as passed
-    final_guardrails: List[GuardrailCheck] = []
-    for g in getattr(current_agent, "input_guardrails", []):
-        name = g
-        failed = next((gc for gc in guardrail_checks if gc.name == name), None)
-        if failed:
-            final_guardrails.append(failed)
-        else:
-            final_guardrails.append(GuardrailCheck(
+
+# =========================
+# Streaming Chat Endpoint (SSE)
+# =========================
+
+
+def _sse(event: str, data: Any) -> str:
+    """Format a single Server-Sent-Events frame."""
+    if isinstance(data, BaseModel):
+        data = data.model_dump()
+    return f"event: {event}\ndata: {json.dumps(data, default=str, ensure_ascii=False)}\n\n"
+
+
+def _tool_args(raw_item) -> Any:
+    """Decode tool call arguments (JSON string) when possible."""
+    arguments = getattr(raw_item, "arguments", None)
+    if isinstance(arguments, str):
+        try:
+            return json.loads(arguments)
+        except json.JSONDecodeError:
+            return arguments
+    return arguments
+
+
+def _run_item_event(event) -> Optional[AgentEvent]:
+    """Convert a RunItemStreamEvent into an AgentEvent (or None if not surfaced)."""
+    item = event.item
+    agent_name = get_agent_name(getattr(item, "agent", None)) or ""
+    if isinstance(item, HandoffOutputItem):
+        source = get_agent_name(item.source_agent)
+        target = get_agent_name(item.target_agent)
+        return AgentEvent(
+            id=uuid4().hex,
+            type="handoff",
+            agent=source,
+            content=f"{source} -> {target}",
+            metadata={"source_agent": source, "target_agent": target},
+            timestamp=time.time() * 1000,
+        )
+    if isinstance(item, ToolCallItem):
+        tool_name = getattr(item.raw_item, "name", "")
+        return AgentEvent(
+            id=uuid4().hex,
+            type="tool_call",
+            agent=agent_name,
+            content=tool_name,
+            metadata={"tool_name": tool_name,
+                      "tool_args": _tool_args(item.raw_item)},
+            timestamp=time.time() * 1000,
+        )
+    if isinstance(item, ToolCallOutputItem):
+        return AgentEvent(
+            id=uuid4().hex,
+            type="tool_output",
+            agent=agent_name,
+            content=str(item.output),
+            metadata={"tool_result": item.output},
+            timestamp=time.time() * 1000,
+        )
+    return None
+
+
+async def _chat_event_stream(req: ChatRequest) -> AsyncIterator[str]:
+    """Run the agent with Runner.run_streamed and yield SSE frames as they happen."""
+    conversation_id = req.conversation_id or uuid4().hex
+    structured_logging.conversation_id.set(conversation_id)
+    try:
+        async with conversation_store.lock(conversation_id) as turn_lock:
+            async for frame in _stream_chat_turn(req, conversation_id, turn_lock):
+                yield frame
+    except (ConversationBusyError, ConversationConflictError) as e:
+        yield _sse("error", {"conversation_id": conversation_id, "message": str(e)})
+
+
+async def _stream_chat_turn(req: ChatRequest, conversation_id: str,
+                            turn_lock: ConversationLock) -> AsyncIterator[str]:
+    """Stream a single turn while holding the conversation lock."""
+    started = time.perf_counter()
+    with metrics.phase("store_load"):
+        state = await conversation_store.get(conversation_id) or {
+            "input_items": [],
+            "context": create_initial_context(conversation_id),
+            "current_agent": triage_agent.name,
+        }
+    old_version = _attach_profile(conversation_id, state)
+    persisted_count = len(state["input_items"])
+    state["input_items"].append({"role": "user", "content": req.message})
+    current_agent = agent_registry.get(state["current_agent"])
+
+    # 첫 바이트를 최대한 빨리 보내기 위해 실행 전에 시작 이벤트 전송
+    yield _sse("start", {"conversation_id": conversation_id,
+                         "current_agent": current_agent.name})
+
+    fast_path_stats["turns"] += 1
+    fast = _fast_path_reply(req.message, current_agent)
+    if fast is not None:
+        kind, reply, guardrail_checks = fast
+        _record_fast_path(kind)
+        yield _sse("message", reply)
+        state["input_items"].append({"role": "assistant", "content": reply.content})
+        await _save_turn(conversation_id, state, persisted_count, turn_lock)
+        _record_turn("fast_path", started, guardrail_checks)
+        yield _sse("done", ChatResponse(
+            conversation_id=conversation_id,
+            current_agent=current_agent.name,
+            messages=[reply],
+            events=[],
+            **await _context_fields(req, old_version, state["context"]),
+            agents=agent_registry.catalog_for(req.agents_version),
+            guardrails=guardrail_checks,
+        ))
+        return
+
+    messages: List[MessageResponse] = []
+    events: List[AgentEvent] = []
+    result = Runner.run_streamed(
+        current_agent, state["input_items"], context=state["context"], run_config=run_config)
+    streaming_agent = current_agent.name
+    agent_started = time.perf_counter()
+    try:
+        async for event in result.stream_events():
+            if event.type == "raw_response_event":
+                if getattr(event.data, "type", None) == "response.output_text.delta":
+                    yield _sse("message_delta", {"delta": event.data.delta,
+                                                 "agent": streaming_agent})
+            elif event.type == "agent_updated_stream_event":
+                streaming_agent = event.new_agent.name
+                yield _sse("agent_updated", {"agent": streaming_agent})
+            elif event.type == "run_item_stream_event":
+                if isinstance(event.item, MessageOutputItem):
+                    message = MessageResponse(
+                        content=_item_text(event.item),
+                        agent=get_agent_name(event.item.agent))
+                    messages.append(message)
+                    yield _sse("message", message)
+                    continue
+                agent_event = _run_item_event(event)
+                if agent_event is not None:
+                    if isinstance(event.item, HandoffOutputItem):
+                        metrics.handoffs_total.inc(agent=event.item.target_agent.name)
+                    events.append(agent_event)
+                    yield _sse(agent_event.type, agent_event)
+    except InputGuardrailTripwireTriggered as e:
+        failed = e.guardrail_result.guardrail
+        gr_reasoning = getattr(
+            e.guardrail_result.output.output_info, "reasoning", "")
+        guardrail_checks = [
+            GuardrailCheck(
                 id=uuid4().hex,
-                name=name,
+                name=guardrail_name(g),
                 input=req.message,
-                reasoning="",
-                passed=True,
+                reasoning=(gr_reasoning if g == failed else ""),
+                passed=(g != failed),
                 timestamp=time.time() * 1000,
-            ))
+            )
+            for g in getattr(current_agent, "input_guardrails", [])
+        ]
+        for check in guardrail_checks:
+            yield _sse("guardrail", check)
+        # 스트리밍은 컨텍스트를 직접 수정하므로 거절된 턴의 도구 변경은 버림
+        state["context"].discard()
+        _record_turn("refused", started, guardrail_checks)
+        refusal = "Sorry, I can only answer questions related to developer profiles."
+        message = MessageResponse(content=refusal, agent=current_agent.name)
+        yield _sse("message", message)
+        yield _sse("done", ChatResponse(
+            conversation_id=conversation_id,
+            current_agent=current_agent.name,
+            messages=[message],
+            events=[],
+            **await _context_fields(req, old_version, state["context"]),
+            agents=agent_registry.catalog_for(req.agents_version),
+            guardrails=guardrail_checks,
+        ))
+        return
+    except Exception as e:
+        logger.exception("streaming run failed")
+        state["context"].discard()
+        yield _sse("error", {"conversation_id": conversation_id, "message": str(e)})
+        return
+    finally:
+        if not result.is_complete:
+            result.cancel()
+    # 스트리밍 시간(클라이언트가 이벤트를 받는 속도 포함)
+    metrics.record_phase("agent", time.perf_counter() - agent_started)
+    with metrics.phase("context_diff"):
+        changes = state["context"].changed_view()
+    with metrics.phase("profile_save"):
+        await state["context"].commit()
+    if changes:
+        context_event = AgentEvent(
+            id=uuid4().hex,
+            type="context_update",
+            agent=current_agent.name,
+            content="",
+            metadata={"changes": changes},
+            timestamp=time.time() * 1000,
+        )
+        events.append(context_event)
+        yield _sse("context_update", context_event)
 
-    return ChatResponse(
+    # 스트림 종료 후 저장
+    state["input_items"] = result.to_input_list()
+    state["current_agent"] = current_agent.name
+    await _save_turn(conversation_id, state, persisted_count, turn_lock)
+
+    guardrail_checks = [
+        GuardrailCheck(
+            id=uuid4().hex,
+            name=guardrail_name(g),
+            input=req.message,
+            reasoning="",
+            passed=True,
+            timestamp=time.time() * 1000,
+        )
+        for g in getattr(current_agent, "input_guardrails", [])
+    ]
+    _record_turn("stream", started, guardrail_checks, len(result.raw_responses))
+    yield _sse("done", ChatResponse(
         conversation_id=conversation_id,
         current_agent=current_agent.name,
         messages=messages,
         events=events,
-        context=new_context,
-        agents=_build_agents_list(),
-        guardrails=final_guardrails,
+        **await _context_fields(req, old_version, state["context"], changes),
+        agents=agent_registry.catalog_for(req.agents_version),
+        guardrails=guardrail_checks,
+    ))
+
+
+@app.post("/chat/stream")
+async def chat_stream_endpoint(req: ChatRequest):
+    """개발자 자기소개서/포트폴리오 대화 API (Server-Sent Events 스트리밍)"""
+    return StreamingResponse(
+        _chat_event_stream(req),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        },
     )
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+/chat 부하 벤치마크
+로컬 가짜 모델(fake_model.py)로 OpenAI 호출 없이 chat_endpoint를 동시에 호출해
+인메모리/Redis 저장소별 p50/p95/p99 지연, 처리량, 턴당 메모리 할당을 측정합니다.
+모델 지연을 0으로 두면 백엔드 자체의 오버헤드만 측정됩니다.
+
+REDIS_URL이 있으면 실제 Redis를, 없으면 fakeredis를 사용합니다.
+
+사용법: python bench_chat.py [동시 대화 수] [대화당 턴 수] [모델 지연 ms] [토큰 지연 ms]
+"""
+
+import asyncio
+import os
+import sys
+import time
+import tracemalloc
+
+# 가짜 모델 설정은 api/main을 불러오기 전에 지정
+os.environ["MODEL_PROVIDER"] = "fake"
+os.environ["FAKE_MODEL_LATENCY_MS"] = sys.argv[3] if len(sys.argv) > 3 else "0"
+os.environ["FAKE_MODEL_TOKEN_MS"] = sys.argv[4] if len(sys.argv) > 4 else "0"
+
+# 요청 경로의 로그 기록도 측정 대상이지만 화면에는 표시하지 않음 (api의 설정보다 먼저 설치)
+import structured_logging
+
+structured_logging.configure_logging(stream=open(os.devnull, "w"))
+import api
+from conversation_store import InMemoryConversationStore, RedisConversationStore, StateCodec
+from guardrail_cache import verdict_cache
+from main import DeveloperProfileContext
+
+# 핸드오프+도구 호출, 핸드오프만, 모델 답변만, fast path(인사)가 섞인 프로필 작성 세션
+MESSAGES = [
+    "안녕하세요",
+    "프로젝트 경험을 포트폴리오에 추가해 주세요",
+    "이메일을 dev@example.com으로 바꿔 주세요",
+    "경력 기간을 정리하고 싶어요",
+    "기술스택에 FastAPI를 넣어 주세요",
+    "포트폴리오 피드백 부탁해요",
+]
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+def create_store(backend: str):
+    codec = StateCodec(models=[DeveloperProfileContext])
+    if backend == "memory":
+        return InMemoryConversationStore(codec=codec), "인메모리"
+    if os.getenv("REDIS_URL") or os.getenv("UPSTASH_REDIS_URL"):
+        return RedisConversationStore(codec=codec), "Redis"
+    import fakeredis
+
+    return RedisConversationStore(client=fakeredis.FakeAsyncRedis(), codec=codec), "Redis (fakeredis)"
+
+
+async def conversation(n: int, turns: int, latencies):
+    conversation_id = f"bench-{n}-{time.monotonic_ns()}"
+    for turn in range(turns):
+        request = api.ChatRequest(conversation_id=conversation_id,
+                                  message=MESSAGES[(n + turn) % len(MESSAGES)])
+        started = time.perf_counter()
+        await api.chat_endpoint(request)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+
+async def measure_allocations(turns: int):
+    """Sequential turns under tracemalloc: peak and retained bytes per turn."""
+    conversation_id = f"bench-alloc-{time.monotonic_ns()}"
+    peaks = []
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    for turn in range(turns):
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        await api.chat_endpoint(api.ChatRequest(
+            conversation_id=conversation_id, message=MESSAGES[turn % len(MESSAGES)]))
+        peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    retained = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    return sum(peaks) / len(peaks), max(peaks), retained / turns
+
+
+async def run_backend(backend: str, concurrency: int, turns: int):
+    store, label = create_store(backend)
+    api.conversation_store = store
+    # 저장소마다 같은 조건에서 시작 (판정 캐시는 Redis 저장소일 때만 공유 계층 사용)
+    verdict_cache._local.clear()
+    verdict_cache.redis = store.redis if isinstance(store, RedisConversationStore) else None
+
+    # 워밍업 (가드레일 판정 캐시, 첫 실행 비용 제외)
+    await asyncio.gather(*(conversation(n, 1, []) for n in range(len(MESSAGES))))
+
+    latencies = []
+    started = time.perf_counter()
+    await asyncio.gather(*(conversation(n, turns, latencies) for n in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    avg_peak, max_peak, retained = await measure_allocations(min(turns * 2, 50))
+    return label, latencies, elapsed, avg_peak, max_peak, retained
+
+
+def main():
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    turns = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    print("🚀 /chat 부하 벤치마크 (로컬 가짜 모델)")
+    print(f"   동시 대화: {concurrency}, 대화당 턴: {turns}, "
+          f"모델 지연: {os.environ['FAKE_MODEL_LATENCY_MS']} ms, "
+          f"토큰 지연: {os.environ['FAKE_MODEL_TOKEN_MS']} ms")
+    print("=" * 96)
+    print(f"  {'저장소':<20} {'p50':>9} {'p95':>9} {'p99':>9} {'처리량':>12} "
+          f"{'턴당 피크':>11} {'최대 피크':>11} {'턴당 잔존':>11}")
+
+    failed = False
+    for backend in ("memory", "redis"):
+        label, latencies, elapsed, avg_peak, max_peak, retained = asyncio.run(
+            run_backend(backend, concurrency, turns))
+        failed |= len(latencies) != concurrency * turns
+        print(f"  {label:<20} {percentile(latencies, 0.5):>7.1f}ms {percentile(latencies, 0.95):>7.1f}ms "
+              f"{percentile(latencies, 0.99):>7.1f}ms {len(latencies) / elapsed:>7.0f} 턴/s "
+              f"{avg_peak / 1024:>8.0f} KB {max_peak / 1024:>8.0f} KB {retained / 1024:>8.1f} KB")
+
+    print("=" * 96)
+    print(f"📊 fast path: {api._fast_path_summary()}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
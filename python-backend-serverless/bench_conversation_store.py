@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+대화 저장소 백엔드 벤치마크
+인메모리 / Redis / SQLite(WAL) 저장소에서 동시 대화들이 턴(락 → 조회 → 새 항목 기록)을
+반복할 때의 턴 지연(p50/p99)과 처리량을 비교합니다.
+이어서 SQLite 파일 하나를 여러 워커 프로세스가 공유할 때 같은 대화의 턴이 워커를
+오가도 유실되지 않는지 확인합니다.
+
+REDIS_URL이 있으면 실제 Redis를, 없으면 fakeredis를 사용합니다.
+
+사용법: python bench_conversation_store.py [동시 대화 수] [대화당 턴 수] [워커 수]
+"""
+
+import asyncio
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+from conversation_store import (
+    InMemoryConversationStore,
+    RedisConversationStore,
+    SQLiteConversationStore,
+    StateCodec,
+)
+from main import DeveloperProfileContext
+
+ASSISTANT_TEXT = "프로젝트의 목적, 사용한 기술스택, 본인의 역할과 성과를 순서대로 정리해 보세요. " * 3
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+def create_store(backend: str, path: str):
+    codec = StateCodec(models=[DeveloperProfileContext])
+    if backend == "memory":
+        return InMemoryConversationStore(max_entries=100_000, codec=codec), "인메모리"
+    if backend == "sqlite":
+        return SQLiteConversationStore(path=path, codec=codec), "SQLite (WAL)"
+    if os.getenv("REDIS_URL") or os.getenv("UPSTASH_REDIS_URL"):
+        return RedisConversationStore(codec=codec), "Redis"
+    import fakeredis
+
+    return RedisConversationStore(client=fakeredis.FakeAsyncRedis(), codec=codec), "Redis (fakeredis)"
+
+
+async def turn(store, conversation_id: str, message: str):
+    """api의 턴과 같은 저장소 호출 순서 (락 안에서 조회 후 이번 턴 항목만 기록)"""
+    async with store.lock(conversation_id) as turn_lock:
+        state = await store.get(conversation_id) or {
+            "input_items": [],
+            "context": DeveloperProfileContext(user_id=conversation_id),
+            "current_agent": "트라이에이지 에이전트",
+        }
+        new_items = [{"role": "user", "content": message},
+                     {"role": "assistant", "content": ASSISTANT_TEXT}]
+        state["input_items"] = state["input_items"] + new_items
+        await store.append(conversation_id, state, new_items, lock=turn_lock)
+
+
+async def conversation(store, conversation_id: str, turns: int, latencies):
+    for n in range(turns):
+        started = time.perf_counter()
+        await turn(store, conversation_id, f"{n}번째 질문입니다.")
+        latencies.append((time.perf_counter() - started) * 1000)
+
+
+async def run_backend(backend: str, conversations: int, turns: int, path: str):
+    store, label = create_store(backend, path)
+    latencies = []
+    started = time.perf_counter()
+    await asyncio.gather(*(conversation(store, f"bench-{backend}-{n}", turns, latencies)
+                           for n in range(conversations)))
+    elapsed = time.perf_counter() - started
+    if isinstance(store, SQLiteConversationStore):
+        store.close()
+    return label, latencies, elapsed
+
+
+def worker(path: str, worker_id: int, conversations: int, turns: int):
+    """같은 SQLite 파일을 여는 별도 프로세스 (uvicorn 워커 역할)"""
+    async def run():
+        store = SQLiteConversationStore(path=path, codec=StateCodec(models=[DeveloperProfileContext]))
+        await asyncio.gather(*(turn(store, f"shared-{n}", f"워커 {worker_id}") for n in range(conversations)
+                               for _ in range(turns)))
+        store.close()
+
+    asyncio.run(run())
+
+
+def run_workers(path: str, workers: int, conversations: int, turns: int):
+    started = time.perf_counter()
+    processes = [multiprocessing.Process(target=worker, args=(path, i, conversations, turns))
+                 for i in range(workers)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - started
+
+    async def count():
+        store = SQLiteConversationStore(path=path, codec=StateCodec(models=[DeveloperProfileContext]))
+        states = [await store.get(f"shared-{n}") for n in range(conversations)]
+        store.close()
+        return [len(state["input_items"]) // 2 if state else 0 for state in states]
+
+    return elapsed, asyncio.run(count())
+
+
+def main():
+    conversations = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    turns = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+
+    print("🚀 대화 저장소 백엔드 벤치마크")
+    print(f"   동시 대화: {conversations}, 대화당 턴: {turns} (턴 = 락 + 조회 + 새 항목 기록)")
+    print("=" * 72)
+    print(f"  {'저장소':<20} {'p50':>9} {'p99':>9} {'처리량':>14}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in ("memory", "redis", "sqlite"):
+            label, latencies, elapsed = asyncio.run(
+                run_backend(backend, conversations, turns, os.path.join(tmp, "bench.db")))
+            print(f"  {label:<20} {percentile(latencies, 0.5):>7.2f}ms {percentile(latencies, 0.99):>7.2f}ms "
+                  f"{len(latencies) / elapsed:>8.0f} 턴/s")
+
+        print("=" * 72)
+        shared_turns = max(1, turns // workers)
+        elapsed, counts = run_workers(os.path.join(tmp, "shared.db"), workers, conversations, shared_turns)
+        expected = workers * shared_turns
+        lost = sum(expected - c for c in counts)
+        print(f"📊 SQLite 파일 하나를 워커 {workers}개가 공유: 대화 {conversations}개 x 턴 {expected}개, "
+              f"{conversations * expected / elapsed:.0f} 턴/s (프로세스 시작 포함), 유실된 턴 {lost}개")
+    return 0 if lost == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+FAQ 인덱스 벤치마크
+합성 FAQ 항목(기본 10,000개)으로 인덱스 빌드/캐시(JSON) 로드 시간과 조회 지연을 측정하고
+질의마다 전체 항목을 훑는 선형 스캔과 비교합니다.
+
+사용법: python bench_faq_index.py [항목 수] [질의 수]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+from faq_index import FaqIndex, read_index_cache, tokenize, write_index_cache
+
+TOPICS = ["포트폴리오", "자기소개", "경력", "프로젝트", "기술스택", "이력서", "깃허브", "블로그",
+          "오픈소스", "면접", "연봉", "이직", "신입", "README", "트러블슈팅", "성과"]
+ACTIONS = ["작성법", "정리 방법", "분량", "순서", "예시", "주의할 점", "수정 방법", "공개 범위"]
+TECHS = ["Python", "FastAPI", "React", "TypeScript", "Java", "Spring", "Kubernetes", "Redis",
+         "PostgreSQL", "Go", "Kotlin", "AWS", "Docker", "Kafka", "Django", "Next.js"]
+
+
+def build_records(count: int, rng: random.Random):
+    records = []
+    for i in range(count):
+        topic, action, tech = rng.choice(TOPICS), rng.choice(ACTIONS), rng.choice(TECHS)
+        records.append({
+            "id": f"faq-{i}",
+            "question": f"{tech} 개발자의 {topic} {action}은 어떻게 되나요? ({i})",
+            "aliases": [f"{topic} {action} {i}"],
+            "answer": f"{tech} 경험을 중심으로 {topic}의 {action}을 구체적인 사례와 함께 정리하세요.",
+        })
+    return records
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+def time_queries(fn, queries):
+    samples = []
+    for query in queries:
+        started = time.perf_counter()
+        fn(query)
+        samples.append((time.perf_counter() - started) * 1e6)
+    return samples
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    query_count = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000
+    rng = random.Random(42)
+    records = build_records(count, rng)
+    queries = [f"{rng.choice(TECHS)} {rng.choice(TOPICS)} {rng.choice(ACTIONS)}"
+               for _ in range(query_count)]
+
+    print("🚀 FAQ 인덱스 벤치마크")
+    print(f"   항목: {count:,}, 질의: {query_count:,}")
+    print("=" * 64)
+
+    started = time.perf_counter()
+    index = FaqIndex.build(records)
+    build_ms = (time.perf_counter() - started) * 1000
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_path = os.path.join(tmp, "faq_index.json")
+        write_index_cache(cache_path, index)
+        size = os.path.getsize(cache_path)
+        started = time.perf_counter()
+        index = read_index_cache(cache_path, index.source_digest)
+        load_ms = (time.perf_counter() - started) * 1000
+    print(f"  인덱스 빌드          {build_ms:>10.1f} ms")
+    print(f"  캐시(JSON) 크기      {size / 1024:>10.1f} KB")
+    print(f"  캐시 로드            {load_ms:>10.1f} ms (콜드 스타트 시 빌드 대신)")
+    print(f"  고유 토큰 수         {len(index.postings):>10,}")
+
+    # 비교 기준: 질의마다 모든 항목의 토큰 교집합을 계산하는 선형 스캔
+    doc_tokens = [set(tokenize(r["question"] + " " + r["answer"])) for r in records]
+
+    def linear_scan(query):
+        terms = set(tokenize(query))
+        return max(range(len(doc_tokens)), key=lambda i: len(terms & doc_tokens[i]))
+
+    print("=" * 64)
+    print(f"  {'경로':<20} {'p50':>10} {'p95':>10} {'p99':>10}")
+    for label, fn, sample in [("BM25 역색인", index.answer, queries),
+                              ("선형 스캔", linear_scan, queries[:100])]:
+        samples = time_queries(fn, sample)
+        print(f"  {label:<20} {percentile(samples, 0.5):>8.0f}µs {percentile(samples, 0.95):>8.0f}µs "
+              f"{percentile(samples, 0.99):>8.0f}µs")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+대화 기록 정책 벤치마크
+200턴 동안 모델에 보내는 입력(프롬프트) 크기를 기록 전체를 보내는 기존 방식과 비교합니다.
+턴마다 사용자 메시지, 간헐적인 핸드오프/도구 호출, 답변이 쌓이는 프로필 작성 세션을 흉내냅니다.
+
+사용법: python bench_history_policy.py [턴 수] [최대 항목 수] [유지 항목 수]
+"""
+
+import sys
+import time
+
+from history_policy import HistoryPolicy, prompt_size
+
+
+def turn_items(n: int):
+    items = [{"role": "user", "content": f"{n}번째 요청입니다. 프로젝트 경험을 포트폴리오에 추가하고 기술스택도 정리해 주세요."}]
+    if n % 3 == 0:
+        items += [
+            {"type": "function_call", "name": "transfer_to_project_agent", "call_id": f"handoff_{n}",
+             "arguments": "{}"},
+            {"type": "function_call_output", "call_id": f"handoff_{n}",
+             "output": '{"assistant": "프로젝트 에이전트"}'},
+        ]
+    if n % 2 == 0:
+        items += [
+            {"type": "function_call", "name": "add_project", "call_id": f"tool_{n}",
+             "arguments": f'{{"project_name": "프로젝트 {n}", "description": "FastAPI 기반 API 서버"}}'},
+            {"type": "function_call_output", "call_id": f"tool_{n}",
+             "output": f"프로젝트 '프로젝트 {n}'가 프로필에 추가되었습니다."},
+        ]
+    items.append({
+        "id": f"msg_{n:06d}", "type": "message", "role": "assistant", "status": "completed",
+        "content": [{"type": "output_text", "annotations": [],
+                     "text": "프로젝트를 추가했습니다. 목적, 역할, 성과를 수치와 함께 적으면 더 좋습니다. " * 2}],
+    })
+    return items
+
+
+def main():
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    max_items = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    keep_items = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+    policy = HistoryPolicy(max_items=max_items, keep_items=keep_items)
+
+    print("🚀 대화 기록 정책 벤치마크")
+    print(f"   턴 수: {turns}, 최대 항목: {max_items}, 유지 항목: {keep_items}")
+    print("=" * 72)
+    print(f"  {'턴':>5} {'전체 기록(항목)':>16} {'전체 기록(B)':>14} {'정책(항목)':>12} {'정책(B)':>10}")
+
+    unbounded, windowed = [], []
+    folds, fold_seconds, peak = 0, 0.0, 0
+    for n in range(1, turns + 1):
+        new_items = turn_items(n)
+        # 모델에 보내는 입력 = 저장된 기록 + 이번 턴 사용자 메시지
+        full_prompt = prompt_size(unbounded + new_items[:1])
+        policy_prompt = prompt_size(windowed + new_items[:1])
+        peak = max(peak, policy_prompt)
+        unbounded += new_items
+
+        started = time.perf_counter()
+        compacted = policy.compact(windowed + new_items)
+        fold_seconds += time.perf_counter() - started
+        folds += compacted.folded
+        windowed = compacted.items
+
+        if n == 1 or n % 25 == 0:
+            print(f"  {n:>5} {len(unbounded):>16,} {full_prompt:>14,} {len(windowed):>12,} {policy_prompt:>10,}")
+
+    print("=" * 72)
+    print(f"📊 마지막 턴 프롬프트: 전체 {full_prompt:,} B -> 정책 {policy_prompt:,} B "
+          f"({policy_prompt / full_prompt:.1%}), 정책 최대 {peak:,} B")
+    print(f"   요약 접기 {folds}회 (전체 저장), 나머지 {turns - folds}턴은 append, "
+          f"턴당 정책 비용 {fold_seconds / turns * 1e6:.0f} µs")
+    # 처음 접힌 뒤로는 크기가 평탄해야 함 (최대값이 마지막 값의 2배 이내)
+    flat = peak <= 2 * policy_prompt
+    print(f"✅ 프롬프트 크기 평탄: {flat}")
+    return 0 if flat else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+요청 경로 로그 비용 벤치마크
+기존 print 덤프(RunResult 전체 + 항목별 한 줄)와 구조화된 JSON 로그를 요청 하나가
+이벤트 루프에서 쓰는 시간으로 비교합니다. 실행 결과는 가짜 모델로 만든 실제 RunResult
+(핸드오프 + 도구 호출 + 답변, 이전 대화 기록 포함)입니다.
+
+출력은 서버리스 런타임처럼 로그 수집기가 읽는 파이프(줄 단위 버퍼)로 보냅니다.
+
+사용법: python bench_logging.py [요청 수] [덤프 샘플링 비율]
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+
+os.environ.setdefault("MODEL_PROVIDER", "fake")
+os.environ["FAKE_MODEL_LATENCY_MS"] = "0"
+os.environ["FAKE_MODEL_TOKEN_MS"] = "0"
+
+from agents import Runner
+
+import structured_logging
+from main import triage_agent, create_initial_context, run_config
+from structured_logging import JsonFormatter, configure_logging, shutdown_logging, should_dump_run
+
+
+def build_result():
+    history = []
+    for i in range(10):
+        history += [{"role": "user", "content": f"{i}번째 질문입니다. 포트폴리오 정리를 도와주세요."},
+                    {"role": "assistant", "content": "프로젝트의 목적, 역할, 성과를 순서대로 정리해 보세요. " * 3}]
+    history.append({"role": "user", "content": "프로젝트 경험을 포트폴리오에 추가해 주세요"})
+    return asyncio.run(Runner.run(triage_agent.clone(input_guardrails=[]), history,
+                                  context=create_initial_context(), run_config=run_config))
+
+
+def open_pipe():
+    """Line-buffered writer whose output is drained by a collector thread."""
+    read_fd, write_fd = os.pipe()
+    drained = [0]
+
+    def collect():
+        with os.fdopen(read_fd, "rb") as reader:
+            while chunk := reader.read1(65536):
+                drained[0] += len(chunk)
+
+    thread = threading.Thread(target=collect, daemon=True)
+    thread.start()
+    return os.fdopen(write_fd, "w", buffering=1), thread, drained
+
+
+def legacy(result, out):
+    """api.py의 이전 코드와 같은 출력"""
+    print("=== RUNNER RESULT ===", file=out)
+    print(result, file=out)
+    items = result.new_items
+    print(f"=== items (len={len(items)}) ===", file=out)
+    for idx, item in enumerate(items):
+        print(f"Item {idx}: type={type(item)}, agent={getattr(item, 'agent', None)}", file=out)
+
+
+def structured(logger, rate):
+    def log(result, out):
+        if should_dump_run(rate):
+            logger.info("run dump", extra={"run": result})
+        logger.info("turn completed", extra={"path": "model", "duration_ms": 812.4, "model_calls": 3,
+                                             "guardrails_tripped": []})
+    return log
+
+
+def measure(label, fn, result, out, requests):
+    samples = []
+    for n in range(requests):
+        structured_logging.conversation_id.set(f"bench-{n}")
+        started = time.perf_counter()
+        fn(result, out)
+        samples.append((time.perf_counter() - started) * 1e6)
+    ordered = sorted(samples)
+    print(f"  {label:<26} {sum(samples) / len(samples):>9.1f}µs {ordered[len(ordered) // 2]:>9.1f}µs "
+          f"{ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]:>9.1f}µs")
+    return sum(samples) / len(samples)
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+    rate = float(sys.argv[2]) if len(sys.argv) > 2 else structured_logging.LOG_RUN_SAMPLE_RATE
+    result = build_result()
+
+    print("🚀 요청 경로 로그 비용 벤치마크")
+    print(f"   요청: {requests:,}, 실행 결과 repr: {len(repr(result)):,}자, 덤프 샘플링: {rate:.0%}")
+    print("=" * 64)
+    print(f"  {'방식':<26} {'평균':>11} {'p50':>11} {'p99':>11}")
+
+    out, collector, drained = open_pipe()
+    before = measure("print 덤프 (기존)", legacy, result, out, requests)
+
+    # 같은 JSON 로그를 호출 스레드에서 바로 쓰는 경우 (큐의 효과만 분리)
+    sync_logger = logging.getLogger("bench.sync")
+    sync_logger.propagate = False
+    handler = logging.StreamHandler(out)
+    handler.setFormatter(JsonFormatter())
+    sync_logger.addHandler(handler)
+    sync_logger.setLevel(logging.INFO)
+    measure("JSON 동기 기록 (샘플링)", structured(sync_logger, rate), result, out, requests)
+
+    configure_logging(stream=out)
+    queue_logger = logging.getLogger("bench.queue")
+    after = measure("JSON 큐 기록 (샘플링)", structured(queue_logger, rate), result, out, requests)
+    started = time.perf_counter()
+    shutdown_logging()
+    drain_ms = (time.perf_counter() - started) * 1000
+    out.close()
+    collector.join()
+
+    print("=" * 64)
+    print(f"📊 요청당 로그 비용 {before:.1f}µs -> {after:.1f}µs ({before / after:.0f}배), "
+          f"종료 시 큐 비우기 {drain_ms:.1f} ms, 기록된 로그 {drained[0] / 1024:,.0f} KB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+좌석 재고 동시 예약 벤치마크
+한 항공편에 많은 예약자가 동시에 연속 좌석(1~3석)을 잡아 매진될 때까지 예약하고,
+저장소별 예약 지연(p50/p99), 처리량, 중복 예약 여부를 확인합니다.
+연속 빈 좌석 검색은 좌석별 순회와 비트맵 변환(bytes.translate) 방식을 비교합니다.
+
+REDIS_URL이 있으면 실제 Redis를, 없으면 fakeredis를 사용합니다.
+
+사용법: python bench_seat_inventory.py [동시 예약자 수] [항공편 수]
+"""
+
+import asyncio
+import os
+import sys
+import time
+import timeit
+
+from seat_inventory import DEFAULT_LAYOUT, SeatInventory, SeatLayout
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+def create_inventory(backend: str):
+    if backend == "local":
+        return SeatInventory(), "로컬 (bytearray)"
+    url = os.getenv("REDIS_URL") or os.getenv("UPSTASH_REDIS_URL")
+    if url:
+        import redis.asyncio as aioredis
+
+        return SeatInventory(redis_client=aioredis.Redis.from_url(url)), "Redis"
+    import fakeredis
+
+    # 예약자마다 연결 하나를 쓰므로 풀 크기를 넉넉하게
+    return SeatInventory(redis_client=fakeredis.FakeAsyncRedis(max_connections=10_000)), "Redis (fakeredis)"
+
+
+async def booker(inventory: SeatInventory, flight: str, n: int, latencies, bookings):
+    count = 1 + n % 3
+    while True:
+        started = time.perf_counter()
+        seats = await inventory.reserve_adjacent(flight, count, f"user-{n}")
+        latencies.append((time.perf_counter() - started) * 1000)
+        if seats is None:
+            return
+        bookings.extend(seats)
+
+
+async def run_backend(backend: str, bookers: int, flights: int):
+    inventory, label = create_inventory(backend)
+    latencies, bookings = [], []
+    run_id = time.time_ns() // 1000
+    started = time.perf_counter()
+    for f in range(flights):
+        # 항공편 번호 형식(FLIGHT_NUMBER)에 맞추되 실행마다 다른 번호 (실제 Redis에 남은 이전 실행과 겹치지 않게)
+        flight = f"BN-{(run_id + f) % 10_000:04d}"
+        flight_bookings = []
+        await asyncio.gather(*(booker(inventory, flight, n, latencies, flight_bookings)
+                               for n in range(bookers)))
+        if len(flight_bookings) != len(set(flight_bookings)):
+            raise AssertionError(f"{label}: 같은 좌석이 중복 예약되었습니다.")
+        bookings.append((len(flight_bookings), await inventory.available(flight)))
+    return label, latencies, time.perf_counter() - started, bookings
+
+
+def naive_find_adjacent(layout: SeatLayout, occupied, count: int):
+    """좌석별로 순회하는 비교용 검색"""
+    for row, letters in enumerate(layout.rows):
+        run = 0
+        for i, letter in enumerate(letters):
+            run = 0 if f"{row + 1}{letter}" in occupied else run + 1
+            if run == count:
+                return [f"{row + 1}{letters[j]}" for j in range(i - count + 1, i + 1)]
+    return None
+
+
+def bench_search():
+    # 거의 찬 항공편: 마지막 열에만 3석 연속 빈자리
+    layout = DEFAULT_LAYOUT
+    bitmap = bytearray(b"\xff" * len(layout.rows))
+    bitmap[-1] = 0b0001_1111 | layout.empty[-1]
+    occupied = {layout.seat(o) for o in range(len(bitmap) * 8)
+                if o // 8 < len(layout.rows) and o % 8 < len(layout.rows[o // 8]) and bitmap[o // 8] & (0x80 >> o % 8)}
+    bitmap = bytes(bitmap)
+    assert naive_find_adjacent(layout, occupied, 3) == [layout.seat(o) for o in layout.find_adjacent(bitmap, 3)]
+    n = 20_000
+    naive = timeit.timeit(lambda: naive_find_adjacent(layout, occupied, 3), number=n) / n * 1e6
+    fast = timeit.timeit(lambda: layout.find_adjacent(bitmap, 3), number=n) / n * 1e6
+    return naive, fast
+
+
+def main():
+    bookers = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    flights = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    print("🚀 좌석 재고 동시 예약 벤치마크")
+    print(f"   항공편당 좌석: {DEFAULT_LAYOUT.capacity}, 동시 예약자: {bookers}, 항공편: {flights}")
+    print("=" * 88)
+    print(f"  {'저장소':<20} {'p50':>9} {'p99':>9} {'처리량':>14} {'예약/남은 좌석':>14}")
+    for backend in ("local", "redis"):
+        label, latencies, elapsed, bookings = asyncio.run(run_backend(backend, bookers, flights))
+        booked, left = bookings[-1]
+        print(f"  {label:<20} {percentile(latencies, 0.5):>7.2f}ms {percentile(latencies, 0.99):>7.2f}ms "
+              f"{len(latencies) / elapsed:>8.0f} 요청/s {booked:>10}/{left}")
+
+    naive, fast = bench_search()
+    print("=" * 88)
+    print(f"📊 연속 빈 좌석 검색 (거의 만석): 좌석별 순회 {naive:.2f}µs -> 비트맵 변환 {fast:.2f}µs "
+          f"({naive / fast:.0f}배), 중복 예약 없음")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
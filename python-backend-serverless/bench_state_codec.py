@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+상태 코덱 벤치마크
+기존 JSON 경로(json.dumps(default=str))와 StateCodec의 전송 바이트 수,
+인코딩/디코딩 시간을 비교합니다.
+
+사용법: python bench_state_codec.py [턴 수] [반복 횟수]
+"""
+
+import json
+import sys
+import timeit
+
+from conversation_store import StateCodec, orjson, zstandard
+from main import DeveloperProfileContext
+
+
+def build_state(turns: int):
+    """긴 한국어 대화 기록을 가진 상태 생성"""
+    items = []
+    for i in range(turns):
+        items.append({
+            "role": "user",
+            "content": f"{i}번째 질문입니다. 백엔드 개발자로서 Python과 FastAPI로 진행한 프로젝트를 포트폴리오에 어떻게 정리하면 좋을까요?",
+        })
+        items.append({
+            "id": f"msg_{i:06d}",
+            "type": "message",
+            "role": "assistant",
+            "status": "completed",
+            "content": [{
+                "type": "output_text",
+                "annotations": [],
+                "text": "프로젝트의 목적, 사용한 기술스택, 본인의 역할과 성과를 순서대로 정리해 보세요. "
+                        "성능 개선이나 장애 대응 경험이 있다면 수치와 함께 적는 것이 좋습니다. " * 2,
+            }],
+        })
+    return {
+        "input_items": items,
+        "context": DeveloperProfileContext(
+            name="홍길동", email="hong@example.com", github="github.com/hong"),
+        "current_agent": "프로젝트 에이전트",
+    }
+
+
+def legacy_encode(state) -> bytes:
+    return json.dumps(state, default=str, ensure_ascii=False).encode("utf-8")
+
+
+def legacy_decode(data: bytes):
+    return json.loads(data)
+
+
+def bench(label: str, encode, decode, state, repeat: int):
+    encoded = encode(state)
+    size = len(encoded) if isinstance(encoded, bytes) else sum(len(e) for e in encoded)
+    encode_ms = timeit.timeit(lambda: encode(state), number=repeat) / repeat * 1000
+    decode_ms = timeit.timeit(lambda: decode(encoded), number=repeat) / repeat * 1000
+    print(f"  {label:<28} {size:>10,} B {encode_ms:>10.3f} ms {decode_ms:>10.3f} ms")
+    return size
+
+
+def main():
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    print("🚀 상태 코덱 벤치마크")
+    print(f"   턴 수: {turns}, 반복: {repeat}")
+    print(f"   orjson: {'사용' if orjson else '미설치 (json 폴백)'}, "
+          f"zstd: {'사용' if zstandard else '미설치 (zlib 폴백)'}")
+    print("=" * 72)
+    print(f"  {'경로':<28} {'크기':>12} {'인코딩':>13} {'디코딩':>13}")
+
+    state = build_state(turns)
+    codec = StateCodec(models=[DeveloperProfileContext])
+
+    legacy_size = bench("legacy json (전체 상태)", legacy_encode, legacy_decode, state, repeat)
+    codec_size = bench("StateCodec (전체 상태)", codec.encode, codec.decode, state, repeat)
+    # 스토어는 항목 단위로 인코딩하므로 항목별 경로도 측정
+    item_size = bench(
+        "StateCodec (항목 단위)",
+        lambda s: [codec.encode(item) for item in s["input_items"]] + [codec.encode(s["context"])],
+        lambda encoded: codec.decode_many(encoded[:-1]) + [codec.decode(encoded[-1])],
+        state, repeat)
+
+    print("=" * 72)
+    print(f"📊 전체 상태 크기: {codec_size / legacy_size:.1%} (legacy 대비), "
+          f"항목 단위: {item_size / legacy_size:.1%}")
+
+    decoded = codec.decode(codec.encode(state))
+    typed = isinstance(decoded["context"], DeveloperProfileContext)
+    print(f"✅ DeveloperProfileContext 타입 유지: {typed}")
+    return 0 if typed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""pytest 공용 픽스처"""
+
+import asyncio
+import inspect
+
+import pytest
+
+
+class LatencyFakeRedis:
+    """fakeredis 위에 네트워크 왕복 지연을 흉내내는 asyncio Redis 대역
+
+    모든 명령은 ``latency`` 초 동안 await 한 뒤 실행되므로, 이벤트 루프를
+    막지 않는 클라이언트라면 동시 요청이 겹쳐서 처리됩니다.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        import fakeredis
+
+        self._redis = fakeredis.FakeAsyncRedis()
+        self.latency = latency
+        self.calls = []
+
+    @property
+    def round_trips(self) -> int:
+        """지금까지 발생한 서버 왕복 수 (파이프라인은 1회로 계산)"""
+        return len(self.calls)
+
+    def pipeline(self, *args, **kwargs):
+        return _LatencyFakePipeline(self, self._redis.pipeline(*args, **kwargs))
+
+    def __getattr__(self, name):
+        attr = getattr(self._redis, name)
+        if not callable(attr):
+            return attr
+
+        # redis-py 명령은 코루틴 함수가 아니라 awaitable 을 반환하는 일반 함수
+        def command(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            if not inspect.isawaitable(result):
+                return result
+
+            async def round_trip():
+                self.calls.append(name)
+                await asyncio.sleep(self.latency)
+                return await result
+
+            return round_trip()
+
+        return command
+
+
+class _LatencyFakePipeline:
+    """명령을 모아 두었다가 execute() 시 한 번의 왕복으로 전송하는 파이프라인"""
+
+    def __init__(self, owner: LatencyFakeRedis, pipe):
+        self._owner = owner
+        self._pipe = pipe
+
+    def __getattr__(self, name):
+        return getattr(self._pipe, name)
+
+    async def execute(self, *args, **kwargs):
+        self._owner.calls.append("pipeline")
+        await asyncio.sleep(self._owner.latency)
+        return await self._pipe.execute(*args, **kwargs)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._pipe.reset()
+
+
+@pytest.fixture
+def fake_redis_factory():
+    """지연 시간을 지정해 LatencyFakeRedis 를 만드는 팩토리"""
+    pytest.importorskip("fakeredis")
+    return LatencyFakeRedis
@@ -1,114 +1,1410 @@
-import redis
+import redis.asyncio as aioredis
+import asyncio
 import json
+import copy
+import functools
+import logging
 import os
-from typing import Optional, Dict, Any
+import sqlite3
+import time
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from typing import (
+    Optional, Dict, Any, List, Iterable, Iterator, Type, Callable, Tuple, AsyncIterator, AsyncContextManager,
+    Awaitable,
+)
 from abc import ABC, abstractmethod
+from pydantic import BaseModel
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:  # 선택 의존성: 없으면 표준 json 사용
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:  # 선택 의존성: 없으면 zlib 압축 사용
+    zstandard = None
+
+# 대화 상태 기본 TTL (2시간)
+DEFAULT_TTL_SECONDS = 7200
+
+# 완료된 응답 재전송(idempotency) 캐시 TTL
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL", "300"))
+
+# 대화별 턴 락: 최대 보유 시간(락 자동 만료)과 획득 대기 시간
+LOCK_TTL_SECONDS = float(os.getenv("CONVERSATION_LOCK_TTL", "120"))
+LOCK_WAIT_SECONDS = float(os.getenv("CONVERSATION_LOCK_WAIT", "30"))
+
+
+class ConversationBusyError(Exception):
+    """다른 요청이 같은 대화의 턴을 처리 중이라 락을 얻지 못함"""
+
+
+class ConversationConflictError(Exception):
+    """락이 만료되어 다른 요청이 넘겨받은 뒤 기록을 시도함 (펜싱 토큰 불일치)"""
+
+
+@dataclass
+class ConversationLock:
+    """대화별 턴 락 핸들
+
+    ``token``은 획득할 때마다 증가하는 펜싱 토큰입니다. 저장소의 ``save``/``append``에
+    핸들을 넘기면 락을 여전히 보유한 경우에만 기록합니다.
+    """
+    conversation_id: str
+    token: int
+    released: bool = False
+
+
+# =========================
+# 상태 코덱
+# =========================
+
+
+class StateCodec:
+    """저장용 상태 직렬화 코덱
+
+    형식: ``MAGIC(2) | VERSION(1) | COMPRESSION(1) | 본문``
+
+    - 본문은 JSON (orjson이 있으면 orjson, 없으면 표준 json)
+    - ``compress_threshold`` 바이트를 넘는 본문만 압축 (zstd, 없으면 zlib)
+    - ``models``로 등록한 pydantic 모델은 ``{"__model__": 이름, "data": ...}``로
+      기록되어 디코딩 시 같은 타입으로 복원됩니다.
+    - 헤더가 없는 값은 이전 버전의 평문 JSON으로 간주합니다.
+    """
+
+    MAGIC = b"\x00\xc5"
+    VERSION = 1
+    COMPRESSION_NONE = 0
+    COMPRESSION_ZLIB = 1
+    COMPRESSION_ZSTD = 2
+
+    def __init__(self, models: Iterable[Type[BaseModel]] = (), compress_threshold: int = 1024, level: int = 3):
+        self._models = {model.__name__: model for model in models}
+        self.compress_threshold = compress_threshold
+        self.level = level
+        if zstandard is not None:
+            self._compression = self.COMPRESSION_ZSTD
+            self._zstd_compressor = zstandard.ZstdCompressor(level=level)
+            self._zstd_decompressor = zstandard.ZstdDecompressor()
+        else:
+            self._compression = self.COMPRESSION_ZLIB
+
+    def _default(self, value: Any) -> Any:
+        if isinstance(value, BaseModel):
+            name = type(value).__name__
+            if name in self._models:
+                return {"__model__": name, "data": value.model_dump(mode="json")}
+            return value.model_dump(mode="json")
+        return str(value)
+
+    def _revive(self, value: Any) -> Any:
+        if isinstance(value, dict):
+            name = value.get("__model__")
+            if name in self._models and "data" in value:
+                return self._models[name].model_validate(value["data"])
+            return {k: self._revive(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self._revive(v) for v in value]
+        return value
+
+    def _dumps(self, value: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(value, default=self._default)
+        return json.dumps(value, default=self._default, ensure_ascii=False,
+                          separators=(",", ":")).encode("utf-8")
+
+    @staticmethod
+    def _loads(data: bytes) -> Any:
+        if orjson is not None:
+            return orjson.loads(data)
+        return json.loads(data)
+
+    def encode(self, value: Any) -> bytes:
+        """값을 헤더가 붙은 바이트열로 인코딩"""
+        body = self._dumps(value)
+        compression = self.COMPRESSION_NONE
+        if len(body) > self.compress_threshold:
+            compression = self._compression
+            if compression == self.COMPRESSION_ZSTD:
+                body = self._zstd_compressor.compress(body)
+            else:
+                body = zlib.compress(body, self.level)
+        return self.MAGIC + bytes((self.VERSION, compression)) + body
+
+    def decode(self, data: bytes) -> Any:
+        """encode()의 역변환 (헤더 없는 평문 JSON도 허용)"""
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        if not data.startswith(self.MAGIC):
+            return self._loads(data)
+        version, compression = data[2], data[3]
+        if version != self.VERSION:
+            raise ValueError(f"지원하지 않는 상태 코덱 버전: {version}")
+        body = data[4:]
+        if compression == self.COMPRESSION_ZSTD:
+            if zstandard is None:
+                raise ValueError("zstd로 압축된 상태를 읽으려면 zstandard 패키지가 필요합니다.")
+            body = self._zstd_decompressor.decompress(body)
+        elif compression == self.COMPRESSION_ZLIB:
+            body = zlib.decompress(body)
+        value = self._loads(body)
+        # 모델 마커가 없는 본문은 트리 순회를 생략
+        if self._models and b'"__model__"' in body:
+            value = self._revive(value)
+        return value
+
+    def decode_many(self, values: List[bytes]) -> List[Any]:
+        """여러 값을 디코딩
+
+        압축되지 않은 본문은 JSON 배열로 이어 붙여 한 번에 파싱합니다.
+        """
+        header = self.MAGIC + bytes((self.VERSION, self.COMPRESSION_NONE))
+        bodies = []
+        for value in values:
+            if not value.startswith(header):
+                return [self.decode(v) for v in values]
+            bodies.append(value[4:])
+        body = b"[" + b",".join(bodies) + b"]"
+        items = self._loads(body)
+        if self._models and b'"__model__"' in body:
+            items = self._revive(items)
+        return items
 
 
 class ConversationStore(ABC):
-    """대화 상태 저장소의 추상 클래스"""
+    """대화 상태 저장소의 추상 클래스 (비동기 인터페이스)"""
+
+    # 지표(``store_operation_seconds``)의 ``backend`` 라벨
+    backend = "unknown"
 
     @abstractmethod
-    def get(self, conversation_id: str) -> Optional[Dict[str, Any]]:
-        """대화 상태 조회"""
+    async def get(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """대화 상태 조회 (TTL 갱신 포함)"""
+        pass
+
+    @abstractmethod
+    async def save(self, conversation_id: str, state: Dict[str, Any],
+                   lock: Optional[ConversationLock] = None):
+        """대화 상태 저장 (TTL 갱신 포함), 새 버전을 반환 (저장 오류 시 None)
+
+        ``lock``을 넘기면 락을 보유한 경우에만 기록하고, 아니면 ConversationConflictError를 발생시킵니다.
+        기록해도 락은 해제되지 않으며 ``lock()``을 벗어날 때 해제됩니다.
+        """
         pass
 
+    async def append(self, conversation_id: str, state: Dict[str, Any], new_items: List[Dict[str, Any]],
+                     lock: Optional[ConversationLock] = None):
+        """이번 턴에 추가된 항목만 기록 (기본 구현은 전체 저장)
+
+        ``state["input_items"]``는 이미 ``new_items``를 포함한 전체 기록이어야 합니다.
+        """
+        return await self.save(conversation_id, state, lock=lock)
+
     @abstractmethod
-    def save(self, conversation_id: str, state: Dict[str, Any]):
-        """대화 상태 저장"""
+    def lock(self, conversation_id: str,
+             wait_timeout: float = LOCK_WAIT_SECONDS) -> AsyncContextManager[ConversationLock]:
+        """대화별 턴 락 (같은 대화의 턴을 직렬화)
+
+        ``wait_timeout`` 안에 얻지 못하면 ConversationBusyError를 발생시킵니다.
+        """
         pass
 
     @abstractmethod
-    def delete(self, conversation_id: str):
+    async def delete(self, conversation_id: str):
         """대화 상태 삭제"""
         pass
 
+    @abstractmethod
+    async def touch(self, conversation_id: str, ttl_seconds: int = DEFAULT_TTL_SECONDS):
+        """대화 상태 TTL 연장"""
+        pass
+
+    @abstractmethod
+    async def get_cached_response(self, idempotency_key: str) -> Optional[Dict[str, Any]]:
+        """idempotency 키로 저장된 완료 응답 조회"""
+        pass
+
+    @abstractmethod
+    async def cache_response(self, idempotency_key: str, response: Dict[str, Any],
+                             ttl_seconds: int = IDEMPOTENCY_TTL_SECONDS):
+        """완료 응답을 짧은 TTL로 저장 (재시도 시 재전송용)"""
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        """저장소 카운터 (용량 산정용)"""
+        return {}
+
 
 class RedisConversationStore(ConversationStore):
-    """Redis 기반 대화 상태 저장소 - 서버리스 환경에 적합"""
+    """Redis 기반 대화 상태 저장소 - 서버리스 환경에 적합
 
-    def __init__(self):
+    asyncio Redis 클라이언트와 크기가 제한된 커넥션 풀을 사용하므로
+    Redis 왕복 중에도 이벤트 루프가 다른 요청을 처리할 수 있습니다.
+
+    대화는 append-only 로그로 저장됩니다.
+    - ``conversation:{id}:meta``  해시: ``current_agent``, ``context``, ``version``
+    - ``conversation:{id}:items`` 리스트: 입력 항목 (턴마다 새 항목만 RPUSH)
+
+    값은 ``StateCodec``으로 인코딩됩니다.
+    """
+
+    backend = "redis"
+
+    def __init__(self, client: Optional[aioredis.Redis] = None, max_connections: Optional[int] = None,
+                 codec: Optional[StateCodec] = None):
+        self.codec = codec or StateCodec()
+        self.redis = client if client is not None else self._connect(max_connections)
+        # 락/기록 스크립트는 EVALSHA로 실행 (서버 캐시에 없으면 EVAL로 자동 재시도)
+        self._acquire_script = self.redis.register_script(self._ACQUIRE_LUA)
+        self._release_script = self.redis.register_script(self._RELEASE_LUA)
+        self._write_script = self.redis.register_script(self._WRITE_LUA)
+
+    @staticmethod
+    def _connect(max_connections: Optional[int]) -> aioredis.Redis:
+        """환경변수의 Redis URL로 커넥션 풀 클라이언트 생성 (연결은 첫 명령 때 맺음)"""
         redis_url = os.getenv("REDIS_URL") or os.getenv("UPSTASH_REDIS_URL")
         if not redis_url:
             raise ValueError(
                 "Redis URL이 필요합니다. 환경변수 REDIS_URL 또는 UPSTASH_REDIS_URL을 설정해주세요."
             )
 
-        self.redis = redis.Redis.from_url(redis_url, decode_responses=True)
+        max_connections = max_connections or int(
+            os.getenv("REDIS_MAX_CONNECTIONS", "20"))
+        pool = aioredis.BlockingConnectionPool.from_url(
+            redis_url,
+            max_connections=max_connections,
+            timeout=float(os.getenv("REDIS_POOL_TIMEOUT", "5")),
+            # 코덱이 바이너리(압축) 값을 기록하므로 응답은 bytes로 받음
+            decode_responses=False,
+        )
+        return aioredis.Redis(connection_pool=pool)
+
+    @staticmethod
+    def _keys(conversation_id: str):
+        """(헤더 해시 키, 항목 리스트 키)"""
+        return f"conversation:{conversation_id}:meta", f"conversation:{conversation_id}:items"
 
-        # 연결 테스트
+    def _dumps(self, value: Any) -> bytes:
+        return self.codec.encode(value)
+
+    async def get(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """대화 상태 조회"""
+        state, _ = await self.get_versioned(conversation_id)
+        return state
+
+    async def get_versioned(self, conversation_id: str) -> Tuple[Optional[Dict[str, Any]], Optional[int]]:
+        """대화 상태와 버전 조회
+
+        헤더 해시와 항목 로그를 읽고 TTL을 갱신하는 작업을 하나의 파이프라인(1회 왕복)으로 처리합니다.
+        """
+        meta_key, items_key = self._keys(conversation_id)
         try:
-            self.redis.ping()
-            print("✅ Redis 연결 성공")
+            with metrics.store_operation("get", self.backend):
+                async with self.redis.pipeline(transaction=False) as pipe:
+                    pipe.hgetall(meta_key)
+                    pipe.lrange(items_key, 0, -1)
+                    pipe.expire(meta_key, DEFAULT_TTL_SECONDS)
+                    pipe.expire(items_key, DEFAULT_TTL_SECONDS)
+                    meta, raw_items, _, _ = await pipe.execute()
+            if not meta:
+                return None, None
+            metrics.store_bytes.observe(
+                sum(map(len, raw_items)) + len(meta.get(b"context", b"")), op="read")
+            current_agent = meta[b"current_agent"]
+            state = {
+                "input_items": self.codec.decode_many(raw_items),
+                "context": self.codec.decode(meta[b"context"]),
+                "current_agent": current_agent.decode("utf-8"),
+            }
+            return state, int(meta.get(b"version", 0))
+        except (ValueError, zlib.error) as e:
+            # json.JSONDecodeError / orjson.JSONDecodeError 모두 ValueError의 하위 클래스
+            logger.warning("상태 디코딩 오류: %s", e)
+            return None, None
         except Exception as e:
-            print(f"❌ Redis 연결 실패: {e}")
-            raise
+            logger.warning("Redis 조회 오류: %s", e)
+            return None, None
 
-    def get(self, conversation_id: str) -> Optional[Dict[str, Any]]:
-        """대화 상태 조회"""
+    async def get_version(self, conversation_id: str) -> Optional[int]:
+        """상태 본문 없이 버전만 조회 (TTL 갱신 포함, 1회 왕복)
+
+        대화가 없으면 None을 반환합니다.
+        """
+        meta_key, items_key = self._keys(conversation_id)
         try:
-            data = self.redis.get(f"conversation:{conversation_id}")
-            if data:
-                return json.loads(data)
-            return None
-        except json.JSONDecodeError as e:
-            print(f"JSON 파싱 오류: {e}")
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.hget(meta_key, "version")
+                pipe.expire(meta_key, DEFAULT_TTL_SECONDS)
+                pipe.expire(items_key, DEFAULT_TTL_SECONDS)
+                version, exists, _ = await pipe.execute()
+            if not exists:
+                return None
+            return int(version or 0)
+        except Exception as e:
+            logger.warning("Redis 조회 오류: %s", e)
             return None
+
+    async def save(self, conversation_id: str, state: Dict[str, Any],
+                   lock: Optional[ConversationLock] = None) -> Optional[int]:
+        """대화 상태 전체 저장 (항목 로그를 다시 작성, 2시간 TTL 설정)
+
+        새 버전을 반환합니다.
+        """
+        return await self._write(conversation_id, state, state["input_items"], True, lock)
+
+    async def append(self, conversation_id: str, state: Dict[str, Any],
+                     new_items: List[Dict[str, Any]], lock: Optional[ConversationLock] = None) -> Optional[int]:
+        """새 항목만 로그에 추가하고 헤더를 갱신 (1회 왕복, 쓰기 비용은 이번 턴 크기에 비례)
+
+        새 버전을 반환합니다.
+        """
+        return await self._write(conversation_id, state, new_items, False, lock)
+
+    async def _write(self, conversation_id: str, state: Dict[str, Any], items: List[Dict[str, Any]],
+                     reset: bool, lock: Optional[ConversationLock]) -> Optional[int]:
+        if lock is not None:
+            return await self._write_locked(conversation_id, state, items, reset, lock)
+        meta_key, items_key = self._keys(conversation_id)
+        context = self._dumps(state["context"])
+        encoded = [self._dumps(item) for item in items]
+        metrics.store_bytes.observe(len(context) + sum(map(len, encoded)), op="write")
+        try:
+            with metrics.store_operation("write", self.backend):
+                async with self.redis.pipeline(transaction=True) as pipe:
+                    pipe.hincrby(meta_key, "version", 1)
+                    if reset:
+                        pipe.delete(items_key)
+                    pipe.hset(meta_key, mapping={
+                        "current_agent": state["current_agent"], "context": context})
+                    if encoded:
+                        pipe.rpush(items_key, *encoded)
+                    pipe.expire(meta_key, DEFAULT_TTL_SECONDS)
+                    pipe.expire(items_key, DEFAULT_TTL_SECONDS)
+                    results = await pipe.execute()
+            return results[0]
         except Exception as e:
-            print(f"Redis 조회 오류: {e}")
+            logger.warning("Redis 저장 오류: %s", e)
             return None
 
-    def save(self, conversation_id: str, state: Dict[str, Any]):
-        """대화 상태 저장 (2시간 TTL 설정)"""
+    async def _write_locked(self, conversation_id: str, state: Dict[str, Any], items: List[Dict[str, Any]],
+                            reset: bool, lock: ConversationLock) -> Optional[int]:
+        """락 보유 여부 확인 + 기록을 하나의 스크립트(1회 왕복)로 처리 (락 해제는 ``lock()``의 종료 시)"""
+        if lock.released:
+            raise ConversationConflictError(
+                f"이미 해제된 락으로 기록할 수 없습니다: {conversation_id}")
+        meta_key, items_key = self._keys(conversation_id)
+        context = self._dumps(state["context"])
+        encoded = [self._dumps(item) for item in items]
+        metrics.store_bytes.observe(len(context) + sum(map(len, encoded)), op="write")
         try:
-            # 2시간 후 자동 삭제 (7200초)
-            self.redis.setex(
-                f"conversation:{conversation_id}",
-                7200,  # 2시간 TTL
-                json.dumps(state, default=str, ensure_ascii=False)
-            )
+            with metrics.store_operation("write", self.backend):
+                version = await self._write_script(
+                    keys=[self._lock_key(conversation_id), meta_key, items_key],
+                    args=[lock.token, DEFAULT_TTL_SECONDS, int(reset), state["current_agent"],
+                          context, *encoded],
+                    client=self.redis,
+                )
         except Exception as e:
-            print(f"Redis 저장 오류: {e}")
+            logger.warning("Redis 저장 오류: %s", e)
+            return None
+        if version == -1:
+            lock.released = True
+            raise ConversationConflictError(
+                f"락이 만료되어 다른 요청이 대화를 처리 중입니다: {conversation_id}")
+        return version
+
+    # =========================
+    # 대화별 턴 락 (펜싱 토큰)
+    # =========================
+
+    # KEYS: lock, fence / ARGV: lock ttl(ms), fence ttl(s)
+    _ACQUIRE_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return false
+end
+local token = redis.call('INCR', KEYS[2])
+redis.call('EXPIRE', KEYS[2], ARGV[2])
+redis.call('SET', KEYS[1], token, 'PX', ARGV[1])
+return token
+"""
+
+    # KEYS: lock / ARGV: token
+    _RELEASE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+    # KEYS: lock, meta, items / ARGV: token, ttl, reset, current_agent, context, items...
+    _WRITE_LUA = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return -1
+end
+if ARGV[3] == '1' then
+    redis.call('DEL', KEYS[3])
+end
+local version = redis.call('HINCRBY', KEYS[2], 'version', 1)
+redis.call('HSET', KEYS[2], 'current_agent', ARGV[4], 'context', ARGV[5])
+for i = 6, #ARGV, 1000 do
+    redis.call('RPUSH', KEYS[3], unpack(ARGV, i, math.min(i + 999, #ARGV)))
+end
+redis.call('EXPIRE', KEYS[2], ARGV[2])
+redis.call('EXPIRE', KEYS[3], ARGV[2])
+return version
+"""
+
+    @staticmethod
+    def _lock_key(conversation_id: str) -> str:
+        return f"conversation:{conversation_id}:lock"
+
+    @asynccontextmanager
+    async def lock(self, conversation_id: str, wait_timeout: float = LOCK_WAIT_SECONDS,
+                   ttl_seconds: float = LOCK_TTL_SECONDS) -> AsyncIterator[ConversationLock]:
+        """Redis 기반 대화별 턴 락
+
+        락은 ``ttl_seconds`` 후 자동 만료되므로 인스턴스가 죽어도 대화가 영구히 잠기지 않습니다.
+        만료 후 다른 요청이 락을 얻으면 펜싱 토큰이 바뀌어 이전 보유자의 기록은 거부됩니다.
+        """
+        keys = [self._lock_key(conversation_id), f"conversation:{conversation_id}:fence"]
+        args = [int(ttl_seconds * 1000), DEFAULT_TTL_SECONDS]
+        deadline = time.monotonic() + wait_timeout
+        delay = 0.02
+        # 다른 요청이 락을 가진 동안의 대기(재시도 간격)까지 포함
+        with metrics.store_operation("lock", self.backend):
+            while True:
+                token = await self._acquire_script(keys=keys, args=args, client=self.redis)
+                if token is not None:
+                    break
+                if time.monotonic() + delay > deadline:
+                    raise ConversationBusyError(
+                        f"다른 요청이 대화를 처리 중입니다: {conversation_id}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 0.25)
+
+        handle = ConversationLock(conversation_id, int(token))
+        try:
+            yield handle
+        finally:
+            if not handle.released:
+                handle.released = True
+                try:
+                    await self._release_script(keys=keys[:1], args=[handle.token], client=self.redis)
+                except Exception as e:
+                    logger.warning("Redis 락 해제 오류: %s", e)
 
-    def delete(self, conversation_id: str):
+    async def delete(self, conversation_id: str):
         """대화 상태 삭제"""
         try:
-            self.redis.delete(f"conversation:{conversation_id}")
+            await self.redis.delete(*self._keys(conversation_id))
+        except Exception as e:
+            logger.warning("Redis 삭제 오류: %s", e)
+
+    async def touch(self, conversation_id: str, ttl_seconds: int = DEFAULT_TTL_SECONDS):
+        """TTL 연장 (상태를 읽거나 쓰지 않고 세션만 유지할 때 사용)"""
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for key in self._keys(conversation_id):
+                    pipe.expire(key, ttl_seconds)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning("TTL 연장 오류: %s", e)
+
+    async def get_cached_response(self, idempotency_key: str) -> Optional[Dict[str, Any]]:
+        try:
+            data = await self.redis.get(f"idempotency:{idempotency_key}")
+            return self.codec.decode(data) if data else None
         except Exception as e:
-            print(f"Redis 삭제 오류: {e}")
+            logger.warning("Redis 조회 오류: %s", e)
+            return None
 
-    def extend_ttl(self, conversation_id: str, ttl_seconds: int = 7200):
-        """TTL 연장"""
+    async def cache_response(self, idempotency_key: str, response: Dict[str, Any],
+                             ttl_seconds: int = IDEMPOTENCY_TTL_SECONDS):
         try:
-            self.redis.expire(f"conversation:{conversation_id}", ttl_seconds)
+            await self.redis.set(f"idempotency:{idempotency_key}",
+                                 self.codec.encode(response), ex=ttl_seconds)
         except Exception as e:
-            print(f"TTL 연장 오류: {e}")
+            logger.warning("Redis 저장 오류: %s", e)
+
+
+class _LocalLocks:
+    """프로세스 내 대화별 턴 락 (asyncio.Lock + 펜싱 토큰)"""
+
+    def __init__(self):
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._users: Dict[str, int] = {}
+        self._fence = 0
+
+    @asynccontextmanager
+    async def hold(self, conversation_id: str, wait_timeout: float) -> AsyncIterator[ConversationLock]:
+        lock = self._locks.setdefault(conversation_id, asyncio.Lock())
+        self._users[conversation_id] = self._users.get(conversation_id, 0) + 1
+        try:
+            try:
+                await asyncio.wait_for(lock.acquire(), wait_timeout)
+            except asyncio.TimeoutError:
+                raise ConversationBusyError(
+                    f"다른 요청이 대화를 처리 중입니다: {conversation_id}") from None
+            self._fence += 1
+            handle = ConversationLock(conversation_id, self._fence)
+            try:
+                yield handle
+            finally:
+                handle.released = True
+                lock.release()
+        finally:
+            # 더 이상 사용하는 요청이 없으면 락 객체 정리
+            self._users[conversation_id] -= 1
+            if not self._users[conversation_id]:
+                del self._users[conversation_id]
+                del self._locks[conversation_id]
+
+    @staticmethod
+    def check(lock: Optional[ConversationLock]):
+        if lock is not None and lock.released:
+            raise ConversationConflictError(
+                f"이미 해제된 락으로 기록할 수 없습니다: {lock.conversation_id}")
+
+
+@dataclass
+class _MemoryEntry:
+    state: Dict[str, Any]
+    expires_at: float
+    items_bytes: int = 0
+    header_bytes: int = 0
+    version: int = 1
+
+    @property
+    def size(self) -> int:
+        return self.items_bytes + self.header_bytes
 
 
 class InMemoryConversationStore(ConversationStore):
-    """인메모리 대화 상태 저장소 - 개발/테스트용 폴백"""
+    """인메모리 대화 상태 저장소 - 개발/테스트용 폴백
+
+    Redis 저장소와 같은 TTL 의미(조회/저장 시 갱신)를 따르며, 항목 수와
+    바이트 예산을 넘으면 가장 오래 사용하지 않은 대화부터 제거(LRU)합니다.
+    만료는 접근 시(lazy) 그리고 ``sweep_interval``초마다 한 번씩 일괄로 처리합니다.
+    바이트 크기는 ``StateCodec`` 인코딩 크기로 추정합니다.
+    """
+
+    backend = "memory"
+
+    def __init__(self, max_entries: int = 1000, max_bytes: int = 64 * 1024 * 1024,
+                 ttl_seconds: int = DEFAULT_TTL_SECONDS, sweep_interval: float = 60.0,
+                 codec: Optional[StateCodec] = None, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.sweep_interval = sweep_interval
+        self.codec = codec or StateCodec()
+        self._clock = clock
+        self._conversations: "OrderedDict[str, _MemoryEntry]" = OrderedDict()
+        self._bytes = 0
+        self._next_sweep = clock() + sweep_interval
+        self._locks = _LocalLocks()
+        self._responses: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _measure(self, value: Any) -> int:
+        if not self.max_bytes:
+            return 0
+        return len(self.codec.encode(value))
+
+    def _remove(self, conversation_id: str) -> Optional[_MemoryEntry]:
+        entry = self._conversations.pop(conversation_id, None)
+        if entry is not None:
+            self._bytes -= entry.size
+        return entry
+
+    def _maybe_sweep(self, now: float):
+        """주기적 만료 처리"""
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + self.sweep_interval
+        expired = [cid for cid, entry in self._conversations.items()
+                   if entry.expires_at <= now]
+        for cid in expired:
+            self._remove(cid)
+        self.expirations += len(expired)
+        for key in [k for k, (expires_at, _) in self._responses.items() if expires_at <= now]:
+            del self._responses[key]
+
+    def _enforce_budget(self, keep: str):
+        """예산을 넘으면 LRU 순서로 제거 (방금 기록한 대화는 유지)"""
+        while len(self._conversations) > 1 and (
+            len(self._conversations) > self.max_entries
+            or (self.max_bytes and self._bytes > self.max_bytes)
+        ):
+            oldest = next(iter(self._conversations))
+            if oldest == keep:
+                break
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _put(self, conversation_id: str, entry: _MemoryEntry):
+        self._remove(conversation_id)
+        self._conversations[conversation_id] = entry
+        self._bytes += entry.size
+        self._enforce_budget(keep=conversation_id)
+
+    async def get(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        now = self._clock()
+        self._maybe_sweep(now)
+        entry = self._conversations.get(conversation_id)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.expires_at <= now:
+            self._remove(conversation_id)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self.hits += 1
+        entry.expires_at = now + self.ttl_seconds
+        self._conversations.move_to_end(conversation_id)
+        # 거절/실패한 턴의 변경이 저장하지 않은 채 남지 않도록 복사본을 반환 (Redis/SQLite의 디코딩과 같은 의미)
+        return _copy_state(entry.state)
+
+    async def save(self, conversation_id: str, state: Dict[str, Any],
+                   lock: Optional[ConversationLock] = None) -> int:
+        """대화 상태 전체 저장, 새 버전을 반환"""
+        _LocalLocks.check(lock)
+        now = self._clock()
+        self._maybe_sweep(now)
+        previous = self._conversations.get(conversation_id)
+        entry = _MemoryEntry(
+            state=state,
+            expires_at=now + self.ttl_seconds,
+            items_bytes=sum(self._measure(item) for item in state["input_items"]),
+            header_bytes=self._measure(state["context"]),
+            version=previous.version + 1 if previous is not None else 1,
+        )
+        self._put(conversation_id, entry)
+        return entry.version
+
+    async def append(self, conversation_id: str, state: Dict[str, Any], new_items: List[Dict[str, Any]],
+                     lock: Optional[ConversationLock] = None) -> int:
+        """새 항목의 크기만 측정해 누적 (전체 상태를 다시 측정하지 않음), 새 버전을 반환"""
+        _LocalLocks.check(lock)
+        previous = self._conversations.get(conversation_id)
+        if previous is None:
+            return await self.save(conversation_id, state)
+        now = self._clock()
+        self._maybe_sweep(now)
+        entry = _MemoryEntry(
+            state=state,
+            expires_at=now + self.ttl_seconds,
+            items_bytes=previous.items_bytes + sum(self._measure(item) for item in new_items),
+            header_bytes=self._measure(state["context"]),
+            version=previous.version + 1,
+        )
+        self._put(conversation_id, entry)
+        return entry.version
+
+    async def delete(self, conversation_id: str):
+        self._remove(conversation_id)
+
+    def lock(self, conversation_id: str,
+             wait_timeout: float = LOCK_WAIT_SECONDS) -> AsyncContextManager[ConversationLock]:
+        """프로세스 내 대화별 턴 락"""
+        return self._locks.hold(conversation_id, wait_timeout)
+
+    async def touch(self, conversation_id: str, ttl_seconds: int = DEFAULT_TTL_SECONDS):
+        entry = self._conversations.get(conversation_id)
+        if entry is not None:
+            entry.expires_at = self._clock() + ttl_seconds
+
+    async def get_cached_response(self, idempotency_key: str) -> Optional[Dict[str, Any]]:
+        cached = self._responses.get(idempotency_key)
+        if cached is None or cached[0] <= self._clock():
+            return None
+        return cached[1]
+
+    async def cache_response(self, idempotency_key: str, response: Dict[str, Any],
+                             ttl_seconds: int = IDEMPOTENCY_TTL_SECONDS):
+        now = self._clock()
+        self._maybe_sweep(now)
+        self._responses[idempotency_key] = (now + ttl_seconds, response)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._conversations),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class SQLiteConversationStore(ConversationStore):
+    """SQLite(WAL) 파일 기반 대화 상태 저장소 - 단일 서버/다중 워커용
+
+    Redis 없이 uvicorn 워커 여러 개가 같은 파일을 공유하므로, 다음 턴이 다른 워커로
+    가도 대화가 이어집니다. WAL 모드에서 조회는 지연(deferred) 읽기 트랜잭션이라 쓰기 락을 잡지 않으므로
+    다른 워커의 쓰기와 서로 막지 않고, 쓰기는 짧은 ``BEGIN IMMEDIATE`` 트랜잭션으로 처리합니다
+    (다른 워커가 쓰는 중이면 ``busy_timeout``까지 대기, 그래도 잠겨 있으면 ``ConversationBusyError``).
+    TTL은 조회가 아니라 턴마다 하는 기록(헤더 upsert)에서 갱신합니다.
+
+    - ``conversations``       대화 헤더 (``version``, ``current_agent``, ``context``, ``expires_at``)
+    - ``conversation_items``  입력 항목 (대화 ID + 순번, 턴마다 새 항목만 INSERT)
+    - ``conversation_locks``  대화별 턴 락 (펜싱 토큰, 워커 간 공유)
+    - ``idempotency``         완료 응답 재전송 캐시
+
+    프로필 저장소와 좌석 재고도 ``add_schema``로 자기 테이블을 등록하고 ``run_in_transaction``으로
+    같은 파일/연결/전용 스레드에서 트랜잭션을 실행하므로, Redis 없이도 워커 간에 공유됩니다.
+
+    SQL은 모두 고정 문자열에 파라미터만 바꿔 실행하므로 연결의 문장 캐시(``cached_statements``)에서
+    준비된 문장이 재사용됩니다. 만료는 조회 때 ``expires_at``으로 거르고, 기록할 때 ``sweep_interval``초마다
+    ``expires_at`` 인덱스로 만료된 행을 ``sweep_batch``개씩 나눠 지웁니다 (쓰기 락을 오래 잡지 않음).
+    sqlite3 호출은 저장소 전용 스레드 하나에서 실행되어 이벤트 루프를 막지 않습니다.
+    """
+
+    backend = "sqlite"
+
+    _SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversations (
+    id TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    current_agent TEXT NOT NULL,
+    context BLOB NOT NULL,
+    expires_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS conversations_expires_at ON conversations (expires_at);
+CREATE TABLE IF NOT EXISTS conversation_items (
+    conversation_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    item BLOB NOT NULL,
+    PRIMARY KEY (conversation_id, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS conversation_locks (
+    conversation_id TEXT PRIMARY KEY,
+    token INTEGER NOT NULL,
+    expires_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS conversation_locks_expires_at ON conversation_locks (expires_at);
+CREATE TABLE IF NOT EXISTS idempotency (
+    key TEXT PRIMARY KEY,
+    response BLOB NOT NULL,
+    expires_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idempotency_expires_at ON idempotency (expires_at);
+"""
+
+    _GET_HEADER = "SELECT version, current_agent, context FROM conversations WHERE id = ? AND expires_at > ?"
+    _GET_ITEMS = "SELECT item FROM conversation_items WHERE conversation_id = ? ORDER BY seq"
+    _TOUCH = "UPDATE conversations SET expires_at = ? WHERE id = ? AND expires_at > ?"
+    _UPSERT_HEADER = """
+INSERT INTO conversations (id, version, current_agent, context, expires_at) VALUES (?, 1, ?, ?, ?)
+ON CONFLICT (id) DO UPDATE SET
+    version = CASE WHEN conversations.expires_at > ? THEN conversations.version + 1 ELSE 1 END,
+    current_agent = excluded.current_agent, context = excluded.context, expires_at = excluded.expires_at
+RETURNING version
+"""
+    _NEXT_SEQ = "SELECT COALESCE(MAX(seq) + 1, 0) FROM conversation_items WHERE conversation_id = ?"
+    _INSERT_ITEM = "INSERT INTO conversation_items (conversation_id, seq, item) VALUES (?, ?, ?)"
+    _DELETE_ITEMS = "DELETE FROM conversation_items WHERE conversation_id = ?"
+    _DELETE_HEADER = "DELETE FROM conversations WHERE id = ?"
+    # 만료된 헤더만 남은 대화가 새로 시작되면 이전 항목은 버림
+    _EXPIRED_HEADER = "SELECT 1 FROM conversations WHERE id = ? AND expires_at <= ?"
+    _ACQUIRE = """
+INSERT INTO conversation_locks (conversation_id, token, expires_at) VALUES (?, 1, ?)
+ON CONFLICT (conversation_id) DO UPDATE SET
+    token = conversation_locks.token + 1, expires_at = excluded.expires_at
+WHERE conversation_locks.expires_at <= ?
+RETURNING token
+"""
+    _HOLDS_LOCK = "SELECT 1 FROM conversation_locks WHERE conversation_id = ? AND token = ? AND expires_at > ?"
+    # 해제 시각을 남겨 두어 정리(sweep)가 최근에 쓰인 락 행(펜싱 토큰)을 지우지 않게 함
+    _RELEASE = "UPDATE conversation_locks SET expires_at = ? WHERE conversation_id = ? AND token = ?"
+    _GET_RESPONSE = "SELECT response FROM idempotency WHERE key = ? AND expires_at > ?"
+    _PUT_RESPONSE = "INSERT OR REPLACE INTO idempotency (key, response, expires_at) VALUES (?, ?, ?)"
+    _EXPIRED_IDS = "SELECT id FROM conversations WHERE expires_at <= ? LIMIT ?"
+    # 락 행은 펜싱 토큰을 이어가야 하므로 만료/해제된 지 대화 TTL보다 오래 지난 것만 정리
+    _SWEEP_LOCKS = """
+DELETE FROM conversation_locks WHERE conversation_id IN (
+    SELECT conversation_id FROM conversation_locks WHERE expires_at <= ? LIMIT ?)
+"""
+    _SWEEP_RESPONSES = "DELETE FROM idempotency WHERE key IN (SELECT key FROM idempotency WHERE expires_at <= ? LIMIT ?)"
+
+    def __init__(self, path: str = "conversations.db", ttl_seconds: int = DEFAULT_TTL_SECONDS,
+                 sweep_interval: float = 60.0, sweep_batch: int = 500, busy_timeout: float = 5.0,
+                 codec: Optional[StateCodec] = None, clock: Callable[[], float] = time.time):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.sweep_interval = sweep_interval
+        self.sweep_batch = sweep_batch
+        self.busy_timeout = busy_timeout
+        self.codec = codec or StateCodec()
+        # 만료 시각은 워커 간에 비교하므로 벽시계 시간 사용
+        self._clock = clock
+        self._next_sweep = clock() + sweep_interval
+        self._db: Optional[sqlite3.Connection] = None
+        # 연결에 적용할 스키마 (다른 구성 요소가 add_schema로 추가), 적용한 개수
+        self._schemas = [self._SCHEMA]
+        self._applied_schemas = 0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-store")
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.conflicts = 0
+
+    # =========================
+    # 연결/실행 (저장소 전용 스레드)
+    # =========================
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._db is None:
+            db = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None,
+                                 check_same_thread=False, cached_statements=64)
+            db.execute("PRAGMA journal_mode=WAL")
+            # WAL에서는 NORMAL로도 커밋된 트랜잭션이 손상되지 않음 (전원 장애 시 마지막 커밋만 유실 가능)
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._db = db
+        while self._applied_schemas < len(self._schemas):
+            self._db.executescript(self._schemas[self._applied_schemas])
+            self._applied_schemas += 1
+        return self._db
+
+    async def _run(self, fn: Callable[..., Any], *args) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    @staticmethod
+    @contextmanager
+    def _transaction(db: sqlite3.Connection, mode: str = "IMMEDIATE") -> Iterator[sqlite3.Connection]:
+        # 쓰기: 읽은 뒤 쓰는 트랜잭션이 교착하지 않도록 처음부터 쓰기 락을 잡음 (IMMEDIATE)
+        # 읽기: 일관된 스냅샷만 필요하므로 락 없이 시작 (DEFERRED)
+        db.execute(f"BEGIN {mode}")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    def add_schema(self, script: str):
+        """같은 파일에 둘 테이블 추가 (``CREATE ... IF NOT EXISTS``, 다음 연결 사용 때 적용)"""
+        if script not in self._schemas:
+            self._schemas.append(script)
+
+    async def run_in_transaction(self, fn: Callable[..., Any], *args, mode: str = "IMMEDIATE") -> Any:
+        """전용 스레드에서 ``fn(db, *args)``를 한 트랜잭션으로 실행 (읽기만 하면 ``mode="DEFERRED"``)"""
+        def run():
+            db = self._connection()
+            with self._transaction(db, mode):
+                return fn(db, *args)
+        return await self._run(run)
+
+    def _sweep(self, db: sqlite3.Connection, now: float):
+        """만료된 대화/락/응답을 ``sweep_batch``개씩 나눠 삭제 (배치마다 별도 트랜잭션)"""
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + self.sweep_interval
+        while True:
+            with self._transaction(db):
+                ids = [(row[0],) for row in db.execute(self._EXPIRED_IDS, (now, self.sweep_batch))]
+                db.executemany(self._DELETE_ITEMS, ids)
+                db.executemany(self._DELETE_HEADER, ids)
+            self.expirations += len(ids)
+            if len(ids) < self.sweep_batch:
+                break
+        for sql, cutoff in ((self._SWEEP_LOCKS, now - self.ttl_seconds), (self._SWEEP_RESPONSES, now)):
+            while True:
+                with self._transaction(db):
+                    deleted = db.execute(sql, (cutoff, self.sweep_batch)).rowcount
+                if deleted < self.sweep_batch:
+                    break
+
+    # =========================
+    # 대화 상태
+    # =========================
+
+    def _get_sync(self, conversation_id: str) -> Tuple[Optional[Tuple[int, str, bytes]], List[bytes]]:
+        db = self._connection()
+        now = self._clock()
+        # 헤더/항목을 같은 스냅샷에서 읽음 (읽기 트랜잭션이라 다른 워커의 쓰기를 막지 않음)
+        with self._transaction(db, "DEFERRED"):
+            header = db.execute(self._GET_HEADER, (conversation_id, now)).fetchone()
+            if header is None:
+                return None, []
+            items = [row[0] for row in db.execute(self._GET_ITEMS, (conversation_id,))]
+        return header, items
+
+    async def get(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        state, _ = await self.get_versioned(conversation_id)
+        return state
+
+    async def get_versioned(self, conversation_id: str) -> Tuple[Optional[Dict[str, Any]], Optional[int]]:
+        """대화 상태와 버전 조회 (TTL은 다음 기록에서 갱신)"""
+        try:
+            with metrics.store_operation("get", self.backend):
+                header, raw_items = await self._run(self._get_sync, conversation_id)
+            if header is None:
+                self.misses += 1
+                return None, None
+            self.hits += 1
+            version, current_agent, context = header
+            metrics.store_bytes.observe(sum(map(len, raw_items)) + len(context), op="read")
+            return {
+                "input_items": self.codec.decode_many(raw_items),
+                "context": self.codec.decode(context),
+                "current_agent": current_agent,
+            }, version
+        except (ValueError, zlib.error) as e:
+            logger.warning("상태 디코딩 오류: %s", e)
+            return None, None
+        except sqlite3.Error as e:
+            _raise_if_busy(e, conversation_id)
+            logger.warning("SQLite 조회 오류: %s", e)
+            return None, None
+
+    def _write_sync(self, conversation_id: str, current_agent: str, context: bytes,
+                    items: List[bytes], reset: bool, token: Optional[int]) -> Optional[int]:
+        db = self._connection()
+        now = self._clock()
+        self._sweep(db, now)
+        # 헤더 upsert가 expires_at을 갱신하므로 TTL 갱신도 이 트랜잭션에 포함
+        with self._transaction(db):
+            if token is not None and db.execute(
+                    self._HOLDS_LOCK, (conversation_id, token, now)).fetchone() is None:
+                return None
+            if reset or db.execute(self._EXPIRED_HEADER, (conversation_id, now)).fetchone():
+                db.execute(self._DELETE_ITEMS, (conversation_id,))
+            (version,) = db.execute(self._UPSERT_HEADER, (
+                conversation_id, current_agent, context, now + self.ttl_seconds, now)).fetchone()
+            start = 0 if reset else db.execute(self._NEXT_SEQ, (conversation_id,)).fetchone()[0]
+            db.executemany(self._INSERT_ITEM, ((conversation_id, start + i, item)
+                                               for i, item in enumerate(items)))
+        return version
+
+    async def save(self, conversation_id: str, state: Dict[str, Any],
+                   lock: Optional[ConversationLock] = None) -> Optional[int]:
+        """대화 상태 전체 저장 (항목을 다시 작성), 새 버전을 반환"""
+        return await self._write(conversation_id, state, state["input_items"], True, lock)
+
+    async def append(self, conversation_id: str, state: Dict[str, Any],
+                     new_items: List[Dict[str, Any]], lock: Optional[ConversationLock] = None) -> Optional[int]:
+        """새 항목만 INSERT하고 헤더를 갱신 (한 트랜잭션), 새 버전을 반환"""
+        return await self._write(conversation_id, state, new_items, False, lock)
+
+    async def _write(self, conversation_id: str, state: Dict[str, Any], items: List[Dict[str, Any]],
+                     reset: bool, lock: Optional[ConversationLock]) -> Optional[int]:
+        _LocalLocks.check(lock)
+        context = self.codec.encode(state["context"])
+        encoded = [self.codec.encode(item) for item in items]
+        metrics.store_bytes.observe(len(context) + sum(map(len, encoded)), op="write")
+        try:
+            with metrics.store_operation("write", self.backend):
+                version = await self._run(self._write_sync, conversation_id, state["current_agent"],
+                                          context, encoded, reset, lock.token if lock is not None else None)
+        except sqlite3.Error as e:
+            _raise_if_busy(e, conversation_id)
+            logger.warning("SQLite 저장 오류: %s", e)
+            return None
+        if lock is None:
+            return version
+        # 락 보유 확인 + 기록을 한 트랜잭션으로 처리 (락 해제는 lock()의 종료 시)
+        if version is None:
+            lock.released = True
+            self.conflicts += 1
+            raise ConversationConflictError(
+                f"락이 만료되어 다른 요청이 대화를 처리 중입니다: {conversation_id}")
+        return version
+
+    def _delete_sync(self, conversation_id: str):
+        db = self._connection()
+        with self._transaction(db):
+            db.execute(self._DELETE_ITEMS, (conversation_id,))
+            db.execute(self._DELETE_HEADER, (conversation_id,))
+
+    async def delete(self, conversation_id: str):
+        try:
+            await self._run(self._delete_sync, conversation_id)
+        except sqlite3.Error as e:
+            logger.warning("SQLite 삭제 오류: %s", e)
+
+    def _touch_sync(self, conversation_id: str, ttl_seconds: int):
+        now = self._clock()
+        self._connection().execute(self._TOUCH, (now + ttl_seconds, conversation_id, now))
+
+    async def touch(self, conversation_id: str, ttl_seconds: int = DEFAULT_TTL_SECONDS):
+        try:
+            await self._run(self._touch_sync, conversation_id, ttl_seconds)
+        except sqlite3.Error as e:
+            logger.warning("TTL 연장 오류: %s", e)
+
+    # =========================
+    # 대화별 턴 락 (펜싱 토큰)
+    # =========================
+
+    def _acquire_sync(self, conversation_id: str, ttl_seconds: float) -> Optional[int]:
+        now = self._clock()
+        row = self._connection().execute(self._ACQUIRE, (conversation_id, now + ttl_seconds, now)).fetchone()
+        return row[0] if row else None
+
+    def _release_sync(self, conversation_id: str, token: int):
+        self._connection().execute(self._RELEASE, (self._clock(), conversation_id, token))
+
+    @asynccontextmanager
+    async def lock(self, conversation_id: str, wait_timeout: float = LOCK_WAIT_SECONDS,
+                   ttl_seconds: float = LOCK_TTL_SECONDS) -> AsyncIterator[ConversationLock]:
+        """워커 간에 공유되는 대화별 턴 락 (Redis 락과 같은 만료/펜싱 의미)"""
+        deadline = time.monotonic() + wait_timeout
+        delay = 0.01
+        with metrics.store_operation("lock", self.backend):
+            while True:
+                try:
+                    token = await self._run(self._acquire_sync, conversation_id, ttl_seconds)
+                except sqlite3.OperationalError as e:
+                    # 다른 워커가 busy_timeout보다 오래 쓰는 중이면 락을 못 얻은 것과 같이 재시도
+                    if not _is_busy(e):
+                        raise
+                    token = None
+                if token is not None:
+                    break
+                if time.monotonic() + delay > deadline:
+                    raise ConversationBusyError(
+                        f"다른 요청이 대화를 처리 중입니다: {conversation_id}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 0.25)
+
+        handle = ConversationLock(conversation_id, token)
+        try:
+            yield handle
+        finally:
+            if not handle.released:
+                handle.released = True
+                try:
+                    await self._run(self._release_sync, conversation_id, handle.token)
+                except sqlite3.Error as e:
+                    logger.warning("SQLite 락 해제 오류: %s", e)
+
+    # =========================
+    # Idempotency 응답 캐시
+    # =========================
 
-    _conversations: Dict[str, Dict[str, Any]] = {}
+    def _get_response_sync(self, idempotency_key: str) -> Optional[bytes]:
+        row = self._connection().execute(self._GET_RESPONSE, (idempotency_key, self._clock())).fetchone()
+        return row[0] if row else None
 
-    def get(self, conversation_id: str) -> Optional[Dict[str, Any]]:
-        return self._conversations.get(conversation_id)
+    def _put_response_sync(self, idempotency_key: str, data: bytes, ttl_seconds: int):
+        self._connection().execute(self._PUT_RESPONSE, (idempotency_key, data, self._clock() + ttl_seconds))
 
-    def save(self, conversation_id: str, state: Dict[str, Any]):
-        self._conversations[conversation_id] = state
+    async def get_cached_response(self, idempotency_key: str) -> Optional[Dict[str, Any]]:
+        try:
+            data = await self._run(self._get_response_sync, idempotency_key)
+            return self.codec.decode(data) if data else None
+        except sqlite3.Error as e:
+            logger.warning("SQLite 조회 오류: %s", e)
+            return None
+
+    async def cache_response(self, idempotency_key: str, response: Dict[str, Any],
+                             ttl_seconds: int = IDEMPOTENCY_TTL_SECONDS):
+        try:
+            await self._run(self._put_response_sync, idempotency_key,
+                            self.codec.encode(response), ttl_seconds)
+        except sqlite3.Error as e:
+            logger.warning("SQLite 저장 오류: %s", e)
+
+    async def ping(self):
+        """파일을 열고 스키마를 준비 (연결 확인용)"""
+        await self._run(self._connection)
+
+    def close(self):
+        """연결을 닫고 전용 스레드를 정리"""
+        def close_sync():
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+        self._executor.submit(close_sync).result()
+        self._executor.shutdown()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "path": self.path,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "expirations": self.expirations,
+            "conflicts": self.conflicts,
+        }
+
+
+def _is_busy(error: sqlite3.Error) -> bool:
+    """다른 연결이 쓰기 락을 ``busy_timeout``보다 오래 잡고 있음 (``database is locked``)"""
+    code = getattr(error, "sqlite_errorcode", None)
+    if code is not None:
+        return code & 0xFF in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+    return isinstance(error, sqlite3.OperationalError) and "locked" in str(error)
+
+
+def _raise_if_busy(error: sqlite3.Error, conversation_id: str):
+    """잠금 대기 초과는 저장소 오류(500)가 아니라 ConversationBusyError(409)로"""
+    if _is_busy(error):
+        raise ConversationBusyError(f"다른 워커가 저장소에 기록 중입니다: {conversation_id}") from error
+
+
+def _copy_state(state: Dict[str, Any]) -> Dict[str, Any]:
+    """호출자가 수정해도 캐시 원본이 바뀌지 않도록 상태를 복사
+
+    항목은 턴마다 리스트가 교체될 뿐 개별 항목이 수정되지 않으므로 리스트만 복사합니다.
+    """
+    context = state["context"]
+    if isinstance(context, BaseModel):
+        context = context.model_copy(deep=True)
+    else:
+        context = copy.deepcopy(context)
+    return {
+        "input_items": list(state["input_items"]),
+        "context": context,
+        "current_agent": state["current_agent"],
+    }
+
+
+class TieredConversationStore(ConversationStore):
+    """프로세스 로컬 L1 캐시 + Redis 2계층 저장소
+
+    최근 사용한 대화의 디코딩된 상태를 L1에 보관하고, 조회 시 Redis의 버전만
+    확인(작은 1회 왕복)해 일치하면 L1 상태를 반환합니다. 다른 인스턴스가 이전
+    턴을 처리해 버전이 달라졌다면 Redis에서 전체 상태를 다시 읽습니다.
+    """
+
+    # 지표 라벨 (실제 왕복은 내부 Redis 저장소가 기록)
+    backend = "redis"
+
+    def __init__(self, inner: RedisConversationStore, max_entries: int = 256,
+                 clock: Callable[[], float] = time.perf_counter):
+        self.inner = inner
+        self.max_entries = max_entries
+        self._clock = clock
+        self._l1: "OrderedDict[str, Tuple[int, Dict[str, Any]]]" = OrderedDict()
+        self.l1_hits = 0
+        self.l1_misses = 0
+        self.l1_stale = 0
+        self._validate_seconds = 0.0
+        self._full_load_seconds = 0.0
+        self._full_loads = 0
+
+    def _remember(self, conversation_id: str, version: Optional[int], state: Dict[str, Any]):
+        if version is None or self.max_entries <= 0:
+            self._l1.pop(conversation_id, None)
+            return
+        self._l1[conversation_id] = (version, _copy_state(state))
+        self._l1.move_to_end(conversation_id)
+        while len(self._l1) > self.max_entries:
+            self._l1.popitem(last=False)
+
+    async def get(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        cached = self._l1.get(conversation_id)
+        if cached is not None:
+            started = self._clock()
+            version = await self.inner.get_version(conversation_id)
+            if version is not None and version == cached[0]:
+                self._validate_seconds += self._clock() - started
+                self.l1_hits += 1
+                self._l1.move_to_end(conversation_id)
+                return _copy_state(cached[1])
+            self.l1_stale += 1
+            self._l1.pop(conversation_id, None)
+            if version is None:
+                self.l1_misses += 1
+                return None
+
+        self.l1_misses += 1
+        started = self._clock()
+        state, version = await self.inner.get_versioned(conversation_id)
+        self._full_load_seconds += self._clock() - started
+        self._full_loads += 1
+        if state is not None:
+            self._remember(conversation_id, version, state)
+        return state
+
+    async def save(self, conversation_id: str, state: Dict[str, Any],
+                   lock: Optional[ConversationLock] = None) -> Optional[int]:
+        version = await self.inner.save(conversation_id, state, lock=lock)
+        self._remember(conversation_id, version, state)
+        return version
+
+    async def append(self, conversation_id: str, state: Dict[str, Any],
+                     new_items: List[Dict[str, Any]], lock: Optional[ConversationLock] = None) -> Optional[int]:
+        version = await self.inner.append(conversation_id, state, new_items, lock=lock)
+        self._remember(conversation_id, version, state)
+        return version
+
+    def lock(self, conversation_id: str,
+             wait_timeout: float = LOCK_WAIT_SECONDS) -> AsyncContextManager[ConversationLock]:
+        return self.inner.lock(conversation_id, wait_timeout)
+
+    async def delete(self, conversation_id: str):
+        self._l1.pop(conversation_id, None)
+        await self.inner.delete(conversation_id)
+
+    async def touch(self, conversation_id: str, ttl_seconds: int = DEFAULT_TTL_SECONDS):
+        await self.inner.touch(conversation_id, ttl_seconds)
 
-    def delete(self, conversation_id: str):
-        self._conversations.pop(conversation_id, None)
+    async def get_cached_response(self, idempotency_key: str) -> Optional[Dict[str, Any]]:
+        return await self.inner.get_cached_response(idempotency_key)
 
+    async def cache_response(self, idempotency_key: str, response: Dict[str, Any],
+                             ttl_seconds: int = IDEMPOTENCY_TTL_SECONDS):
+        await self.inner.cache_response(idempotency_key, response, ttl_seconds)
 
-def create_conversation_store() -> ConversationStore:
-    """환경에 따라 적절한 conversation store 생성"""
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.l1_hits + self.l1_misses
+        avg_full_load = self._full_load_seconds / self._full_loads if self._full_loads else 0.0
+        # L1 적중마다 (전체 로드 평균 - 버전 확인 시간)만큼 절약
+        saved = max(0.0, avg_full_load * self.l1_hits - self._validate_seconds)
+        return {
+            "l1_entries": len(self._l1),
+            "l1_max_entries": self.max_entries,
+            "l1_hits": self.l1_hits,
+            "l1_misses": self.l1_misses,
+            "l1_stale": self.l1_stale,
+            "l1_hit_rate": self.l1_hits / lookups if lookups else 0.0,
+            "avg_full_load_ms": avg_full_load * 1000,
+            "avg_validate_ms": (self._validate_seconds / self.l1_hits * 1000) if self.l1_hits else 0.0,
+            "latency_saved_ms": saved * 1000,
+        }
+
+
+class LazyConversationStore(ConversationStore):
+    """첫 사용 때 실제 저장소를 만드는 저장소
+
+    서버리스 콜드 스타트에서 import 시점의 Redis 연결/ping 비용을 없애기 위해
+    ``factory``(코루틴 함수)는 첫 요청 또는 ``resolve()``(웜업) 때 한 번만 실행됩니다.
+    동시에 들어온 첫 요청들은 같은 초기화를 기다립니다.
+    """
+
+    def __init__(self, factory: Callable[[], Awaitable[ConversationStore]]):
+        self._factory = factory
+        self._store: Optional[ConversationStore] = None
+        self._pending: Optional["asyncio.Future[ConversationStore]"] = None
+
+    @property
+    def initialized(self) -> bool:
+        return self._store is not None
+
+    async def resolve(self) -> ConversationStore:
+        """실제 저장소 (처음 호출될 때 생성)"""
+        if self._store is not None:
+            return self._store
+        # 실패했거나 다른 이벤트 루프에서 시작된 초기화는 다시 시도
+        loop = asyncio.get_running_loop()
+        if self._pending is None or self._pending.get_loop() is not loop or (
+                self._pending.done() and self._pending.exception() is not None):
+            self._pending = asyncio.ensure_future(self._factory())
+        store = await asyncio.shield(self._pending)
+        if self._store is None:
+            self._store = store
+        return self._store
+
+    async def get(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        return await (await self.resolve()).get(conversation_id)
+
+    async def save(self, conversation_id: str, state: Dict[str, Any],
+                   lock: Optional[ConversationLock] = None):
+        return await (await self.resolve()).save(conversation_id, state, lock=lock)
+
+    async def append(self, conversation_id: str, state: Dict[str, Any],
+                     new_items: List[Dict[str, Any]], lock: Optional[ConversationLock] = None):
+        return await (await self.resolve()).append(conversation_id, state, new_items, lock=lock)
+
+    @asynccontextmanager
+    async def lock(self, conversation_id: str,
+                   wait_timeout: float = LOCK_WAIT_SECONDS) -> AsyncIterator[ConversationLock]:
+        store = await self.resolve()
+        async with store.lock(conversation_id, wait_timeout) as lock:
+            yield lock
+
+    async def delete(self, conversation_id: str):
+        return await (await self.resolve()).delete(conversation_id)
+
+    async def touch(self, conversation_id: str, ttl_seconds: int = DEFAULT_TTL_SECONDS):
+        return await (await self.resolve()).touch(conversation_id, ttl_seconds)
+
+    async def get_cached_response(self, idempotency_key: str) -> Optional[Dict[str, Any]]:
+        return await (await self.resolve()).get_cached_response(idempotency_key)
+
+    async def cache_response(self, idempotency_key: str, response: Dict[str, Any],
+                             ttl_seconds: int = IDEMPOTENCY_TTL_SECONDS):
+        return await (await self.resolve()).cache_response(idempotency_key, response, ttl_seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        if self._store is None:
+            return {"initialized": False}
+        return self._store.stats()
+
+
+def _create_in_memory_store(codec: Optional[StateCodec]) -> InMemoryConversationStore:
+    return InMemoryConversationStore(
+        max_entries=int(os.getenv("MEMORY_STORE_MAX_ENTRIES", "1000")),
+        max_bytes=int(os.getenv("MEMORY_STORE_MAX_BYTES", str(64 * 1024 * 1024))),
+        codec=codec,
+    )
+
+
+async def _connect_sqlite_store(codec: Optional[StateCodec]) -> ConversationStore:
+    store = SQLiteConversationStore(path=os.getenv("SQLITE_PATH", "conversations.db"), codec=codec)
     try:
-        return RedisConversationStore()
+        await store.ping()
+        logger.info("✅ SQLite 저장소 사용: %s", store.path)
+        return store
+    except sqlite3.Error as e:
+        logger.warning("⚠️  SQLite 파일을 열 수 없어 인메모리 저장소로 폴백합니다: %s", e)
+        store.close()
+        return _create_in_memory_store(codec)
+
+
+async def connect_conversation_store(codec: Optional[StateCodec] = None) -> ConversationStore:
+    """환경에 따라 적절한 conversation store 생성 (Redis면 ping으로 연결 확인, 실패 시 인메모리 폴백)
+
+    ``CONVERSATION_STORE``로 백엔드를 고를 수 있습니다 (``redis`` / ``sqlite`` / ``memory``).
+    지정하지 않으면 Redis URL이 있을 때 Redis, 없으면 인메모리 저장소를 사용합니다.
+    """
+    backend = os.getenv("CONVERSATION_STORE", "").strip().lower()
+    if backend == "sqlite":
+        return await _connect_sqlite_store(codec)
+    if backend == "memory":
+        return _create_in_memory_store(codec)
+    try:
+        store = RedisConversationStore(codec=codec)
     except ValueError:
-        print("⚠️  Redis가 설정되지 않았습니다. 인메모리 저장소를 사용합니다.")
-        print("   프로덕션 환경에서는 REDIS_URL 또는 UPSTASH_REDIS_URL을 설정해주세요.")
-        return InMemoryConversationStore()
+        logger.warning("⚠️  Redis가 설정되지 않았습니다. 인메모리 저장소를 사용합니다. "
+                       "프로덕션 환경에서는 REDIS_URL 또는 UPSTASH_REDIS_URL을 설정해주세요.")
+        return _create_in_memory_store(codec)
+    try:
+        await store.redis.ping()
+        logger.info("✅ Redis 연결 성공")
     except Exception as e:
-        print(f"⚠️  Redis 연결 실패: {e}")
-        print("   인메모리 저장소로 폴백합니다.")
-        return InMemoryConversationStore()
+        logger.warning("⚠️  Redis 연결 실패, 인메모리 저장소로 폴백합니다: %s", e)
+        await store.redis.aclose()
+        return _create_in_memory_store(codec)
+
+    # L1 캐시 크기가 0이면 Redis만 사용
+    l1_max_entries = int(os.getenv("CONVERSATION_L1_MAX_ENTRIES", "256"))
+    if l1_max_entries <= 0:
+        return store
+    return TieredConversationStore(store, max_entries=l1_max_entries)
+
+
+def create_conversation_store(codec: Optional[StateCodec] = None) -> "LazyConversationStore":
+    """환경에 따라 적절한 conversation store 생성 (연결은 첫 사용 때)"""
+    return LazyConversationStore(functools.partial(connect_conversation_store, codec))
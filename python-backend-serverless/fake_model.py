@@ -0,0 +1,260 @@
+import asyncio
+import itertools
+import json
+import logging
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, List, AsyncIterator, Tuple
+
+from agents import (
+    Handoff,
+    Model,
+    ModelProvider,
+    ModelResponse,
+    ModelSettings,
+    ModelTracing,
+    RunConfig,
+    Tool,
+    Usage,
+)
+from agents.testing import assistant_message, function_call
+from openai.types.responses import (
+    Response,
+    ResponseCompletedEvent,
+    ResponseContentPartAddedEvent,
+    ResponseContentPartDoneEvent,
+    ResponseCreatedEvent,
+    ResponseOutputItemAddedEvent,
+    ResponseOutputItemDoneEvent,
+    ResponseOutputMessage,
+    ResponseOutputText,
+    ResponseTextDeltaEvent,
+    ResponseTextDoneEvent,
+)
+
+logger = logging.getLogger(__name__)
+
+# 모델 제공자 선택 (openai: 실제 API / fake: 로컬 가짜 모델, API 키 없이 실행)
+MODEL_PROVIDER = os.getenv("MODEL_PROVIDER", "openai")
+# 가짜 모델의 첫 토큰까지 지연, 토큰 간 지연, 답변 토큰 수
+FAKE_MODEL_LATENCY_MS = float(os.getenv("FAKE_MODEL_LATENCY_MS", "200"))
+FAKE_MODEL_TOKEN_MS = float(os.getenv("FAKE_MODEL_TOKEN_MS", "10"))
+FAKE_MODEL_REPLY_TOKENS = int(os.getenv("FAKE_MODEL_REPLY_TOKENS", "30"))
+
+# 답변 토큰으로 반복해서 쓰는 문장 (공백 단위 토큰)
+REPLY_WORDS = "요청하신 내용을 프로필에 반영했습니다. 추가로 정리하고 싶은 경험이 있으면 알려 주세요.".split()
+
+
+@dataclass
+class ScriptRule:
+    """사용자 메시지가 ``pattern``과 일치할 때 가짜 모델이 할 행동
+
+    핸드오프가 가능한 에이전트는 ``handoff`` 에이전트로 전환하고, 전환된 에이전트에
+    ``tool``이 있으면 ``arguments``로 호출한 뒤 답변합니다. 인자 문자열의 ``{message}``는
+    사용자 메시지로 바뀝니다.
+    """
+    pattern: str
+    handoff: Optional[str] = None
+    tool: Optional[str] = None
+    arguments: Dict[str, Any] = field(default_factory=dict)
+
+    def matches(self, text: str) -> bool:
+        return re.search(self.pattern, text) is not None
+
+    def tool_arguments(self, text: str) -> Dict[str, Any]:
+        return {key: value.replace("{message}", text) if isinstance(value, str) else value
+                for key, value in self.arguments.items()}
+
+
+# main.py 에이전트 구성에 맞춘 기본 스크립트 (위에서부터 처음 일치하는 규칙 사용)
+DEFAULT_SCRIPT = [
+    ScriptRule(r"프로젝트", handoff="프로젝트 에이전트", tool="add_project",
+               arguments={"project_name": "로컬 벤치마크", "description": "{message}"}),
+    ScriptRule(r"이메일|이름|연락처|자기소개", handoff="자기소개 에이전트", tool="update_profile",
+               arguments={"email": "dev@example.com"}),
+    ScriptRule(r"경력|회사", handoff="경력 에이전트", tool="add_career",
+               arguments={"company": "로컬 벤치마크", "role": "백엔드 개발자", "period": "2024-"}),
+    ScriptRule(r"기술스택|스택", handoff="기술스택 에이전트", tool="add_tech_stack",
+               arguments={"items": ["FastAPI"]}),
+    ScriptRule(r"FAQ|자주 묻는|질문", handoff="FAQ 에이전트", tool="faq_lookup_tool",
+               arguments={"question": "{message}"}),
+]
+
+
+def _latest_user_turn(input) -> Tuple[str, List[Any]]:
+    """Latest user message text and the items that follow it (this turn's calls so far)."""
+    if isinstance(input, str):
+        return input, []
+    for i in range(len(input) - 1, -1, -1):
+        item = input[i]
+        if isinstance(item, dict) and item.get("role") == "user":
+            content = item.get("content")
+            if isinstance(content, list):
+                content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+            return str(content or ""), list(input[i + 1:])
+    return "", []
+
+
+def _sample_value(schema: Dict[str, Any]) -> Any:
+    """JSON 스키마 타입에 맞는 통과 값 (가드레일 출력은 모두 통과로 판정)"""
+    kind = schema.get("type")
+    if kind == "boolean":
+        return True
+    if kind in ("integer", "number"):
+        return 0
+    if kind == "array":
+        return []
+    if kind == "object":
+        return {name: _sample_value(prop) for name, prop in schema.get("properties", {}).items()}
+    return "로컬 가짜 모델 판정"
+
+
+class FakeModel(Model):
+    """결정적인 로컬 가짜 모델
+
+    네트워크 없이 지연(첫 토큰까지 ``latency``, 토큰마다 ``token_latency``)만 흉내내고,
+    ``script`` 규칙에 따라 핸드오프/도구 호출을 만든 뒤 ``reply_tokens``개 토큰의 답변을
+    돌려줍니다. 구조화된 출력(가드레일)은 스키마를 채운 JSON으로 답합니다.
+    같은 입력에는 항상 같은 출력을 내므로 백엔드 자체의 오버헤드를 측정할 수 있습니다.
+    """
+
+    def __init__(self, latency: float = FAKE_MODEL_LATENCY_MS / 1000,
+                 token_latency: float = FAKE_MODEL_TOKEN_MS / 1000,
+                 reply_tokens: int = FAKE_MODEL_REPLY_TOKENS,
+                 script: Optional[List[ScriptRule]] = None):
+        self.latency = latency
+        self.token_latency = token_latency
+        self.reply_tokens = reply_tokens
+        self.script = DEFAULT_SCRIPT if script is None else script
+        self._ids = itertools.count(1)
+        self.calls = 0
+
+    def _plan(self, input, output_schema, tools: List[Tool], handoffs: List[Handoff]) -> List[Any]:
+        """Output items for this call: a handoff, a tool call or the final reply."""
+        self.calls += 1
+        n = next(self._ids)
+        if output_schema is not None and not output_schema.is_plain_text():
+            text = json.dumps(_sample_value(output_schema.json_schema()), ensure_ascii=False)
+            return [assistant_message(text, item_id=f"msg_fake_{n}")]
+
+        message, turn_items = _latest_user_turn(input)
+        called = {item.get("name") for item in turn_items
+                  if isinstance(item, dict) and item.get("type") == "function_call"}
+        rule = next((rule for rule in self.script if rule.matches(message)), None)
+        if rule is not None:
+            target = next((h for h in handoffs if h.agent_name == rule.handoff), None)
+            if target is not None and target.tool_name not in called:
+                return [function_call(target.tool_name, {}, call_id=f"call_fake_{n}")]
+            tool_names = {getattr(tool, "name", None) for tool in tools}
+            if rule.tool in tool_names and rule.tool not in called:
+                return [function_call(rule.tool, rule.tool_arguments(message), call_id=f"call_fake_{n}")]
+        return [assistant_message(self._reply_text(), item_id=f"msg_fake_{n}")]
+
+    def _reply_text(self) -> str:
+        return " ".join(REPLY_WORDS[i % len(REPLY_WORDS)] for i in range(max(1, self.reply_tokens)))
+
+    @staticmethod
+    def _tokens(output: List[Any]) -> int:
+        return sum(len(part.text.split()) for item in output if isinstance(item, ResponseOutputMessage)
+                   for part in item.content)
+
+    def _usage(self, output: List[Any]) -> Usage:
+        tokens = self._tokens(output)
+        return Usage(requests=1, output_tokens=tokens, total_tokens=tokens)
+
+    async def get_response(
+        self,
+        system_instructions: Optional[str],
+        input,
+        model_settings: ModelSettings,
+        tools: List[Tool],
+        output_schema,
+        handoffs: List[Handoff],
+        tracing: ModelTracing,
+        *,
+        previous_response_id: Optional[str] = None,
+        conversation_id: Optional[str] = None,
+        prompt=None,
+    ) -> ModelResponse:
+        output = self._plan(input, output_schema, tools, handoffs)
+        await asyncio.sleep(self.latency + self._tokens(output) * self.token_latency)
+        return ModelResponse(output=output, usage=self._usage(output),
+                             response_id=f"resp_fake_{self.calls}")
+
+    async def stream_response(
+        self,
+        system_instructions: Optional[str],
+        input,
+        model_settings: ModelSettings,
+        tools: List[Tool],
+        output_schema,
+        handoffs: List[Handoff],
+        tracing: ModelTracing,
+        *,
+        previous_response_id: Optional[str] = None,
+        conversation_id: Optional[str] = None,
+        prompt=None,
+    ) -> AsyncIterator[Any]:
+        output = self._plan(input, output_schema, tools, handoffs)
+        response = Response(
+            id=f"resp_fake_{self.calls}", created_at=0, model="fake", object="response",
+            output=output, tool_choice="auto", tools=[], top_p=None, parallel_tool_calls=False,
+            status="completed")
+        sequence = itertools.count()
+        yield ResponseCreatedEvent(
+            type="response.created", sequence_number=next(sequence),
+            response=response.model_copy(update={"output": [], "status": "in_progress"}))
+        await asyncio.sleep(self.latency)
+
+        for index, item in enumerate(output):
+            if not isinstance(item, ResponseOutputMessage):
+                yield ResponseOutputItemAddedEvent(
+                    type="response.output_item.added", item=item, output_index=index,
+                    sequence_number=next(sequence))
+            else:
+                part = item.content[0]
+                yield ResponseOutputItemAddedEvent(
+                    type="response.output_item.added", output_index=index, sequence_number=next(sequence),
+                    item=item.model_copy(update={"content": [], "status": "in_progress"}))
+                yield ResponseContentPartAddedEvent(
+                    type="response.content_part.added", item_id=item.id, output_index=index,
+                    content_index=0, sequence_number=next(sequence),
+                    part=ResponseOutputText(type="output_text", text="", annotations=[]))
+                for i, word in enumerate(part.text.split(" ")):
+                    await asyncio.sleep(self.token_latency)
+                    yield ResponseTextDeltaEvent(
+                        type="response.output_text.delta", item_id=item.id, output_index=index,
+                        content_index=0, delta=word if i == 0 else " " + word, logprobs=[],
+                        sequence_number=next(sequence))
+                yield ResponseTextDoneEvent(
+                    type="response.output_text.done", item_id=item.id, output_index=index,
+                    content_index=0, text=part.text, logprobs=[], sequence_number=next(sequence))
+                yield ResponseContentPartDoneEvent(
+                    type="response.content_part.done", item_id=item.id, output_index=index,
+                    content_index=0, part=part, sequence_number=next(sequence))
+            yield ResponseOutputItemDoneEvent(
+                type="response.output_item.done", item=item, output_index=index,
+                sequence_number=next(sequence))
+        yield ResponseCompletedEvent(
+            type="response.completed", response=response, sequence_number=next(sequence))
+
+
+class FakeModelProvider(ModelProvider):
+    """모든 모델 이름(gpt-4.1, gpt-4.1-mini 등)을 하나의 ``FakeModel``로 해석"""
+
+    def __init__(self, model: Optional[FakeModel] = None):
+        self.model = model or FakeModel()
+
+    def get_model(self, model_name: Optional[str]) -> Model:
+        return self.model
+
+
+def create_run_config(provider: str = MODEL_PROVIDER) -> Optional[RunConfig]:
+    """MODEL_PROVIDER에 맞는 RunConfig (openai면 None = SDK 기본값)"""
+    if provider == "fake":
+        # 가짜 모델의 실행은 OpenAI로 트레이스를 보내지 않음
+        return RunConfig(model_provider=FakeModelProvider(), tracing_disabled=True)
+    if provider != "openai":
+        logger.warning("⚠️  알 수 없는 MODEL_PROVIDER '%s', OpenAI를 사용합니다.", provider)
+    return None
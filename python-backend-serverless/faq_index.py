@@ -0,0 +1,309 @@
+import base64
+import hashlib
+import heapq
+import json
+import logging
+import math
+import os
+import re
+import stat
+import sys
+import tempfile
+import unicodedata
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, List, Tuple
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson은 선택 의존성
+    orjson = None
+
+from guardrail_prefilter import normalize
+
+logger = logging.getLogger(__name__)
+
+# FAQ 데이터 파일과 미리 빌드한 인덱스(JSON) 경로
+# 캐시 경로를 지정하지 않으면 사용자 전용 디렉터리(0700)에 기록 (공유 임시 디렉터리에 직접 쓰지 않음)
+FAQ_DATA_PATH = os.getenv(
+    "FAQ_DATA_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "faq.json"))
+FAQ_INDEX_CACHE = os.getenv("FAQ_INDEX_CACHE") or None
+
+# 인덱스 형식이 바뀌면 올려서 이전 캐시 파일을 무시
+INDEX_FORMAT_VERSION = 2
+INDEX_FORMAT = "faq-index"
+
+# BM25 파라미터
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# 최상위 문서가 질의어의 이 비율 이상을 포함해야 답변으로 사용
+MIN_COVERAGE = 0.4
+
+# 전체 문서의 이 비율 이상에 나오는 토큰은 점수 계산에서 제외 (변별력이 없고 포스팅이 가장 김)
+MAX_DOC_FREQ_RATIO = 0.3
+
+_HANGUL_RUN = re.compile(r"[가-힣]+")
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """한국어는 음절 bigram, 영문/숫자는 단어 단위로 토큰화
+
+    조사가 붙은 어절("포트폴리오에는")도 bigram이 겹치므로 형태소 분석 없이 매칭됩니다.
+    """
+    text = unicodedata.normalize("NFKC", text).lower()
+    tokens = []
+    for run in _HANGUL_RUN.findall(text):
+        if len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    tokens.extend(_WORD.findall(text))
+    return tokens
+
+
+@dataclass
+class FaqEntry:
+    id: str
+    question: str
+    answer: str
+
+
+@dataclass
+class FaqHit:
+    entry: FaqEntry
+    score: float
+    coverage: float
+
+
+class FaqIndex:
+    """BM25 역색인 FAQ 검색
+
+    질의와 무관한 BM25 가중치(idf x tf 정규화)는 빌드 시점에 포스팅마다 미리 계산하므로
+    검색은 질의어 포스팅의 가중치를 더하기만 합니다. 포스팅은 ``array``로 보관하고
+    캐시 파일(JSON)에는 원시 바이트를 base64로 기록합니다. 포스팅의 문서 ID는 오름차순이므로
+    상위 문서의 일치 여부는 이진 탐색으로 확인합니다.
+    """
+
+    def __init__(self, entries: List[FaqEntry], postings: Dict[str, Tuple[array, array]],
+                 exact: Dict[str, int], source_digest: str = ""):
+        self.entries = entries
+        self.postings = postings
+        self.exact = exact
+        self.source_digest = source_digest
+
+    @classmethod
+    def build(cls, records: List[Dict[str, Any]], source_digest: str = "") -> "FaqIndex":
+        entries = [FaqEntry(id=str(r.get("id", i)), question=r["question"], answer=r["answer"])
+                   for i, r in enumerate(records)]
+        exact: Dict[str, int] = {}
+        doc_terms: List[Dict[str, int]] = []
+        for doc_id, record in enumerate(records):
+            phrases = [record["question"], *record.get("aliases", [])]
+            for phrase in phrases:
+                exact.setdefault(normalize(phrase), doc_id)
+            terms: Dict[str, int] = {}
+            for token in tokenize(" ".join(phrases + [record["answer"]])):
+                terms[token] = terms.get(token, 0) + 1
+            doc_terms.append(terms)
+
+        lengths = [sum(terms.values()) for terms in doc_terms]
+        avg_length = (sum(lengths) / len(lengths)) if lengths else 1.0
+        doc_freq: Dict[str, int] = {}
+        for terms in doc_terms:
+            for term in terms:
+                doc_freq[term] = doc_freq.get(term, 0) + 1
+
+        n = len(entries)
+        postings: Dict[str, Tuple[array, array]] = {}
+        for doc_id, terms in enumerate(doc_terms):
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[doc_id] / avg_length)
+            for term, tf in terms.items():
+                df = doc_freq[term]
+                idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+                doc_ids, weights = postings.setdefault(term, (array("i"), array("f")))
+                doc_ids.append(doc_id)
+                weights.append(idf * tf * (BM25_K1 + 1) / (tf + norm))
+        return cls(entries, postings, exact, source_digest)
+
+    def search(self, query: str, k: int = 3) -> List[FaqHit]:
+        query_terms = set(tokenize(query))
+        terms = [term for term in query_terms if term in self.postings]
+        if not terms:
+            return []
+        # 흔한 토큰만으로 이뤄진 질의가 아니면 흔한 토큰은 건너뜀
+        max_df = max(1, int(len(self.entries) * MAX_DOC_FREQ_RATIO))
+        scoring = [term for term in terms if len(self.postings[term][0]) <= max_df] or terms
+        scores: Dict[int, float] = {}
+        get = scores.get
+        for term in scoring:
+            doc_ids, weights = self.postings[term]
+            for doc_id, weight in zip(doc_ids, weights):
+                scores[doc_id] = get(doc_id, 0.0) + weight
+        top = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [FaqHit(self.entries[doc_id], score, self._matched(doc_id, terms) / len(query_terms))
+                for doc_id, score in top]
+
+    def _matched(self, doc_id: int, terms: List[str]) -> int:
+        """Number of ``terms`` whose posting list contains ``doc_id``."""
+        count = 0
+        for term in terms:
+            doc_ids = self.postings[term][0]
+            i = bisect_left(doc_ids, doc_id)
+            count += i < len(doc_ids) and doc_ids[i] == doc_id
+        return count
+
+    def exact_match(self, query: str) -> Optional[FaqEntry]:
+        """정규화된 질문/별칭과 정확히 일치하는 항목"""
+        doc_id = self.exact.get(normalize(query))
+        return self.entries[doc_id] if doc_id is not None else None
+
+    def answer(self, query: str) -> Optional[str]:
+        """질문에 대한 답변 (정확 일치 우선, 충분히 일치하는 항목이 없으면 None)"""
+        entry = self.exact_match(query)
+        if entry is not None:
+            return entry.answer
+        hits = self.search(query, k=1)
+        if hits and hits[0].coverage >= MIN_COVERAGE:
+            return hits[0].entry.answer
+        return None
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def to_payload(self) -> Dict[str, Any]:
+        """캐시 파일용 JSON 직렬화 형태 (코드 실행 없이 읽을 수 있도록 문자열/숫자만 사용)"""
+        return {
+            "entries": [[e.id, e.question, e.answer] for e in self.entries],
+            "exact": self.exact,
+            # 포스팅은 array의 원시 바이트(base64) - 숫자 목록보다 작고 로드가 빠름
+            "postings": {term: [base64.b64encode(doc_ids.tobytes()).decode("ascii"),
+                                base64.b64encode(weights.tobytes()).decode("ascii")]
+                         for term, (doc_ids, weights) in self.postings.items()},
+        }
+
+    @classmethod
+    def from_payload(cls, payload: Dict[str, Any], source_digest: str) -> "FaqIndex":
+        entries = [FaqEntry(id=str(i), question=str(q), answer=str(a)) for i, q, a in payload["entries"]]
+        postings = {term: (_array("i", doc_ids), _array("f", weights))
+                    for term, (doc_ids, weights) in payload["postings"].items()}
+        exact = {str(k): int(v) for k, v in payload["exact"].items()}
+        if any(not 0 <= doc_id < len(entries) for doc_id in exact.values()):
+            raise ValueError("exact 항목의 문서 ID가 범위를 벗어남")
+        for doc_ids, weights in postings.values():
+            if len(doc_ids) != len(weights) or (doc_ids and not 0 <= doc_ids[0] <= doc_ids[-1] < len(entries)):
+                raise ValueError("포스팅 형식 오류")
+        return cls(entries, postings, exact, source_digest)
+
+
+def _array(typecode: str, encoded: str) -> array:
+    values = array(typecode)
+    values.frombytes(base64.b64decode(encoded, validate=True))
+    return values
+
+
+def _digest(data: bytes) -> str:
+    return f"{INDEX_FORMAT_VERSION}:{hashlib.sha256(data).hexdigest()}"
+
+
+def _dumps(value) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _loads(data: bytes):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def default_cache_path() -> Optional[str]:
+    """사용자 전용 캐시 디렉터리(0700)의 인덱스 경로 (안전하게 준비하지 못하면 None)
+
+    다른 사용자가 미리 만들어 둔 디렉터리나 그룹/기타 사용자가 쓸 수 있는 디렉터리는 쓰지 않습니다.
+    """
+    uid = os.getuid() if hasattr(os, "getuid") else None
+    directory = os.path.join(tempfile.gettempdir(), f"faq-index-{uid if uid is not None else 'user'}")
+    try:
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        info = os.lstat(directory)
+    except OSError as e:
+        logger.warning("⚠️  FAQ 인덱스 캐시 디렉터리를 만들지 못했습니다: %s", e)
+        return None
+    if (not stat.S_ISDIR(info.st_mode) or (uid is not None and info.st_uid != uid)
+            or info.st_mode & 0o077):
+        logger.warning("⚠️  FAQ 인덱스 캐시 디렉터리가 사용자 전용이 아니라 사용하지 않습니다: %s", directory)
+        return None
+    return os.path.join(directory, "faq_index.json")
+
+
+def read_index_cache(cache_path: str, digest: str) -> Optional[FaqIndex]:
+    """헤더(형식/버전/데이터 digest)와 본문 해시를 확인한 뒤에만 본문을 역직렬화"""
+    with open(cache_path, "rb") as f:
+        header = _loads(f.readline())
+        if (not isinstance(header, dict) or header.get("format") != INDEX_FORMAT
+                or header.get("version") != INDEX_FORMAT_VERSION or header.get("byteorder") != sys.byteorder
+                or header.get("source_digest") != digest):
+            return None
+        body = f.read()
+    if hashlib.sha256(body).hexdigest() != header.get("body_sha256"):
+        raise ValueError("본문 해시 불일치")
+    return FaqIndex.from_payload(_loads(body), digest)
+
+
+def write_index_cache(cache_path: str, index: FaqIndex):
+    body = _dumps(index.to_payload())
+    header = _dumps({"format": INDEX_FORMAT, "version": INDEX_FORMAT_VERSION, "byteorder": sys.byteorder,
+                     "source_digest": index.source_digest,
+                     "body_sha256": hashlib.sha256(body).hexdigest()})
+    # 다른 프로세스가 읽는 중인 파일을 덮어쓰지 않도록 임시 파일(0600)에 쓴 뒤 교체
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        os.unlink(tmp_path)
+    except FileNotFoundError:
+        pass
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(header + b"\n" + body)
+    os.replace(tmp_path, cache_path)
+
+
+def load_faq_index(data_path: str = FAQ_DATA_PATH, cache_path: Optional[str] = FAQ_INDEX_CACHE) -> FaqIndex:
+    """FAQ 인덱스 로드 (데이터가 바뀌지 않았으면 JSON 캐시 재사용, 아니면 빌드 후 기록)
+
+    ``cache_path``가 None이면 사용자 전용 캐시 디렉터리를, 빈 문자열이면 캐시 없이 빌드만 합니다.
+    """
+    with open(data_path, "rb") as f:
+        raw = f.read()
+    digest = _digest(raw)
+    if cache_path is None:
+        cache_path = default_cache_path()
+
+    if cache_path and os.path.exists(cache_path):
+        try:
+            index = read_index_cache(cache_path, digest)
+            if index is not None:
+                return index
+        except Exception as e:
+            logger.warning("⚠️  FAQ 인덱스 캐시를 읽지 못해 다시 빌드합니다: %s", e)
+
+    index = FaqIndex.build(_loads(raw), source_digest=digest)
+    if cache_path:
+        try:
+            write_index_cache(cache_path, index)
+        except OSError as e:
+            # 읽기 전용 파일시스템(서버리스)에서는 메모리 인덱스만 사용
+            logger.warning("⚠️  FAQ 인덱스 캐시 기록 실패: %s", e)
+    return index
+
+
+if __name__ == "__main__":
+    # 배포 전 인덱스를 미리 빌드: python faq_index.py [출력 경로]
+    output = sys.argv[1] if len(sys.argv) > 1 else (FAQ_INDEX_CACHE or default_cache_path())
+    if output is None:
+        sys.exit("❌ 캐시 경로를 준비하지 못했습니다. 출력 경로를 인자로 지정하세요.")
+    if os.path.exists(output):
+        os.remove(output)
+    built = load_faq_index(cache_path=output)
+    print(f"✅ FAQ 인덱스 빌드 완료: {len(built)}개 항목 -> {output}")
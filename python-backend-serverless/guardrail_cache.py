@@ -0,0 +1,134 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Callable, Tuple
+
+import redis.asyncio as aioredis
+
+from guardrail_prefilter import latest_user_text
+
+logger = logging.getLogger(__name__)
+
+# 가드레일 판정 캐시 TTL과 프로세스 로컬 LRU 크기
+GUARDRAIL_CACHE_TTL_SECONDS = int(os.getenv("GUARDRAIL_CACHE_TTL", "3600"))
+GUARDRAIL_CACHE_MAX_ENTRIES = int(os.getenv("GUARDRAIL_CACHE_MAX_ENTRIES", "10000"))
+
+# 긴 메시지는 거의 반복되지 않으므로 캐시하지 않음 (정규화된 길이 기준)
+MAX_CACHEABLE_LENGTH = 500
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def cache_text(text: str) -> str:
+    """캐시 키용 정규화: 대소문자 접기 + 공백 압축만
+
+    따옴표·세미콜론·대시 같은 문장부호는 주입 시도를 구분하는 단서이므로 지우지 않습니다
+    (``1' OR '1'='1``과 ``1 or 1=1``이 같은 판정을 공유하면 안 됨).
+    """
+    return _WHITESPACE.sub(" ", text.casefold()).strip()
+
+
+class GuardrailVerdictCache:
+    """가드레일 모델 판정 캐시 (프로세스 로컬 LRU + 선택적 Redis 공유 계층)
+
+    키는 가드레일 이름과 최신 사용자 메시지(대소문자·공백만 정규화)입니다. 값은 가드레일 출력 모델의
+    ``model_dump()`` 결과이며 TTL이 지나면 다시 모델로 판정합니다.
+    """
+
+    def __init__(self, max_entries: int = GUARDRAIL_CACHE_MAX_ENTRIES,
+                 ttl_seconds: int = GUARDRAIL_CACHE_TTL_SECONDS,
+                 redis_client: Optional[aioredis.Redis] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.redis = redis_client
+        self._clock = clock
+        self._local: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.redis_errors = 0
+
+    @staticmethod
+    def key(guardrail_name: str, input) -> Optional[str]:
+        """캐시 키 (캐시하지 않는 입력이면 None)"""
+        text = cache_text(latest_user_text(input))
+        if not text or len(text) > MAX_CACHEABLE_LENGTH:
+            return None
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+        return f"guardrail:{guardrail_name}:{digest}"
+
+    async def get(self, guardrail_name: str, input) -> Optional[Dict[str, Any]]:
+        key = self.key(guardrail_name, input)
+        if key is None or self.max_entries <= 0:
+            return None
+
+        entry = self._local.get(key)
+        if entry is not None:
+            expires_at, verdict = entry
+            if expires_at > self._clock():
+                self._local.move_to_end(key)
+                self.local_hits += 1
+                return verdict
+            del self._local[key]
+
+        if self.redis is not None:
+            try:
+                raw = await self.redis.get(key)
+            except Exception as e:
+                # 공유 계층 장애는 캐시 미스로 처리 (가드레일은 모델로 판정)
+                self.redis_errors += 1
+                logger.warning("⚠️  가드레일 캐시 조회 실패: %s", e)
+                raw = None
+            if raw is not None:
+                verdict = json.loads(raw)
+                self._remember(key, verdict)
+                self.redis_hits += 1
+                return verdict
+
+        self.misses += 1
+        return None
+
+    async def set(self, guardrail_name: str, input, verdict: Dict[str, Any]):
+        key = self.key(guardrail_name, input)
+        if key is None or self.max_entries <= 0:
+            return
+        self._remember(key, verdict)
+        if self.redis is not None:
+            try:
+                await self.redis.set(
+                    key, json.dumps(verdict, ensure_ascii=False).encode("utf-8"), ex=self.ttl_seconds)
+            except Exception as e:
+                self.redis_errors += 1
+                logger.warning("⚠️  가드레일 캐시 기록 실패: %s", e)
+
+    def _remember(self, key: str, verdict: Dict[str, Any]):
+        self._local[key] = (self._clock() + self.ttl_seconds, verdict)
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+
+    def clear(self):
+        self._local.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.local_hits + self.redis_hits + self.misses
+        hits = self.local_hits + self.redis_hits
+        return {
+            "entries": len(self._local),
+            "max_entries": self.max_entries,
+            "shared": self.redis is not None,
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "redis_errors": self.redis_errors,
+        }
+
+
+# 프로세스 전역 판정 캐시 (api.py가 Redis 저장소를 쓰면 공유 계층을 연결)
+verdict_cache = GuardrailVerdictCache()
@@ -0,0 +1,173 @@
+import os
+import re
+import time
+import unicodedata
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, List, Union
+
+from agents import GuardrailFunctionOutput
+
+# 로컬 사전 판정 사용 여부 (0이면 모든 입력을 모델로 보냄)
+GUARDRAIL_PREFILTER_ENABLED = os.getenv("GUARDRAIL_PREFILTER", "1") != "0"
+
+
+@dataclass
+class TieredGuardrailOutput(GuardrailFunctionOutput):
+    """판정 출처가 기록된 가드레일 출력
+
+    ``source``: ``local`` (사전 판정), ``cache`` (판정 캐시) 또는 ``model`` (가드레일 에이전트 호출)
+    """
+    source: str = "model"
+
+
+@dataclass
+class LocalVerdict:
+    """모델 호출 없이 내린 판정"""
+    tripwire: bool
+    reasoning: str
+    rule: str
+
+
+# =========================
+# 정규화
+# =========================
+
+# NFKC는 호환용 자모(ㅎ, ㅋ)를 첫소리 자모로 바꾸므로 정규화된 형태로 패턴 구성
+_PUNCTUATION = re.compile(
+    r"[\s!?.,~^…·'\"()\[\]:;\-" + unicodedata.normalize("NFKC", "ㅎㅋㅠㅜ") + "]+")
+
+
+def latest_user_text(input: Union[str, List[Any]]) -> str:
+    """Return the most recent user message (guardrails only judge the latest message)."""
+    if isinstance(input, str):
+        return input
+    for item in reversed(input):
+        if isinstance(item, dict) and item.get("role") == "user":
+            content = item.get("content")
+            if isinstance(content, list):
+                return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+            return str(content or "")
+    return ""
+
+
+def normalize(text: str) -> str:
+    """NFKC + 소문자 + 공백/문장부호 제거 (허용 목록 비교 및 캐시 키용)"""
+    return _PUNCTUATION.sub("", unicodedata.normalize("NFKC", text).lower())
+
+
+# =========================
+# 규칙
+# =========================
+
+# 가드레일 지침상 항상 허용되는 대화성 문구 (정규화된 형태)
+CONVERSATIONAL_PHRASES = frozenset(normalize(p) for p in [
+    "안녕", "안녕하세요", "안녕하십니까", "반가워요", "반갑습니다", "반가워",
+    "감사합니다", "고맙습니다", "고마워요", "고마워", "감사해요",
+    "네", "예", "응", "아니요", "아니오", "아뇨", "좋아요", "좋습니다", "알겠습니다", "알겠어요",
+    "확인했습니다", "괜찮아요", "잠시만요", "다음", "계속", "계속해 주세요",
+    "hi", "hello", "hey", "ok", "okay", "yes", "no", "thanks", "thank you", "bye", "good",
+])
+
+# 명백한 우회/주입 시도
+INJECTION_PATTERNS = [
+    (re.compile(p, re.IGNORECASE), rule) for p, rule in [
+        (r"\bdrop\s+table\b", "sql_drop_table"),
+        (r"\bunion\s+(all\s+)?select\b", "sql_union_select"),
+        (r"(;|')\s*--", "sql_comment"),
+        (r"\brm\s+-rf\b", "shell_rm"),
+        (r"<\s*script\b", "script_tag"),
+        (r"system\s*prompt", "system_prompt"),
+        (r"시스템\s*프롬프트", "system_prompt"),
+        (r"(프롬프트|지시\s*사항|지침).{0,10}(보여|알려|출력|공개)", "reveal_prompt"),
+        (r"ignore\s+(all\s+|any\s+)?(previous|prior|above)\s+instructions", "ignore_instructions"),
+        (r"(이전|앞의|위의|모든)\s*(지시|지침|명령|규칙).{0,6}무시", "ignore_instructions"),
+        (r"\bjailbreak\b|탈옥", "jailbreak"),
+        (r"\b(developer|dan)\s+mode\b", "developer_mode"),
+    ]
+]
+
+
+# =========================
+# 사전 판정기
+# =========================
+
+
+class GuardrailPrefilter:
+    """가드레일 앞단의 로컬 판정 계층
+
+    짧은 대화성 문구는 통과, 명백한 주입 패턴은 차단만 로컬에서 판정하고
+    그 외 입력은 모두 None을 반환해 모델로 넘깁니다. 도메인 어휘가 들어 있다는 것만으로는
+    통과시키지 않습니다 ("회사 근처 맛집 추천해줘"). 판정 비율과 지연은 ``stats()``로 확인합니다.
+    """
+
+    def __init__(self, enabled: bool = GUARDRAIL_PREFILTER_ENABLED, latency_window: int = 1024):
+        self.enabled = enabled
+        self.decided: Dict[str, int] = {}
+        self.escalated: Dict[str, int] = {}
+        self.rules: Dict[str, int] = {}
+        self._decision_seconds = 0.0
+        self._decisions = 0
+        self._latencies = deque(maxlen=latency_window)
+
+    def relevance(self, input) -> Optional[LocalVerdict]:
+        """관련성: 대화성 문구만 통과, 그 외는 모델로 (로컬에서 거절하지 않음)"""
+        return self._decide("relevance", input, self._relevance)
+
+    def jailbreak(self, input) -> Optional[LocalVerdict]:
+        """우회 시도: 명백한 주입 패턴이면 차단, 대화성 문구면 통과, 그 외는 모델로"""
+        return self._decide("jailbreak", input, self._jailbreak)
+
+    @staticmethod
+    def _relevance(text: str) -> Optional[LocalVerdict]:
+        if normalize(text) in CONVERSATIONAL_PHRASES:
+            return LocalVerdict(False, "대화성 문구", "conversational")
+        return None
+
+    @staticmethod
+    def _jailbreak(text: str) -> Optional[LocalVerdict]:
+        if normalize(text) in CONVERSATIONAL_PHRASES:
+            return LocalVerdict(False, "대화성 문구", "conversational")
+        for pattern, rule in INJECTION_PATTERNS:
+            if pattern.search(text):
+                return LocalVerdict(True, f"우회/주입 패턴 감지 ({rule})", rule)
+        return None
+
+    def _decide(self, guardrail: str, input, classify) -> Optional[LocalVerdict]:
+        if not self.enabled:
+            self.escalated[guardrail] = self.escalated.get(guardrail, 0) + 1
+            return None
+        started = time.perf_counter()
+        verdict = classify(latest_user_text(input))
+        elapsed = time.perf_counter() - started
+        self._decision_seconds += elapsed
+        self._decisions += 1
+        self._latencies.append(elapsed)
+        if verdict is None:
+            self.escalated[guardrail] = self.escalated.get(guardrail, 0) + 1
+        else:
+            self.decided[guardrail] = self.decided.get(guardrail, 0) + 1
+            self.rules[verdict.rule] = self.rules.get(verdict.rule, 0) + 1
+        return verdict
+
+    def stats(self) -> Dict[str, Any]:
+        decided = sum(self.decided.values())
+        checks = decided + sum(self.escalated.values())
+        recent = sorted(self._latencies)
+        return {
+            "enabled": self.enabled,
+            "checks": checks,
+            "local_decisions": decided,
+            "llm_calls": checks - decided,
+            "llm_calls_avoided_ratio": decided / checks if checks else 0.0,
+            "decided_by_guardrail": dict(self.decided),
+            "escalated_by_guardrail": dict(self.escalated),
+            "rules": dict(self.rules),
+            "avg_decision_us": (self._decision_seconds / self._decisions * 1e6
+                                if self._decisions else 0.0),
+            "p95_decision_us": recent[int(len(recent) * 0.95) - 1] * 1e6 if recent else 0.0,
+        }
+
+
+# 프로세스 전역 사전 판정기 (main.py의 가드레일이 사용)
+prefilter = GuardrailPrefilter()
@@ -0,0 +1,154 @@
+import asyncio
+import copy
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Optional, List, Any, Callable, Awaitable
+
+from agents import (
+    Agent,
+    RunContextWrapper,
+    InputGuardrail,
+    GuardrailFunctionOutput,
+    InputGuardrailTripwireTriggered,
+)
+
+# 가드레일 실행 모드
+# - parallel: 가드레일과 에이전트를 동시에 실행하고 트립와이어가 걸리면 즉시 에이전트 실행을 취소
+# - sdk: Runner.run에 맡김 (SDK 기본 동작)
+GUARDRAIL_MODE = os.getenv("GUARDRAIL_MODE", "parallel")
+
+
+@dataclass
+class GuardrailOutcome:
+    """가드레일 하나의 실행 결과와 소요 시간
+
+    ``output``이 None이면 다른 가드레일의 트립와이어로 판정 전에 취소된 것입니다.
+    """
+    guardrail: InputGuardrail
+    output: Optional[GuardrailFunctionOutput]
+    duration_ms: float
+    timestamp: float
+
+    @property
+    def tripped(self) -> bool:
+        return bool(self.output and self.output.tripwire_triggered)
+
+    @property
+    def source(self) -> Optional[str]:
+        """판정 출처 (local/cache/model, 출처를 기록하지 않는 가드레일이면 None)"""
+        return getattr(self.output, "source", None)
+
+    @property
+    def reasoning(self) -> str:
+        if self.output is None:
+            return ""
+        return getattr(self.output.output_info, "reasoning", "")
+
+
+@dataclass
+class GuardedRun:
+    """가드레일을 거친 에이전트 실행 결과
+
+    트립와이어가 걸렸으면 ``result``는 None이고 ``context``는 실행 전 그대로입니다.
+    """
+    result: Any
+    context: Any
+    outcomes: List[GuardrailOutcome] = field(default_factory=list)
+
+    @property
+    def tripped(self) -> Optional[GuardrailOutcome]:
+        return next((o for o in self.outcomes if o.tripped), None)
+
+
+def _passed(guardrail: InputGuardrail) -> GuardrailOutcome:
+    """Outcome for a guardrail the SDK ran without reporting (no timing available)."""
+    return GuardrailOutcome(
+        guardrail=guardrail,
+        output=GuardrailFunctionOutput(output_info=None, tripwire_triggered=False),
+        duration_ms=0.0,
+        timestamp=time.time() * 1000,
+    )
+
+
+def _staged_context(context):
+    """Copy the context so the agent's changes are only committed after all guardrails pass."""
+    if hasattr(context, "model_copy"):
+        return context.model_copy(deep=True)
+    return copy.deepcopy(context)
+
+
+async def _timed_guardrail(guardrail: InputGuardrail, agent: Agent, input_items,
+                           context_wrapper: RunContextWrapper) -> GuardrailOutcome:
+    started = time.perf_counter()
+    result = await guardrail.run(agent, input_items, context_wrapper)
+    return GuardrailOutcome(
+        guardrail=guardrail,
+        output=result.output,
+        duration_ms=(time.perf_counter() - started) * 1000,
+        timestamp=time.time() * 1000,
+    )
+
+
+async def run_guarded(agent: Agent, input_items: list, context: Any,
+                      run: Callable[..., Awaitable[Any]], mode: Optional[str] = None) -> GuardedRun:
+    """Run ``agent`` behind its input guardrails.
+
+    ``run``은 ``Runner.run`` 형태의 함수입니다. parallel 모드에서는 가드레일을 에이전트와 동시에
+    실행하고, 컨텍스트 사본 위에서 에이전트를 돌린 뒤 모든 가드레일이 통과했을 때만 사본을 반환합니다.
+    """
+    mode = mode or GUARDRAIL_MODE
+    guardrails = list(getattr(agent, "input_guardrails", []))
+    if mode == "sdk" or not guardrails:
+        try:
+            result = await run(agent, input_items, context=context)
+        except InputGuardrailTripwireTriggered as e:
+            # SDK는 걸린 가드레일만 알려주므로 나머지는 통과로 기록 (개별 시간은 측정 불가)
+            failed = e.guardrail_result
+            return GuardedRun(result=None, context=context, outcomes=[
+                GuardrailOutcome(guardrail=g, output=failed.output, duration_ms=0.0,
+                                 timestamp=time.time() * 1000)
+                if g is failed.guardrail else _passed(g)
+                for g in guardrails
+            ])
+        return GuardedRun(result=result, context=context,
+                          outcomes=[_passed(g) for g in guardrails])
+
+    staged = _staged_context(context)
+    started = time.perf_counter()
+    # 가드레일은 직접 실행하므로 SDK가 한 번 더 실행하지 않도록 가드레일 없는 복제본으로 실행
+    agent_task = asyncio.ensure_future(
+        run(agent.clone(input_guardrails=[]), input_items, context=staged))
+    guard_tasks = [
+        asyncio.ensure_future(_timed_guardrail(
+            g, agent, list(input_items), RunContextWrapper(context=context)))
+        for g in guardrails
+    ]
+    outcomes = {}
+    try:
+        for next_done in asyncio.as_completed(guard_tasks):
+            outcome = await next_done
+            outcomes[id(outcome.guardrail)] = outcome
+            if outcome.tripped:
+                break
+    finally:
+        tripped = any(o.tripped for o in outcomes.values())
+        if tripped or len(outcomes) < len(guardrails):
+            # 트립와이어(또는 가드레일 오류) 시 모델 호출을 기다리지 않고 즉시 취소
+            for task in [agent_task, *guard_tasks]:
+                task.cancel()
+            await asyncio.gather(agent_task, *guard_tasks, return_exceptions=True)
+
+    if tripped:
+        now = time.time() * 1000
+        elapsed = (time.perf_counter() - started) * 1000
+        return GuardedRun(result=None, context=context, outcomes=[
+            outcomes.get(id(g)) or GuardrailOutcome(
+                guardrail=g, output=None, duration_ms=elapsed, timestamp=now)
+            for g in guardrails
+        ])
+
+    result = await agent_task
+    return GuardedRun(result=result, context=staged,
+                      outcomes=[outcomes[id(g)] for g in guardrails])
+
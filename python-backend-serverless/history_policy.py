@@ -0,0 +1,150 @@
+import json
+import os
+import re
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, List
+
+# 기록이 이 항목 수를 넘으면 오래된 항목을 요약으로 접음
+HISTORY_MAX_ITEMS = int(os.getenv("HISTORY_MAX_ITEMS", "40"))
+# 접은 뒤 원문 그대로 유지하는 최근 항목 수 (접기는 MAX - KEEP 항목마다 한 번)
+HISTORY_KEEP_ITEMS = int(os.getenv("HISTORY_KEEP_ITEMS", "20"))
+# 요약 항목의 최대 길이 (넘으면 가장 오래된 줄부터 생략)
+HISTORY_SUMMARY_MAX_CHARS = int(os.getenv("HISTORY_SUMMARY_MAX_CHARS", "1500"))
+
+SUMMARY_HEADER = "이전 대화 요약"
+# 요약 한 줄에 남기는 원문 길이
+LINE_CHARS = 80
+# SDK 기본 핸드오프 도구 이름 접두사
+HANDOFF_TOOL_PREFIX = "transfer_to_"
+
+_DROPPED = re.compile(r"\(이전 (\d+)줄 생략\)$")
+
+
+@dataclass
+class CompactedHistory:
+    items: List[Dict[str, Any]]
+    # 앞부분이 다시 작성되었으면 True (저장소에 append가 아닌 전체 save가 필요)
+    folded: bool
+
+
+def _text(item: Dict[str, Any]) -> str:
+    content = item.get("content")
+    if isinstance(content, list):
+        content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return " ".join(str(content or "").split())
+
+
+def _clip(text: str, limit: int = LINE_CHARS) -> str:
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+
+def is_summary(item: Dict[str, Any]) -> bool:
+    return (item.get("role") == "system" and isinstance(item.get("content"), str)
+            and item["content"].startswith(SUMMARY_HEADER))
+
+
+def is_handoff_call(item: Dict[str, Any]) -> bool:
+    return item.get("type") == "function_call" and str(item.get("name", "")).startswith(HANDOFF_TOOL_PREFIX)
+
+
+def _is_user_message(item: Dict[str, Any]) -> bool:
+    return item.get("role") == "user" and item.get("type", "message") == "message"
+
+
+class HistoryPolicy:
+    """대화 기록 윈도우 + 누적 요약 정책
+
+    기록이 ``max_items``를 넘으면 최근 ``keep_items``개 안팎(사용자 턴 경계에 맞춤)만 원문으로
+    남기고 그 앞은 맨 앞의 요약 항목 하나로 접습니다. 요약은 이전 요약에 새로 접힌 항목의
+    줄만 덧붙이는 방식으로 계산되며 모델을 호출하지 않습니다.
+
+    도구 호출/결과 쌍은 턴 경계에서만 자르므로 갈라지지 않고, 현재 에이전트로 이어진
+    마지막 핸드오프 체인(핸드오프 호출과 결과)은 접힌 구간에 있어도 원문으로 유지됩니다.
+    """
+
+    def __init__(self, max_items: int = HISTORY_MAX_ITEMS, keep_items: int = HISTORY_KEEP_ITEMS,
+                 summary_max_chars: int = HISTORY_SUMMARY_MAX_CHARS):
+        self.max_items = max_items
+        self.keep_items = min(keep_items, max_items)
+        self.summary_max_chars = summary_max_chars
+
+    def compact(self, items: List[Dict[str, Any]]) -> CompactedHistory:
+        if self.max_items <= 0:
+            return CompactedHistory(items, False)
+        summary = items[0] if items and is_summary(items[0]) else None
+        body = items[1:] if summary is not None else items
+        if len(body) <= self.max_items:
+            return CompactedHistory(items, False)
+
+        cut = self._cut_index(body)
+        if cut <= 0:
+            return CompactedHistory(items, False)
+        folded, window = body[:cut], body[cut:]
+        pinned_ids = self._pinned_call_ids(body, cut)
+        pinned = [item for item in folded if item.get("call_id") in pinned_ids]
+        lines = [line for item in folded if item.get("call_id") not in pinned_ids
+                 for line in self._summarize(item)]
+        return CompactedHistory(
+            [self._merge_summary(summary, lines), *pinned, *window], True)
+
+    def _cut_index(self, body: List[Dict[str, Any]]) -> int:
+        """Start of the verbatim window, moved forward to a user-turn boundary."""
+        target = len(body) - self.keep_items
+        for i in range(target, len(body)):
+            if _is_user_message(body[i]):
+                return i
+        # 마지막 턴 하나가 keep_items보다 길면 그 턴의 시작에서 자름
+        for i in range(target, -1, -1):
+            if _is_user_message(body[i]):
+                return i
+        return 0
+
+    @staticmethod
+    def _pinned_call_ids(body: List[Dict[str, Any]], cut: int) -> set:
+        """call_ids of the latest handoff chain, when that chain falls in the folded part."""
+        last = next((i for i in range(len(body) - 1, -1, -1) if is_handoff_call(body[i])), None)
+        if last is None or last >= cut:
+            return set()
+        # 체인 = 마지막 핸드오프가 일어난 턴(직전 사용자 메시지 이후)의 모든 핸드오프
+        start = next((i for i in range(last, -1, -1) if _is_user_message(body[i])), 0)
+        return {item["call_id"] for item in body[start:last + 1]
+                if is_handoff_call(item) and item.get("call_id")}
+
+    @staticmethod
+    def _summarize(item: Dict[str, Any]) -> List[str]:
+        item_type = item.get("type", "message")
+        if item_type == "message" or "role" in item:
+            text = _text(item)
+            if not text or is_summary(item):
+                return []
+            speaker = "사용자" if item.get("role") == "user" else "답변"
+            return [f"- {speaker}: {_clip(text)}"]
+        if item_type == "function_call":
+            if is_handoff_call(item):
+                return ["- (에이전트 전환)"]
+            return [f"- 도구 {item.get('name', '')}({_clip(str(item.get('arguments', '')), 40)})"]
+        if item_type == "function_call_output":
+            output = item.get("output")
+            if not isinstance(output, str):
+                output = json.dumps(output, ensure_ascii=False, default=str)
+            # 핸드오프 결과({"assistant": ...})는 전환 줄로 충분
+            return [] if output.startswith('{"assistant"') else [f"  → {_clip(output, 60)}"]
+        return []
+
+    def _merge_summary(self, summary: Optional[Dict[str, Any]], new_lines: List[str]) -> Dict[str, Any]:
+        dropped, lines = 0, []
+        if summary is not None:
+            header, *lines = summary["content"].split("\n")
+            match = _DROPPED.search(header)
+            dropped = int(match.group(1)) if match else 0
+        lines += new_lines
+        while lines and sum(len(line) + 1 for line in lines) > self.summary_max_chars:
+            lines.pop(0)
+            dropped += 1
+        header = SUMMARY_HEADER + (f" (이전 {dropped}줄 생략)" if dropped else "")
+        return {"role": "system", "content": "\n".join([header, *lines])}
+
+
+def prompt_size(items: List[Dict[str, Any]]) -> int:
+    """Approximate prompt size in bytes (JSON-encoded input items)."""
+    return len(json.dumps(items, ensure_ascii=False, default=str).encode("utf-8"))
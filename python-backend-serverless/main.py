@@ -1,9 +1,13 @@
 from __future__ import annotations as _annotations
 
+import functools
+import hashlib
+import json
 import random
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, PrivateAttr
 import string
-from typing import Optional
+from typing import Optional, Dict, Any, List, Set
+from uuid import uuid4
 
 from agents import (
     Agent,
@@ -17,76 +21,301 @@ from agents import (
 )
 from agents.extensions.handoff_prompt import RECOMMENDED_PROMPT_PREFIX
 
+from guardrail_prefilter import prefilter, TieredGuardrailOutput
+from guardrail_cache import verdict_cache
+from faq_index import FaqIndex, load_faq_index
+from fake_model import create_run_config
+from agent_registry import AgentRegistry
+from profile_store import profile_store, ProfileStore, ProfileChanges, PROFILE_FIELDS, RECORD_KINDS
+
+# MODEL_PROVIDER=fake면 OpenAI 대신 로컬 가짜 모델로 실행 (에이전트/가드레일 공통)
+run_config = create_run_config()
+
 # =========================
 # CONTEXT
 # =========================
 
 
 class DeveloperProfileContext(BaseModel):
-    """Context for developer profile agents."""
-    name: Optional[str] = None
-    email: Optional[str] = None
-    phone: Optional[str] = None
-    github: Optional[str] = None
-    portfolio: Optional[str] = None
-
+    """Context for developer profile agents.
 
-def create_initial_context() -> DeveloperProfileContext:
+    대화 상태에는 ``user_id``와 마지막으로 본 프로필 리비전(``profile_revision``)만 저장되고,
+    프로필 본문(기본 필드와 프로젝트/경력/기술스택 레코드)은 profile_store에 있으며 도구가 필요할 때
+    ``load()``로 읽습니다 (턴마다 읽지 않음). 도구가 바꾼 필드/레코드는 변경 집합에 기록되므로,
+    변경 이벤트와 ``commit()``의 부분 기록은 전체 덤프/비교 없이 변경 집합에서 만들어집니다.
+    """
+    user_id: Optional[str] = None
+    # 이 대화가 마지막으로 본 프로필 리비전 (컨텍스트 버전 계산용, 읽지 않고도 버전을 알 수 있음)
+    profile_revision: int = 0
+    name: Optional[str] = Field(default=None, exclude=True)
+    email: Optional[str] = Field(default=None, exclude=True)
+    phone: Optional[str] = Field(default=None, exclude=True)
+    github: Optional[str] = Field(default=None, exclude=True)
+    portfolio: Optional[str] = Field(default=None, exclude=True)
+
+    # 종류 -> 레코드 ID -> 레코드 (load 이후에만 채워짐)
+    _records: Dict[str, Dict[str, Dict[str, Any]]] = PrivateAttr(default_factory=dict)
+    # 저장소의 프로필 리비전 (None이면 아직 읽지 않음)
+    _revision: Optional[int] = PrivateAttr(default=None)
+    # 커밋 전에 바뀐 기본 필드 이름
+    _dirty: Set[str] = PrivateAttr(default_factory=set)
+    # 커밋 전 레코드 변경 ((종류, ID) -> 레코드, None이면 삭제)
+    _record_changes: Dict[tuple, Optional[Dict[str, Any]]] = PrivateAttr(default_factory=dict)
+    # 읽어 보니 다른 대화/인스턴스에서 프로필이 바뀌어 있었음 (클라이언트에 전체 컨텍스트 필요)
+    _changed_elsewhere: bool = PrivateAttr(default=False)
+
+    def __setattr__(self, name: str, value: Any):
+        if name in PROFILE_FIELDS and getattr(self, name) != value:
+            self._dirty.add(name)
+        super().__setattr__(name, value)
+
+    @property
+    def loaded(self) -> bool:
+        return self._revision is not None
+
+    @property
+    def changed_elsewhere(self) -> bool:
+        return self._changed_elsewhere
+
+    @property
+    def version(self) -> str:
+        """컨텍스트 버전 (사용자와 마지막으로 본 리비전으로 결정, 커밋 전 변경은 포함하지 않음)
+
+        대화 밖에서 프로필이 바뀌었을 수 있으므로 응답 전에 ``check_revision()``이나 ``load()``로
+        저장소의 리비전을 반영한 뒤의 값을 씁니다.
+        """
+        data = f"{self.user_id}:{self.profile_revision}".encode("utf-8")
+        return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+    async def load(self, store: Optional[ProfileStore] = None) -> "DeveloperProfileContext":
+        """저장된 프로필을 읽어 채움 (이번 턴에 이미 읽었으면 그대로)"""
+        if self._revision is not None:
+            return self
+        profile = await (store or profile_store).load(self.user_id) if self.user_id else {}
+        stored = profile.get("fields", {})
+        defaults = _demo_defaults(self.user_id or "")
+        # 이전 형식(대화 상태에 프로필 포함)에서 복원된 값은 바뀐 필드로 남겨 다음 커밋 때 저장소로 옮김
+        legacy = {name for name in PROFILE_FIELDS if getattr(self, name) is not None and name not in stored}
+        for name in PROFILE_FIELDS:
+            setattr(self, name, stored.get(name) or getattr(self, name) or defaults.get(name))
+        self._dirty = legacy
+        self._records = {kind: profile.get(kind, {}) for kind in RECORD_KINDS}
+        self._revision = profile.get("revision", 0)
+        self._note_revision(self._revision)
+        return self
+
+    async def check_revision(self, store: Optional[ProfileStore] = None) -> "DeveloperProfileContext":
+        """저장소의 리비전만 확인해 버전에 반영 (프로필 본문은 읽지 않음, 이번 턴에 읽었으면 생략)"""
+        if self._revision is None and self.user_id:
+            self._note_revision(await (store or profile_store).revision(self.user_id))
+        return self
+
+    def discard(self):
+        """읽은 프로필과 커밋하지 않은 변경을 버림 (다음 load에서 저장소를 다시 읽음)"""
+        for name in PROFILE_FIELDS:
+            setattr(self, name, None)
+        self._revision = None
+        self._records = {}
+        self._dirty.clear()
+        self._record_changes.clear()
+
+    def start_turn(self):
+        """이전 턴에 읽은 프로필을 버림 (인메모리/L1 저장소의 복사본에는 비공개 상태도 남아 있음)"""
+        if self._revision is not None:
+            self.discard()
+        self._changed_elsewhere = False
+
+    def _note_revision(self, revision: int):
+        if revision != self.profile_revision:
+            self._changed_elsewhere = True
+            self.profile_revision = revision
+
+    def records(self, kind: str) -> Dict[str, Dict[str, Any]]:
+        return self._records.setdefault(kind, {})
+
+    def put_record(self, kind: str, record_id: str, record: Dict[str, Any]):
+        self.records(kind)[record_id] = record
+        self._record_changes[(kind, record_id)] = record
+
+    def remove_record(self, kind: str, record_id: str) -> bool:
+        if self.records(kind).pop(record_id, None) is None:
+            return False
+        self._record_changes[(kind, record_id)] = None
+        return True
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self._dirty or self._record_changes)
+
+    def pending_changes(self) -> ProfileChanges:
+        """커밋 전에 바뀐 필드와 레코드"""
+        return ProfileChanges(
+            fields={name: getattr(self, name) for name in self._dirty},
+            records=dict(self._record_changes),
+        )
+
+    def changed_view(self) -> Dict[str, Any]:
+        """바뀐 키만 담은 UI 컨텍스트 (context_update 이벤트/델타 응답용)"""
+        dirty = self._dirty
+        changed = {name: getattr(self, name) for name in PROFILE_FIELDS if name in dirty}
+        for kind in dict.fromkeys(kind for kind, _ in self._record_changes):
+            changed[kind] = self._record_list(kind)
+        return changed
+
+    async def commit(self, store: Optional[ProfileStore] = None) -> ProfileChanges:
+        """바뀐 필드/레코드만 프로필 저장소에 기록"""
+        if not self.loaded or not self.user_id or not self.dirty:
+            return ProfileChanges()
+        changes = self.pending_changes()
+        loaded = self._revision
+        self._revision = await (store or profile_store).apply(self.user_id, changes)
+        # 읽은 뒤 다른 곳에서 기록했다면 리비전이 1보다 많이 올라가므로 전체 컨텍스트가 필요
+        if self._revision != loaded + 1:
+            self._changed_elsewhere = True
+        self.profile_revision = self._revision
+        self._dirty.clear()
+        self._record_changes.clear()
+        return changes
+
+    def profile(self) -> Dict[str, Any]:
+        """도구가 모델에 돌려주는 프로필 (레코드는 ID 포함 목록)"""
+        return {
+            **{name: getattr(self, name) for name in PROFILE_FIELDS},
+            **{kind: [{"id": record_id, **record} for record_id, record in self.records(kind).items()]
+               for kind in RECORD_KINDS},
+        }
+
+    def view(self) -> Dict[str, Any]:
+        """UI에 보여줄 컨텍스트 (값은 모두 문자열, 레코드는 이름 목록)"""
+        return {
+            **{name: getattr(self, name) for name in PROFILE_FIELDS},
+            **{kind: self._record_list(kind) for kind in RECORD_KINDS},
+        }
+
+    def _record_list(self, kind: str) -> Optional[str]:
+        return ", ".join(_record_label(r) for r in self.records(kind).values()) or None
+
+
+def _record_label(record: Dict[str, Any]) -> str:
+    return record.get("name") or record.get("company") or ""
+
+
+def _demo_defaults(user_id: str) -> Dict[str, str]:
+    """For demo: a stable fake github/portfolio per user until real data is saved."""
+    n = int(hashlib.sha256(user_id.encode("utf-8")).hexdigest()[:8], 16) % 9000 + 1000
+    return {"github": f"github.com/dev{n}", "portfolio": f"portfolio.dev{n}.com"}
+
+
+def create_initial_context(user_id: Optional[str] = None) -> DeveloperProfileContext:
     """
     Factory for a new DeveloperProfileContext.
-    For demo: generates a fake github and portfolio.
-    In production, this should be set from real user data.
+    프로필은 user_id로 profile_store에서 읽으므로 여기서는 ID만 정합니다
+    (저장된 github/portfolio가 없으면 데모용 값을 보여줌).
     """
-    ctx = DeveloperProfileContext()
-    ctx.github = f"github.com/dev{random.randint(1000,9999)}"
-    ctx.portfolio = f"portfolio.dev{random.randint(1000,9999)}.com"
-    return ctx
+    return DeveloperProfileContext(user_id=user_id or uuid4().hex)
 
 # =========================
 # TOOLS
 # =========================
 
+@functools.lru_cache(maxsize=1)
+def get_faq_index() -> FaqIndex:
+    """FAQ 역색인 (콜드 스타트 비용을 줄이기 위해 첫 조회 또는 웜업 때 한 번만 로드)"""
+    return load_faq_index()
+
 
 @function_tool(
     name_override="faq_lookup_tool", description_override="Lookup developer FAQ."
 )
 async def faq_lookup_tool(question: str) -> str:
     """Lookup answers to developer profile frequently asked questions."""
-    q = question.lower()
-    if "github" in q:
-        return "GitHub 계정은 개발자 포트폴리오의 핵심입니다. 최신 프로젝트와 활동을 정리해 두세요."
-    elif "포트폴리오" in q:
-        return "포트폴리오에는 대표 프로젝트, 기술스택, 자기소개, 연락처 등을 포함하세요."
-    elif "기술스택" in q:
-        return "기술스택은 자신이 실제로 사용해 본 언어, 프레임워크, 도구 위주로 작성하세요."
-    return "죄송합니다. 해당 질문에 대한 답변을 찾을 수 없습니다."
+    answer = get_faq_index().answer(question)
+    return answer or "죄송합니다. 해당 질문에 대한 답변을 찾을 수 없습니다."
+
+
+@function_tool
+async def get_profile(context: RunContextWrapper[DeveloperProfileContext]) -> str:
+    """Read the developer's saved profile: basic info, projects, career entries and tech stack."""
+    profile = await context.context.load()
+    return json.dumps(profile.profile(), ensure_ascii=False)
+
+
+@function_tool
+async def update_profile(
+    context: RunContextWrapper[DeveloperProfileContext],
+    name: Optional[str] = None,
+    email: Optional[str] = None,
+    phone: Optional[str] = None,
+    github: Optional[str] = None,
+    portfolio: Optional[str] = None,
+) -> str:
+    """Update developer profile information. Only the given fields are changed."""
+    profile = await context.context.load()
+    for field_name, value in (("name", name), ("email", email), ("phone", phone),
+                              ("github", github), ("portfolio", portfolio)):
+        if value:
+            setattr(profile, field_name, value)
+    return "프로필 정보가 업데이트되었습니다."
 
 
 @function_tool
 async def add_project(
-    context, project_name: str, description: str
+    context: RunContextWrapper[DeveloperProfileContext], project_name: str, description: str
 ) -> str:
     """Add a new project to the developer's profile."""
-    # 실제로는 DB나 context에 저장해야 함
-    return f"프로젝트 '{project_name}'가 프로필에 추가되었습니다. 설명: {description}"
+    profile = await context.context.load()
+    project_id = uuid4().hex[:8]
+    profile.put_record("projects", project_id, {"name": project_name, "description": description})
+    return f"프로젝트 '{project_name}'가 프로필에 추가되었습니다. (ID: {project_id}) 설명: {description}"
 
 
 @function_tool
-async def update_profile(
-    context, name: str = None, email: str = None, phone: str = None, github: str = None, portfolio: str = None
+async def update_project(
+    context: RunContextWrapper[DeveloperProfileContext],
+    project_id: str,
+    project_name: Optional[str] = None,
+    description: Optional[str] = None,
 ) -> str:
-    """Update developer profile information."""
-    if name:
-        context.context.name = name
-    if email:
-        context.context.email = email
-    if phone:
-        context.context.phone = phone
-    if github:
-        context.context.github = github
-    if portfolio:
-        context.context.portfolio = portfolio
-    return "프로필 정보가 업데이트되었습니다."
+    """Update the name or description of a saved project (see get_profile for project IDs)."""
+    profile = await context.context.load()
+    project = profile.records("projects").get(project_id)
+    if project is None:
+        return f"ID가 {project_id}인 프로젝트를 찾을 수 없습니다."
+    updates = {k: v for k, v in (("name", project_name), ("description", description)) if v}
+    profile.put_record("projects", project_id, {**project, **updates})
+    return f"프로젝트 '{updates.get('name', project['name'])}'가 수정되었습니다."
+
+
+@function_tool
+async def add_career(
+    context: RunContextWrapper[DeveloperProfileContext],
+    company: str,
+    role: str,
+    period: str,
+    description: Optional[str] = None,
+) -> str:
+    """Add a career entry (company, role, period) to the developer's profile."""
+    profile = await context.context.load()
+    career_id = uuid4().hex[:8]
+    record = {"company": company, "role": role, "period": period}
+    if description:
+        record["description"] = description
+    profile.put_record("career", career_id, record)
+    return f"경력 '{company} ({role}, {period})'이 추가되었습니다. (ID: {career_id})"
+
+
+@function_tool
+async def add_tech_stack(context: RunContextWrapper[DeveloperProfileContext], items: List[str]) -> str:
+    """Add technologies to the developer's tech stack. Already listed items are kept once."""
+    profile = await context.context.load()
+    # 기술 이름(대소문자 무시)을 ID로 사용해 중복 없이 저장
+    added = [item.strip() for item in items
+             if item.strip() and item.strip().lower() not in profile.records("tech_stack")]
+    for item in added:
+        profile.put_record("tech_stack", item.lower(), {"name": item})
+    if not added:
+        return "이미 기술스택에 있는 항목입니다."
+    return f"기술스택에 {', '.join(added)}이(가) 추가되었습니다."
 
 
 @function_tool(
@@ -139,6 +368,17 @@ async def on_seat_booking_handoff(context: RunContextWrapper[DeveloperProfileCon
 # =========================
 
 
+async def _model_verdict(guard_agent: Agent, output_type, input, context):
+    """Ask the guardrail agent, reusing cached verdicts for repeated inputs."""
+    cached = await verdict_cache.get(guard_agent.name, input)
+    if cached is not None:
+        return output_type.model_validate(cached), "cache"
+    result = await Runner.run(guard_agent, input, context=context, run_config=run_config)
+    final = result.final_output_as(output_type)
+    await verdict_cache.set(guard_agent.name, input, final.model_dump())
+    return final, "model"
+
+
 class RelevanceOutput(BaseModel):
     """Schema for relevance guardrail decisions."""
     reasoning: str
@@ -149,11 +389,11 @@ guardrail_agent = Agent(
     model="gpt-4.1-mini",
     name="Relevance Guardrail",
     instructions=(
-        "Determine if the user's message is highly unrelated to a normal customer service "
-        "conversation with an airline (flights, bookings, baggage, check-in, flight status, policies, loyalty programs, etc.). "
+        "Determine if the user's message is highly unrelated to a conversation about building a developer "
+        "profile or portfolio (self-introduction, contact info, career, projects, tech stack, GitHub, FAQ, etc.). "
         "Important: You are ONLY evaluating the most recent user message, not any of the previous messages from the chat history"
         "It is OK for the customer to send messages such as 'Hi' or 'OK' or any other messages that are at all conversational, "
-        "but if the response is non-conversational, it must be somewhat related to airline travel. "
+        "but if the response is non-conversational, it must be somewhat related to developer profiles. "
         "Return is_relevant=True if it is, else False, plus a brief reasoning."
     ),
     output_type=RelevanceOutput,
@@ -164,10 +404,16 @@ guardrail_agent = Agent(
 async def relevance_guardrail(
     context: RunContextWrapper[None], agent: Agent, input: str | list[TResponseInputItem]
 ) -> GuardrailFunctionOutput:
-    """Guardrail to check if input is relevant to airline topics."""
-    result = await Runner.run(guardrail_agent, input, context=context.context)
-    final = result.final_output_as(RelevanceOutput)
-    return GuardrailFunctionOutput(output_info=final, tripwire_triggered=not final.is_relevant)
+    """Guardrail to check if input is relevant to developer profile topics."""
+    # 확실한 입력은 모델 호출 없이 로컬에서 판정
+    local = prefilter.relevance(input)
+    if local is not None:
+        return TieredGuardrailOutput(
+            output_info=RelevanceOutput(reasoning=local.reasoning, is_relevant=not local.tripwire),
+            tripwire_triggered=local.tripwire, source="local")
+    final, source = await _model_verdict(guardrail_agent, RelevanceOutput, input, context.context)
+    return TieredGuardrailOutput(
+        output_info=final, tripwire_triggered=not final.is_relevant, source=source)
 
 
 class JailbreakOutput(BaseModel):
@@ -198,21 +444,33 @@ async def jailbreak_guardrail(
     context: RunContextWrapper[None], agent: Agent, input: str | list[TResponseInputItem]
 ) -> GuardrailFunctionOutput:
     """Guardrail to detect jailbreak attempts."""
-    result = await Runner.run(jailbreak_guardrail_agent, input, context=context.context)
-    final = result.final_output_as(JailbreakOutput)
-    return GuardrailFunctionOutput(output_info=final, tripwire_triggered=not final.is_safe)
+    local = prefilter.jailbreak(input)
+    if local is not None:
+        return TieredGuardrailOutput(
+            output_info=JailbreakOutput(reasoning=local.reasoning, is_safe=not local.tripwire),
+            tripwire_triggered=local.tripwire, source="local")
+    final, source = await _model_verdict(jailbreak_guardrail_agent, JailbreakOutput, input, context.context)
+    return TieredGuardrailOutput(
+        output_info=final, tripwire_triggered=not final.is_safe, source=source)
 
 # =========================
 # AGENTS (리팩토링)
 # =========================
 
+# 모든 에이전트에 공통으로 적용되는 입력 가드레일
+input_guardrails = [relevance_guardrail, jailbreak_guardrail]
+
 # 자기소개 에이전트
 intro_agent = Agent(
     name="자기소개 에이전트",
     model="gpt-4.1",
     handoff_description="개발자 자기소개를 도와주는 에이전트입니다.",
-    instructions="사용자의 이름, 이메일, 연락처, 간단한 자기소개를 받아 자기소개 섹션을 완성합니다.",
-    tools=[update_profile],
+    instructions=(
+        "사용자의 이름, 이메일, 연락처, 간단한 자기소개를 받아 자기소개 섹션을 완성합니다. "
+        "저장된 프로필이 필요하면 get_profile 도구로 조회하세요."
+    ),
+    tools=[update_profile, get_profile],
+    input_guardrails=input_guardrails,
 )
 
 # 경력 에이전트
@@ -220,8 +478,12 @@ career_agent = Agent(
     name="경력 에이전트",
     model="gpt-4.1",
     handoff_description="개발자 경력(회사, 기간, 역할 등)을 관리하는 에이전트입니다.",
-    instructions="경력 추가, 수정, 삭제 등 경력 관련 요청을 처리합니다.",
-    tools=[],
+    instructions=(
+        "경력 추가, 수정, 삭제 등 경력 관련 요청을 처리합니다. "
+        "저장된 경력이 필요하면 get_profile 도구로 조회하세요."
+    ),
+    tools=[add_career, get_profile],
+    input_guardrails=input_guardrails,
 )
 
 # 프로젝트 에이전트
@@ -229,8 +491,12 @@ project_agent = Agent(
     name="프로젝트 에이전트",
     model="gpt-4.1",
     handoff_description="개발자 프로젝트 정보를 관리하는 에이전트입니다.",
-    instructions="프로젝트 추가, 설명, 기술스택 등 프로젝트 관련 요청을 처리합니다.",
-    tools=[add_project],
+    instructions=(
+        "프로젝트 추가, 설명, 기술스택 등 프로젝트 관련 요청을 처리합니다. "
+        "저장된 프로젝트(ID 포함)가 필요하면 get_profile 도구로 조회하세요."
+    ),
+    tools=[add_project, update_project, get_profile],
+    input_guardrails=input_guardrails,
 )
 
 # 기술스택 에이전트
@@ -238,8 +504,12 @@ tech_agent = Agent(
     name="기술스택 에이전트",
     model="gpt-4.1",
     handoff_description="개발자의 기술스택 정보를 관리하는 에이전트입니다.",
-    instructions="기술스택 추가, 수정, 삭제 등 기술스택 관련 요청을 처리합니다.",
-    tools=[],
+    instructions=(
+        "기술스택 추가, 수정, 삭제 등 기술스택 관련 요청을 처리합니다. "
+        "저장된 기술스택이 필요하면 get_profile 도구로 조회하세요."
+    ),
+    tools=[add_tech_stack, get_profile],
+    input_guardrails=input_guardrails,
 )
 
 # FAQ 에이전트
@@ -252,9 +522,19 @@ faq_agent = Agent(
         "FAQ가 아니더라도 간단한 인사, 자기소개 요청 등에는 직접 답변할 수 있습니다."
     ),
     tools=[faq_lookup_tool],
+    input_guardrails=input_guardrails,
 )
 
 # 메인 트라이에이지 에이전트
+# 트라이에이지의 핸드오프 도구 이름 -> 대상 에이전트
+TRIAGE_HANDOFFS: Dict[str, Agent] = {
+    "transfer_to_faq_agent": faq_agent,
+    "transfer_to_intro_agent": intro_agent,
+    "transfer_to_career_agent": career_agent,
+    "transfer_to_project_agent": project_agent,
+    "transfer_to_tech_agent": tech_agent,
+}
+
 triage_agent = Agent(
     name="트라이에이지 에이전트",
     model="gpt-4.1",
@@ -264,8 +544,14 @@ triage_agent = Agent(
         "만약 인사말(예: '안녕하세요', '반가워요', '반갑습니다')이나 간단한 질문이 오면 직접 친절하게 답변하세요. "
         "FAQ 에이전트, 자기소개 에이전트, 경력 에이전트, 프로젝트 에이전트, 기술스택 에이전트로 연결할 수 있습니다."
     ),
-    handoffs=[faq_agent, intro_agent, career_agent, project_agent, tech_agent],
+    # 에이전트 이름이 한글이라 SDK 기본 도구 이름(transfer_to_<이름>)이 서로 겹치므로 직접 지정
+    handoffs=[handoff(agent, tool_name_override=tool_name) for tool_name, agent in TRIAGE_HANDOFFS.items()],
+    input_guardrails=input_guardrails,
 )
 
 # Set up handoff relationships
-faq_agent.handoffs.append(triage_agent)
+faq_agent.handoffs.append(handoff(triage_agent, tool_name_override="transfer_to_triage_agent"))
+
+# 트라이에이지에서 핸드오프로 도달 가능한 모든 에이전트 (이름 색인과 카탈로그를 한 번만 계산)
+# 핸드오프 대상은 위에서 handoff()에 넘긴 에이전트 객체를 그대로 넘겨 이름으로 찾음
+agent_registry = AgentRegistry.from_graph(triage_agent, agents=[triage_agent, *TRIAGE_HANDOFFS.values()])
@@ -0,0 +1,201 @@
+import math
+import os
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, Dict, List, Tuple, Iterator
+
+# 0이면 Server-Timing 헤더를 붙이지 않음 (/metrics 수집은 계속)
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING", "1") != "0"
+
+# Prometheus 기본 지연 버킷 (초)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 4, 6, 8, 12, 16)
+BYTE_BUCKETS = tuple(256 * 4 ** i for i in range(8))  # 256 B ~ 4 MB
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = _labels(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(_labels(labels), 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_format_labels(key)} {_format_value(value)}"
+                  for key, value in sorted(self._values.items())]
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        # 라벨 조합 -> (버킷별 개수(누적 아님), 합계, 개수)
+        self._series: Dict[LabelKey, List] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = _labels(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def count(self, **labels: str) -> int:
+        series = self._series.get(_labels(labels))
+        return series[2] if series else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total, count) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', _format_value(bound)))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """프로세스 로컬 메트릭 저장소 (Prometheus 텍스트 형식으로 출력)
+
+    이벤트 루프 하나에서만 갱신되므로 잠금 없이 dict 연산만 합니다.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def counter(self, name: str, help: str) -> Counter:
+        return self._metrics.setdefault(name, Counter(name, help))
+
+    def histogram(self, name: str, help: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self._metrics.setdefault(name, Histogram(name, help, buckets))
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self._metrics.values() for line in metric.render()) + "\n"
+
+
+registry = MetricsRegistry()
+
+phase_seconds = registry.histogram("chat_phase_seconds", "Time spent in each phase of a chat turn")
+turn_seconds = registry.histogram("chat_turn_seconds", "End-to-end chat turn latency by path")
+model_calls_per_turn = registry.histogram(
+    "chat_model_calls_per_turn", "Model calls (agent + guardrail) made by one chat turn", COUNT_BUCKETS)
+handoffs_total = registry.counter("chat_handoffs_total", "Agent handoffs by target agent")
+guardrail_checks_total = registry.counter(
+    "guardrail_checks_total", "Guardrail verdicts by guardrail and source (local/cache/model)")
+guardrail_trips_total = registry.counter("guardrail_trips_total", "Guardrail tripwires by guardrail")
+store_seconds = registry.histogram(
+    "store_operation_seconds", "Conversation store round trips by backend (store class) and operation")
+store_bytes = registry.histogram("store_bytes", "Encoded bytes read/written per store operation", BYTE_BUCKETS)
+
+
+class TurnTimings:
+    """요청 하나의 단계별 소요 시간 (Server-Timing 헤더용)"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+
+    def add(self, name: str, seconds: float):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def server_timing(self) -> str:
+        entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.phases.items()]
+        entries.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(entries)
+
+
+# 현재 요청의 TurnTimings (미들웨어가 설정, 저장소 등 하위 계층은 여기에 기록)
+current_timings: ContextVar[Optional[TurnTimings]] = ContextVar("current_timings", default=None)
+
+
+def record_phase(name: str, seconds: float):
+    """Record a phase duration in the histogram and the current request's Server-Timing."""
+    phase_seconds.observe(seconds, phase=name)
+    timings = current_timings.get()
+    if timings is not None:
+        timings.add(name, seconds)
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(name, time.perf_counter() - started)
+
+
+@contextmanager
+def store_operation(op: str, backend: str) -> Iterator[None]:
+    """저장소 왕복 시간 (``backend`` 라벨은 저장소 클래스의 ``backend``, Server-Timing에는 ``<backend>_<op>``로 합산)"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        store_seconds.observe(elapsed, backend=backend, op=op)
+        timings = current_timings.get()
+        if timings is not None:
+            timings.add(f"{backend}_{op}", elapsed)
+
+
+class ServerTimingMiddleware:
+    """요청마다 TurnTimings를 설정하고 응답 시작 시 ``Server-Timing`` 헤더로 내보내는 ASGI 미들웨어
+
+    스트리밍 응답은 헤더가 본문보다 먼저 나가므로 스트림 시작 전까지의 단계만 담깁니다.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timings = TurnTimings()
+        token = current_timings.set(timings)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and timings.phases:
+                message["headers"] = [*message.get("headers", []),
+                                      (b"server-timing", timings.server_timing().encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_timings.reset(token)
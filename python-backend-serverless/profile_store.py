@@ -0,0 +1,347 @@
+import copy
+import json
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, Callable, List, Tuple
+
+import redis.asyncio as aioredis
+
+import metrics
+from conversation_store import SQLiteConversationStore
+
+# 프로필 TTL (마지막 기록 후 30일, 0이면 만료 없음). 대화 상태(2시간)와 별도로 유지
+PROFILE_TTL_SECONDS = int(os.getenv("PROFILE_TTL_SECONDS", str(30 * 24 * 3600)))
+# 프로세스 로컬 프로필(Redis 사용 시 캐시) 최대 개수 (넘으면 가장 오래 사용하지 않은 프로필부터 제거)
+PROFILE_LOCAL_MAX_ENTRIES = int(os.getenv("PROFILE_LOCAL_MAX_ENTRIES", "10000"))
+
+# 프로필 기본 필드와 사용자별 레코드 종류
+PROFILE_FIELDS = ("name", "email", "phone", "github", "portfolio")
+RECORD_KINDS = ("projects", "career", "tech_stack")
+# 기본 필드 해시에 함께 두는 리비전 (프로필이 바뀔 때마다 증가, 컨텍스트 버전에 사용)
+REVISION_FIELD = b"_revision"
+
+
+@dataclass
+class ProfileChanges:
+    """한 턴에서 커밋할 프로필 변경 (바뀐 필드와 레코드 단위 변경)"""
+    # 필드 -> 새 값 (None이면 삭제)
+    fields: Dict[str, Optional[str]] = field(default_factory=dict)
+    # (종류, 레코드 ID) -> 레코드 전체 (None이면 삭제)
+    records: Dict[tuple, Optional[Dict[str, Any]]] = field(default_factory=dict)
+
+    def __bool__(self) -> bool:
+        return bool(self.fields or self.records)
+
+
+def empty_profile() -> Dict[str, Any]:
+    return {"fields": {}, **{kind: {} for kind in RECORD_KINDS}, "revision": 0}
+
+
+def _apply_changes(profile: Dict[str, Any], changes: ProfileChanges):
+    for name, value in changes.fields.items():
+        if value is None:
+            profile["fields"].pop(name, None)
+        else:
+            profile["fields"][name] = value
+    for (kind, record_id), record in changes.records.items():
+        if record is None:
+            profile[kind].pop(record_id, None)
+        else:
+            profile[kind][record_id] = copy.deepcopy(record)
+
+
+class ProfileStore:
+    """사용자별 개발자 프로필 저장소 (프로세스 로컬 dict + 선택적 Redis/SQLite 계층)
+
+    프로필은 대화 상태와 분리되어 사용자 ID로 저장되고, 레코드는 종류별로 ID 색인을
+    가지므로 도구는 바뀐 필드/레코드만 기록합니다.
+
+    - ``profile:{user}``         해시: 기본 필드 (``name``, ``email`` ...)와 ``_revision`` (기록마다 1 증가)
+    - ``profile:{user}:{kind}``  해시: 레코드 ID -> JSON (``projects``, ``career``, ``tech_stack``)
+
+    ``sqlite``(대화 저장소와 같은 SQLite 파일)가 설정되면 같은 구조를 두 테이블에 둡니다.
+
+    - ``profiles``         사용자별 ``revision``과 ``expires_at`` (마지막 기록 기준 TTL)
+    - ``profile_entries``  (사용자, 종류, 키) -> 값 (종류 ``fields``는 기본 필드 값, 나머지는 레코드 JSON)
+
+    둘 다 없으면 프로세스 로컬 dict를 사용합니다 (인스턴스 간에 공유되지 않음).
+    로컬 dict는 ``InMemoryConversationStore``처럼 TTL(마지막 기록 기준)과 항목 수(LRU)로 제한되므로
+    ``user_id`` 없이 대화 ID로 구분되는 익명 프로필이 계속 쌓이지 않습니다.
+    공유 계층이 있으면 로컬 dict는 읽은 프로필의 캐시가 되어, 저장된 리비전이 같을 때는
+    리비전만 확인(Redis ``HGET`` 한 번)하고 레코드를 다시 읽지 않습니다.
+    """
+
+    _SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    user_id TEXT PRIMARY KEY,
+    revision INTEGER NOT NULL,
+    expires_at REAL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS profiles_expires_at ON profiles (expires_at);
+CREATE TABLE IF NOT EXISTS profile_entries (
+    user_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (user_id, kind, key)
+) WITHOUT ROWID;
+"""
+    _SQL_REVISION = "SELECT revision FROM profiles WHERE user_id = ? AND (expires_at IS NULL OR expires_at > ?)"
+    _SQL_ENTRIES = "SELECT kind, key, value FROM profile_entries WHERE user_id = ?"
+    _SQL_EXPIRED = "SELECT 1 FROM profiles WHERE user_id = ? AND expires_at <= ?"
+    # 만료됐지만 아직 정리되지 않은 프로필에 다시 기록해도 리비전은 이어서 증가
+    _SQL_BUMP = """
+INSERT INTO profiles (user_id, revision, expires_at) VALUES (?, 1, ?)
+ON CONFLICT (user_id) DO UPDATE SET revision = profiles.revision + 1, expires_at = excluded.expires_at
+RETURNING revision
+"""
+    _SQL_SET = "INSERT OR REPLACE INTO profile_entries (user_id, kind, key, value) VALUES (?, ?, ?, ?)"
+    _SQL_UNSET = "DELETE FROM profile_entries WHERE user_id = ? AND kind = ? AND key = ?"
+    _SQL_DELETE_ENTRIES = "DELETE FROM profile_entries WHERE user_id = ?"
+    _SQL_DELETE = "DELETE FROM profiles WHERE user_id = ?"
+    _SQL_EXPIRED_USERS = "SELECT user_id FROM profiles WHERE expires_at <= ? LIMIT ?"
+
+    def __init__(self, redis_client: Optional[aioredis.Redis] = None,
+                 ttl_seconds: int = PROFILE_TTL_SECONDS, max_entries: int = PROFILE_LOCAL_MAX_ENTRIES,
+                 sweep_interval: float = 60.0, sweep_batch: int = 500,
+                 clock: Callable[[], float] = time.monotonic, wall_clock: Callable[[], float] = time.time):
+        self.redis = redis_client
+        self.sqlite: Optional[SQLiteConversationStore] = None
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.sweep_interval = sweep_interval
+        self.sweep_batch = sweep_batch
+        self._clock = clock
+        # SQLite의 만료 시각은 워커 간에 비교하므로 벽시계 시간 사용
+        self._wall_clock = wall_clock
+        # 사용자 ID -> (만료 시각, 프로필), 사용 순서(LRU)
+        self._local: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._next_sweep = clock() + sweep_interval
+        self._next_sqlite_sweep = wall_clock() + sweep_interval
+        self.loads = 0
+        self.writes = 0
+        # Redis 사용 시 리비전이 같아 레코드를 다시 읽지 않은 횟수
+        self.cache_hits = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _get_local(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """로컬 프로필 (만료됐으면 제거 후 None)"""
+        now = self._clock()
+        self._maybe_sweep(now)
+        entry = self._local.get(user_id)
+        if entry is None:
+            return None
+        if entry[0] <= now:
+            del self._local[user_id]
+            self.expirations += 1
+            return None
+        self._local.move_to_end(user_id)
+        return entry[1]
+
+    def _put_local(self, user_id: str, profile: Dict[str, Any]):
+        """로컬 프로필 기록 (TTL 갱신, 개수를 넘으면 LRU 순서로 제거)"""
+        expires_at = self._clock() + self.ttl_seconds if self.ttl_seconds > 0 else float("inf")
+        self._local[user_id] = (expires_at, profile)
+        self._local.move_to_end(user_id)
+        while len(self._local) > max(self.max_entries, 1):
+            self._local.popitem(last=False)
+            self.evictions += 1
+
+    def _maybe_sweep(self, now: float):
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + self.sweep_interval
+        expired = [user_id for user_id, (expires_at, _) in self._local.items() if expires_at <= now]
+        for user_id in expired:
+            del self._local[user_id]
+        self.expirations += len(expired)
+
+    @property
+    def sqlite(self) -> Optional[SQLiteConversationStore]:
+        return self._sqlite
+
+    @sqlite.setter
+    def sqlite(self, store: Optional[SQLiteConversationStore]):
+        self._sqlite = store
+        if store is not None:
+            store.add_schema(self._SQLITE_SCHEMA)
+
+    @staticmethod
+    def _keys(user_id: str) -> List[str]:
+        """(기본 필드 해시, 종류별 레코드 해시...)"""
+        return [f"profile:{user_id}", *(f"profile:{user_id}:{kind}" for kind in RECORD_KINDS)]
+
+    async def load(self, user_id: str) -> Dict[str, Any]:
+        """프로필 전체 (``{"fields": {...}, "projects": {id: record}, ..., "revision": n}``, 없으면 빈 프로필)"""
+        self.loads += 1
+        cached = self._get_local(user_id)
+        if self.redis is None and self.sqlite is None:
+            return copy.deepcopy(cached or empty_profile())
+        if self.sqlite is not None:
+            profile = await self._load_sqlite(user_id, cached)
+        else:
+            profile = await self._load_redis(user_id, cached)
+        if profile is None:
+            # 리비전이 같으면 캐시된 프로필 사용
+            self.cache_hits += 1
+            return copy.deepcopy(cached)
+        self._put_local(user_id, profile)
+        return copy.deepcopy(profile)
+
+    async def _load_redis(self, user_id: str, cached: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        keys = self._keys(user_id)
+        with metrics.store_operation("profile_load", "redis"):
+            # 캐시가 있으면 작은 값 하나만 왕복해 리비전 확인
+            if cached is not None and int(await self.redis.hget(keys[0], REVISION_FIELD) or 0) == cached["revision"]:
+                return None
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.hgetall(key)
+                fields, *records = await pipe.execute()
+        revision = int(fields.pop(REVISION_FIELD, 0))
+        return {
+            "fields": {k.decode(): v.decode() for k, v in fields.items()},
+            **{kind: {k.decode(): json.loads(v) for k, v in values.items()}
+               for kind, values in zip(RECORD_KINDS, records)},
+            "revision": revision,
+        }
+
+    async def _load_sqlite(self, user_id: str, cached: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        with metrics.store_operation("profile_load", "sqlite"):
+            return await self.sqlite.run_in_transaction(self._load_sqlite_sync, user_id, cached and cached["revision"],
+                                                        mode="DEFERRED")
+
+    def _load_sqlite_sync(self, db, user_id: str, cached_revision: Optional[int]) -> Optional[Dict[str, Any]]:
+        row = db.execute(self._SQL_REVISION, (user_id, self._wall_clock())).fetchone()
+        revision = row[0] if row else 0
+        if revision == cached_revision:
+            return None
+        profile = empty_profile()
+        profile["revision"] = revision
+        if row:
+            for kind, key, value in db.execute(self._SQL_ENTRIES, (user_id,)):
+                if kind == "fields":
+                    profile["fields"][key] = value
+                else:
+                    profile[kind][key] = json.loads(value)
+        return profile
+
+    async def revision(self, user_id: str) -> int:
+        """저장된 프로필 리비전만 조회 (없으면 0, Redis ``HGET`` / SQLite ``SELECT`` 한 번)"""
+        if self.sqlite is not None:
+            with metrics.store_operation("profile_revision", "sqlite"):
+                return await self.sqlite.run_in_transaction(self._revision_sqlite_sync, user_id, mode="DEFERRED")
+        if self.redis is not None:
+            with metrics.store_operation("profile_revision", "redis"):
+                return int(await self.redis.hget(self._keys(user_id)[0], REVISION_FIELD) or 0)
+        profile = self._get_local(user_id)
+        return profile["revision"] if profile else 0
+
+    def _revision_sqlite_sync(self, db, user_id: str) -> int:
+        row = db.execute(self._SQL_REVISION, (user_id, self._wall_clock())).fetchone()
+        return row[0] if row else 0
+
+    async def apply(self, user_id: str, changes: ProfileChanges) -> Optional[int]:
+        """바뀐 필드/레코드만 기록하고 새 리비전을 반환 (공유 계층에서는 한 번의 트랜잭션, 변경이 없으면 None)"""
+        if not changes:
+            return None
+        self.writes += 1
+        if self.redis is None and self.sqlite is None:
+            profile = self._get_local(user_id) or empty_profile()
+            _apply_changes(profile, changes)
+            profile["revision"] += 1
+            self._put_local(user_id, profile)
+            return profile["revision"]
+
+        if self.sqlite is not None:
+            with metrics.store_operation("profile_write", "sqlite"):
+                revision = await self.sqlite.run_in_transaction(self._apply_sqlite_sync, user_id, changes)
+        else:
+            revision = await self._apply_redis(user_id, changes)
+        cached = self._get_local(user_id)
+        if cached is not None and cached["revision"] == revision - 1:
+            # 캐시한 리비전 바로 다음 기록이면 같은 변경을 캐시에도 반영
+            _apply_changes(cached, changes)
+            cached["revision"] = revision
+            self._put_local(user_id, cached)
+        else:
+            self._local.pop(user_id, None)
+        return revision
+
+    async def _apply_redis(self, user_id: str, changes: ProfileChanges) -> int:
+        keys = self._keys(user_id)
+        kind_keys = dict(zip(RECORD_KINDS, keys[1:]))
+        with metrics.store_operation("profile_write", "redis"):
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.hincrby(keys[0], REVISION_FIELD, 1)
+                updated = {k: v for k, v in changes.fields.items() if v is not None}
+                removed = [k for k, v in changes.fields.items() if v is None]
+                if updated:
+                    pipe.hset(keys[0], mapping=updated)
+                if removed:
+                    pipe.hdel(keys[0], *removed)
+                for (kind, record_id), record in changes.records.items():
+                    if record is None:
+                        pipe.hdel(kind_keys[kind], record_id)
+                    else:
+                        pipe.hset(kind_keys[kind], record_id, json.dumps(record, ensure_ascii=False))
+                if self.ttl_seconds > 0:
+                    for key in keys:
+                        pipe.expire(key, self.ttl_seconds)
+                revision, *_ = await pipe.execute()
+        return revision
+
+    def _apply_sqlite_sync(self, db, user_id: str, changes: ProfileChanges) -> int:
+        now = self._wall_clock()
+        self._sweep_sqlite(db, now)
+        # 만료된 프로필에 다시 기록하면 이전 레코드는 버림 (Redis 키 만료와 같음)
+        if db.execute(self._SQL_EXPIRED, (user_id, now)).fetchone():
+            db.execute(self._SQL_DELETE_ENTRIES, (user_id,))
+        expires_at = now + self.ttl_seconds if self.ttl_seconds > 0 else None
+        revision = db.execute(self._SQL_BUMP, (user_id, expires_at)).fetchone()[0]
+        entries = [("fields", name, value) for name, value in changes.fields.items()] + [
+            (kind, record_id, None if record is None else json.dumps(record, ensure_ascii=False))
+            for (kind, record_id), record in changes.records.items()]
+        db.executemany(self._SQL_SET, [(user_id, kind, key, value) for kind, key, value in entries
+                                       if value is not None])
+        db.executemany(self._SQL_UNSET, [(user_id, kind, key) for kind, key, value in entries if value is None])
+        return revision
+
+    def _sweep_sqlite(self, db, now: float):
+        """만료된 프로필을 ``sweep_interval``초마다 ``sweep_batch``개까지 삭제 (기록 트랜잭션 안에서)"""
+        if now < self._next_sqlite_sweep:
+            return
+        self._next_sqlite_sweep = now + self.sweep_interval
+        expired = [(row[0],) for row in db.execute(self._SQL_EXPIRED_USERS, (now, self.sweep_batch))]
+        db.executemany(self._SQL_DELETE_ENTRIES, expired)
+        db.executemany(self._SQL_DELETE, expired)
+        self.expirations += len(expired)
+
+    def _delete_sqlite_sync(self, db, user_id: str):
+        db.execute(self._SQL_DELETE_ENTRIES, (user_id,))
+        db.execute(self._SQL_DELETE, (user_id,))
+
+    async def delete(self, user_id: str):
+        self._local.pop(user_id, None)
+        if self.redis is not None:
+            await self.redis.delete(*self._keys(user_id))
+        if self.sqlite is not None:
+            await self.sqlite.run_in_transaction(self._delete_sqlite_sync, user_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "shared": self.redis is not None or self.sqlite is not None,
+            "local_profiles": len(self._local),
+            "loads": self.loads,
+            "cache_hits": self.cache_hits,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "writes": self.writes,
+        }
+
+
+# 프로세스 전역 프로필 저장소 (api.py가 Redis/SQLite 저장소를 쓰면 공유 계층을 연결)
+profile_store = ProfileStore()
@@ -0,0 +1,498 @@
+import heapq
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Optional, Dict, List, Tuple, Callable, Sequence
+
+import redis.asyncio as aioredis
+
+from conversation_store import SQLiteConversationStore
+
+# 좌석 선택 후 결제/확정까지 좌석을 잡아 두는 시간
+SEAT_HOLD_SECONDS = float(os.getenv("SEAT_HOLD_SECONDS", "600"))
+# 항공편 좌석 상태를 마지막 변경부터 보관하는 시간 (확정 좌석 포함, 지난 항공편 정리용)
+FLIGHT_TTL_SECONDS = int(os.getenv("FLIGHT_TTL_SECONDS", str(30 * 24 * 3600)))
+
+# 항공편 번호: 항공사 코드 2~3자 + 선택적 "-" + 숫자 1~4자리 (KE001, FLT-123)
+FLIGHT_NUMBER = re.compile(r"[A-Z0-9]{2,3}-?[0-9]{1,4}")
+
+# 비트 순서는 Redis SETBIT/BITFIELD와 같음 (오프셋 0 = 첫 바이트의 최상위 비트)
+_SEAT_BITS = [0x80 >> i for i in range(8)]
+
+
+class SeatLayout:
+    """항공편 좌석 배치 (한 열 = 비트맵 1바이트)
+
+    열마다 최대 8좌석이며 ``A``가 최상위 비트입니다. 열보다 좁은 자리(비즈니스석 4좌석 등)는
+    항상 점유된 비트로 채워 두므로 빈 좌석 검색이 열 너비를 따로 확인하지 않습니다.
+    """
+
+    def __init__(self, rows: Sequence[str]):
+        if any(not 0 < len(letters) <= 8 for letters in rows):
+            raise ValueError("열마다 1~8개 좌석이어야 합니다.")
+        self.rows = tuple(rows)
+        # 빈 항공편의 비트맵 (없는 좌석 자리만 1)
+        self.empty = bytes(0xFF >> len(letters) for letters in self.rows)
+        self.capacity = sum(map(len, self.rows))
+        # 연속 좌석 수 -> 바이트 값별 첫 연속 빈 좌석 위치 + 1 (없으면 0), bytes.translate용
+        self._run_tables: Dict[int, bytes] = {}
+
+    def offset(self, seat: str) -> int:
+        """좌석 번호("12C") -> 비트 오프셋"""
+        row, letter = int(seat[:-1]), seat[-1].upper()
+        if not 0 < row <= len(self.rows) or letter not in self.rows[row - 1]:
+            raise ValueError(f"없는 좌석입니다: {seat}")
+        return (row - 1) * 8 + self.rows[row - 1].index(letter)
+
+    def seat(self, offset: int) -> str:
+        """비트 오프셋 -> 좌석 번호"""
+        row, index = divmod(offset, 8)
+        return f"{row + 1}{self.rows[row][index]}"
+
+    def run_table(self, count: int) -> bytes:
+        table = self._run_tables.get(count)
+        if table is None:
+            starts = []
+            for taken in range(256):
+                free = ~taken & 0xFF
+                run = free
+                for i in range(1, count):
+                    run &= free << i
+                run &= 0xFF
+                # 가장 앞(최상위 비트)에서 시작하는 연속 구간
+                starts.append(8 - run.bit_length() + 1 if run else 0)
+            table = self._run_tables[count] = bytes(starts)
+        return table
+
+    def find_adjacent(self, bitmap: bytes, count: int) -> Optional[List[int]]:
+        """한 열 안에서 처음 나오는 ``count``개 연속 빈 좌석의 오프셋 (통로는 구분하지 않음)"""
+        if not 0 < count <= 8:
+            return None
+        starts = bitmap.translate(self.run_table(count))
+        row = len(starts) - len(starts.lstrip(b"\0"))
+        if row == len(starts):
+            return None
+        first = row * 8 + starts[row] - 1
+        return list(range(first, first + count))
+
+
+# 기본 배치: UI 좌석 배치(ui/components/seat-map.tsx)와 같은 협동체
+# 1-4열 비즈니스 (A-D), 5-24열 이코노미 (A-F)
+DEFAULT_LAYOUT = SeatLayout(["ABCD"] * 4 + ["ABCDEF"] * 20)
+
+
+@dataclass
+class _Flight:
+    """프로세스 로컬 항공편 상태"""
+    bitmap: bytearray
+    # 마지막 변경 + FLIGHT_TTL_SECONDS (지나면 확정 좌석까지 버림)
+    expires_at: float
+    # 오프셋 -> 예약자, 오프셋 -> 홀드 만료 시각 (확정된 좌석은 holds에 없음)
+    owners: Dict[int, str] = field(default_factory=dict)
+    holds: Dict[int, float] = field(default_factory=dict)
+    # (만료 시각, 오프셋) 최소 힙 (연장/해제된 항목은 꺼낼 때 무시)
+    expiry: List[Tuple[float, int]] = field(default_factory=list)
+
+
+class SeatInventory:
+    """항공편별 좌석 재고 (프로세스 로컬 bytearray + 선택적 Redis/SQLite 공유 계층)
+
+    항공편마다 좌석 하나를 비트 하나로 표시한 비트맵을 보관합니다. ``redis``가 설정되면
+    비트맵은 Redis 문자열(BITFIELD)로 관리되고, 확인과 기록을 Lua 스크립트 한 번으로
+    처리하므로 여러 인스턴스가 같은 좌석을 동시에 예약해도 한 명만 성공합니다.
+    ``sqlite``(대화 저장소와 같은 SQLite 파일)가 설정되면 점유 좌석은 ``seat_holds`` 테이블의 행이고,
+    확인과 기록을 ``BEGIN IMMEDIATE`` 트랜잭션 하나로 처리하므로 같은 서버의 워커끼리도 한 명만 성공합니다.
+
+    ``reserve``는 좌석을 ``hold_seconds`` 동안 잡아 두고, ``confirm``으로 확정하지 않으면
+    만료 시 자동으로 풀립니다. 만료 정리는 각 연산 시작 시 함께 처리됩니다.
+
+    항공편 번호는 ``FLIGHT_NUMBER`` 형식만 받으며(아니면 ``ValueError``), 상태는 예약/확정/해제 때만
+    만들고 조회(``occupied``/``available``)는 아무것도 기록하지 않습니다. 예약이 만든 상태는
+    마지막 변경부터 ``flight_ttl_seconds`` 뒤에 사라집니다 (Redis 키 TTL, SQLite/로컬은 만료 시각).
+    """
+
+    def __init__(self, layout: SeatLayout = DEFAULT_LAYOUT, redis_client: Optional[aioredis.Redis] = None,
+                 hold_seconds: float = SEAT_HOLD_SECONDS, flight_ttl_seconds: int = FLIGHT_TTL_SECONDS,
+                 clock: Callable[[], float] = time.time):
+        self.layout = layout
+        self.hold_seconds = hold_seconds
+        self.flight_ttl_seconds = flight_ttl_seconds
+        self._clock = clock
+        self._flights: Dict[str, _Flight] = {}
+        self._scripts = None
+        self.redis = redis_client
+        self.sqlite: Optional[SQLiteConversationStore] = None
+        self.conflicts = 0
+
+    # ---- Redis 계층 ----
+
+    @property
+    def redis(self) -> Optional[aioredis.Redis]:
+        return self._redis
+
+    @redis.setter
+    def redis(self, client: Optional[aioredis.Redis]):
+        self._redis = client
+        self._scripts = None if client is None else {
+            name: client.register_script(source) for name, source in (
+                ("reserve", self._RESERVE_LUA), ("reserve_adjacent", self._RESERVE_ADJACENT_LUA),
+                ("confirm", self._CONFIRM_LUA),
+                ("release", self._RELEASE_LUA), ("snapshot", self._SNAPSHOT_LUA))
+        }
+
+    @staticmethod
+    def _keys(flight: str) -> List[str]:
+        """(비트맵, 예약자 해시, 홀드 만료 정렬 집합)"""
+        return [f"seats:{flight}", f"seats:{flight}:owners", f"seats:{flight}:holds"]
+
+    def _now_ms(self) -> int:
+        return int(self._clock() * 1000)
+
+    # 항공편 키 TTL 갱신 (마지막 변경부터 FLIGHT_TTL_SECONDS, 없는 키는 무시)
+    _EXPIRE_LUA = """
+for _, key in ipairs(KEYS) do
+    redis.call('EXPIRE', key, ARGV[3])
+end
+"""
+
+    # 공통 앞부분: 비트맵이 없으면 빈 배치로 만들고, 만료된 홀드를 풀고, 항공편 키의 TTL을 갱신
+    # KEYS: bitmap, owners, holds / ARGV[1]: now_ms, ARGV[2]: empty bitmap, ARGV[3]: flight ttl seconds
+    _PURGE_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    redis.call('SET', KEYS[1], ARGV[2])
+end
+local expired = redis.call('ZRANGEBYSCORE', KEYS[3], '-inf', ARGV[1])
+if #expired > 0 then
+    local clear = {}
+    for _, offset in ipairs(expired) do
+        table.insert(clear, 'SET')
+        table.insert(clear, 'u1')
+        table.insert(clear, offset)
+        table.insert(clear, 0)
+    end
+    redis.call('BITFIELD', KEYS[1], unpack(clear))
+    redis.call('HDEL', KEYS[2], unpack(expired))
+    redis.call('ZREMRANGEBYSCORE', KEYS[3], '-inf', ARGV[1])
+end
+""" + _EXPIRE_LUA
+
+    # ARGV[4]: hold expiry ms, ARGV[5]: owner, ARGV[6..]: offsets
+    _RESERVE_LUA = _PURGE_LUA + """
+local get, set = {}, {}
+for i = 6, #ARGV do
+    table.insert(get, 'GET'); table.insert(get, 'u1'); table.insert(get, ARGV[i])
+    table.insert(set, 'SET'); table.insert(set, 'u1'); table.insert(set, ARGV[i]); table.insert(set, 1)
+end
+for _, bit in ipairs(redis.call('BITFIELD', KEYS[1], unpack(get))) do
+    if bit == 1 then return 0 end
+end
+redis.call('BITFIELD', KEYS[1], unpack(set))
+for i = 6, #ARGV do
+    redis.call('HSET', KEYS[2], ARGV[i], ARGV[5])
+    redis.call('ZADD', KEYS[3], ARGV[4], ARGV[i])
+end
+-- 예약자/홀드 키는 첫 예약 때 생기므로 기록 뒤에도 TTL을 붙임
+""" + _EXPIRE_LUA + """
+return 1
+"""
+
+    # ARGV[4]: owner, ARGV[5..]: offsets (모두 이 예약자의 유효한 홀드여야 확정)
+    _CONFIRM_LUA = _PURGE_LUA + """
+for i = 5, #ARGV do
+    if redis.call('HGET', KEYS[2], ARGV[i]) ~= ARGV[4] or not redis.call('ZSCORE', KEYS[3], ARGV[i]) then
+        return 0
+    end
+end
+redis.call('ZREM', KEYS[3], unpack(ARGV, 5))
+return 1
+"""
+
+    # ARGV[4]: owner, ARGV[5..]: offsets (이 예약자의 좌석만 해제)
+    _RELEASE_LUA = _PURGE_LUA + """
+local released = 0
+for i = 5, #ARGV do
+    if redis.call('HGET', KEYS[2], ARGV[i]) == ARGV[4] then
+        redis.call('BITFIELD', KEYS[1], 'SET', 'u1', ARGV[i], 0)
+        redis.call('HDEL', KEYS[2], ARGV[i])
+        redis.call('ZREM', KEYS[3], ARGV[i])
+        released = released + 1
+    end
+end
+return released
+"""
+
+    # 서버에서 연속 빈 좌석을 찾아 바로 잡음 (찾기와 잡기 사이에 다른 예약이 끼어들 수 없음)
+    # ARGV[4]: hold expiry ms, ARGV[5]: owner, ARGV[6]: count, ARGV[7]: SeatLayout.run_table(count)
+    _RESERVE_ADJACENT_LUA = _PURGE_LUA + """
+local bitmap, runs, count = redis.call('GET', KEYS[1]), ARGV[7], tonumber(ARGV[6])
+for row = 1, #bitmap do
+    local start = string.byte(runs, string.byte(bitmap, row) + 1)
+    if start > 0 then
+        local offsets, set = {}, {}
+        for i = 0, count - 1 do
+            local offset = (row - 1) * 8 + start - 1 + i
+            table.insert(offsets, offset)
+            table.insert(set, 'SET'); table.insert(set, 'u1'); table.insert(set, offset); table.insert(set, 1)
+            redis.call('HSET', KEYS[2], offset, ARGV[5])
+            redis.call('ZADD', KEYS[3], ARGV[4], offset)
+        end
+        redis.call('BITFIELD', KEYS[1], unpack(set))
+""" + _EXPIRE_LUA + """
+        return offsets
+    end
+end
+return {}
+"""
+
+    # 조회는 아무것도 기록하지 않음: 비트맵이 없으면 빈 배치, 만료된 홀드는 오프셋만 돌려주고 호출 쪽에서 비움
+    _SNAPSHOT_LUA = """
+local bitmap = redis.call('GET', KEYS[1])
+if not bitmap then
+    return {ARGV[2], {}}
+end
+return {bitmap, redis.call('ZRANGEBYSCORE', KEYS[3], '-inf', ARGV[1])}
+"""
+
+    async def _run(self, name: str, flight: str, *args) -> object:
+        return await self._scripts[name](
+            keys=self._keys(flight), args=[self._now_ms(), self.layout.empty, self.flight_ttl_seconds, *args])
+
+    # ---- SQLite 계층 (대화 저장소와 같은 파일, 같은 전용 스레드) ----
+
+    # expires_at이 NULL이면 확정된 좌석, flight_expires_at은 항공편의 마지막 변경 + flight_ttl_seconds
+    _SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS seat_holds (
+    flight TEXT NOT NULL,
+    seat INTEGER NOT NULL,
+    owner TEXT NOT NULL,
+    expires_at REAL,
+    flight_expires_at REAL NOT NULL,
+    PRIMARY KEY (flight, seat)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS seat_holds_expires_at ON seat_holds (expires_at);
+CREATE INDEX IF NOT EXISTS seat_holds_flight_expires_at ON seat_holds (flight_expires_at);
+"""
+    # 만료된 홀드와 지난 항공편 정리 (모든 항공편, 인덱스 범위 삭제)
+    _SQL_PURGE = "DELETE FROM seat_holds WHERE expires_at <= ? OR flight_expires_at <= ?"
+    _SQL_TAKEN = """
+SELECT seat, owner, expires_at FROM seat_holds
+WHERE flight = ? AND (expires_at IS NULL OR expires_at > ?) AND flight_expires_at > ?
+"""
+    _SQL_HOLD = "INSERT INTO seat_holds (flight, seat, owner, expires_at, flight_expires_at) VALUES (?, ?, ?, ?, ?)"
+    _SQL_CONFIRM = "UPDATE seat_holds SET expires_at = NULL WHERE flight = ? AND seat = ?"
+    _SQL_RELEASE = "DELETE FROM seat_holds WHERE flight = ? AND seat = ? AND owner = ?"
+    _SQL_TOUCH = "UPDATE seat_holds SET flight_expires_at = ? WHERE flight = ?"
+
+    @property
+    def sqlite(self) -> Optional[SQLiteConversationStore]:
+        return self._sqlite
+
+    @sqlite.setter
+    def sqlite(self, store: Optional[SQLiteConversationStore]):
+        self._sqlite = store
+        if store is not None:
+            store.add_schema(self._SQLITE_SCHEMA)
+
+    def _sqlite_taken(self, db, flight: str, purge: bool = True) -> Dict[int, Tuple[str, Optional[float]]]:
+        """점유된 좌석 오프셋 -> (예약자, 홀드 만료 시각) (쓰기 트랜잭션이면 만료된 행을 먼저 지움)"""
+        now = self._clock()
+        if purge:
+            db.execute(self._SQL_PURGE, (now, now))
+        return {seat: (owner, expires)
+                for seat, owner, expires in db.execute(self._SQL_TAKEN, (flight, now, now))}
+
+    def _sqlite_touch(self, db, flight: str):
+        db.execute(self._SQL_TOUCH, (self._clock() + self.flight_ttl_seconds, flight))
+
+    def _sqlite_holds(self, db, flight: str, offsets: List[int], owner: str, expires: float):
+        flight_expires = self._clock() + self.flight_ttl_seconds
+        db.executemany(self._SQL_HOLD, [(flight, offset, owner, expires, flight_expires) for offset in offsets])
+        self._sqlite_touch(db, flight)
+
+    def _sqlite_bitmap(self, taken) -> bytes:
+        bitmap = bytearray(self.layout.empty)
+        for offset in taken:
+            bitmap[offset >> 3] |= _SEAT_BITS[offset & 7]
+        return bytes(bitmap)
+
+    def _sqlite_reserve(self, db, flight: str, offsets: List[int], owner: str, expires: float) -> bool:
+        taken = self._sqlite_taken(db, flight)
+        if any(offset in taken for offset in offsets):
+            return False
+        self._sqlite_holds(db, flight, offsets, owner, expires)
+        return True
+
+    def _sqlite_reserve_adjacent(self, db, flight: str, count: int, owner: str,
+                                 expires: float) -> Optional[List[int]]:
+        # 찾기와 잡기를 같은 쓰기 트랜잭션에서 처리 (Redis 스크립트와 같은 원자성)
+        offsets = self.layout.find_adjacent(self._sqlite_bitmap(self._sqlite_taken(db, flight)), count)
+        if offsets is not None:
+            self._sqlite_holds(db, flight, offsets, owner, expires)
+        return offsets
+
+    def _sqlite_confirm(self, db, flight: str, offsets: List[int], owner: str) -> bool:
+        taken = self._sqlite_taken(db, flight)
+        if any(taken.get(offset, (None, None))[0] != owner or taken[offset][1] is None for offset in offsets):
+            return False
+        db.executemany(self._SQL_CONFIRM, [(flight, offset) for offset in offsets])
+        self._sqlite_touch(db, flight)
+        return True
+
+    def _sqlite_release(self, db, flight: str, offsets: List[int], owner: str) -> int:
+        self._sqlite_taken(db, flight)
+        released = db.executemany(self._SQL_RELEASE, [(flight, offset, owner) for offset in offsets]).rowcount
+        self._sqlite_touch(db, flight)
+        return released
+
+    def _sqlite_snapshot(self, db, flight: str) -> bytes:
+        return self._sqlite_bitmap(self._sqlite_taken(db, flight, purge=False))
+
+    # ---- 프로세스 로컬 계층 ----
+
+    def _local(self, flight: str, create: bool = False) -> Optional[_Flight]:
+        """항공편 상태 (만료된 홀드를 풀고, 점유 좌석이 없으면 기록할 때만(``create``) 만듦)"""
+        now = self._clock()
+        state = self._flights.get(flight)
+        if state is not None and state.expires_at <= now:
+            state = None
+        if state is not None:
+            while state.expiry and state.expiry[0][0] <= now:
+                expires, offset = heapq.heappop(state.expiry)
+                if state.holds.get(offset) == expires:
+                    self._clear(state, offset)
+        if state is None or not state.owners:
+            # 빈 항공편은 남겨 두지 않음 (조회만으로 항목이 늘지 않게)
+            self._flights.pop(flight, None)
+            if not create:
+                return None
+            state = self._flights[flight] = _Flight(bytearray(self.layout.empty), now)
+        if create:
+            state.expires_at = now + self.flight_ttl_seconds
+        return state
+
+    @staticmethod
+    def _clear(state: _Flight, offset: int):
+        state.bitmap[offset >> 3] &= ~_SEAT_BITS[offset & 7]
+        state.owners.pop(offset, None)
+        state.holds.pop(offset, None)
+
+    @staticmethod
+    def _flight(flight: str) -> str:
+        """항공편 번호 정규화 (형식이 아니면 상태를 만들기 전에 ``ValueError``)"""
+        number = flight.strip().upper()
+        if not FLIGHT_NUMBER.fullmatch(number):
+            raise ValueError(f"항공편 번호 형식이 아닙니다: {flight}")
+        return number
+
+    # ---- 공개 API ----
+
+    async def reserve(self, flight: str, seats: Sequence[str], owner: str,
+                      hold_seconds: Optional[float] = None) -> bool:
+        """좌석을 모두 잡거나(True) 하나라도 이미 점유되었으면 아무것도 잡지 않음(False)"""
+        return await self._reserve_offsets(self._flight(flight), [self.layout.offset(s) for s in seats], owner,
+                                           hold_seconds)
+
+    async def _reserve_offsets(self, flight: str, offsets: List[int], owner: str,
+                               hold_seconds: Optional[float]) -> bool:
+        expires = self._clock() + (self.hold_seconds if hold_seconds is None else hold_seconds)
+        if self.redis is not None:
+            reserved = bool(await self._run("reserve", flight, int(expires * 1000), owner, *offsets))
+        elif self.sqlite is not None:
+            reserved = await self.sqlite.run_in_transaction(self._sqlite_reserve, flight, offsets, owner, expires)
+        else:
+            state = self._local(flight, create=True)
+            reserved = not any(state.bitmap[o >> 3] & _SEAT_BITS[o & 7] for o in offsets)
+            if reserved:
+                for offset in offsets:
+                    state.bitmap[offset >> 3] |= _SEAT_BITS[offset & 7]
+                    state.owners[offset] = owner
+                    state.holds[offset] = expires
+                    heapq.heappush(state.expiry, (expires, offset))
+        if not reserved:
+            self.conflicts += 1
+        return reserved
+
+    async def reserve_adjacent(self, flight: str, count: int, owner: str,
+                               hold_seconds: Optional[float] = None) -> Optional[List[str]]:
+        """한 열에서 연속된 빈 좌석 ``count``개를 찾아 잡음 (빈 자리가 없으면 None)
+
+        검색은 바이트(열)마다 미리 계산한 표를 조회하는 방식이며, Redis에서는 같은 표를
+        스크립트에 넘겨 서버에서 찾고 잡으므로 동시 예약자끼리 충돌해 재시도하지 않습니다.
+        """
+        flight = self._flight(flight)
+        if not 0 < count <= 8:
+            return None
+        expires = self._clock() + (self.hold_seconds if hold_seconds is None else hold_seconds)
+        if self.redis is not None:
+            offsets = await self._run("reserve_adjacent", flight, int(expires * 1000), owner, count,
+                                      self.layout.run_table(count))
+            offsets = [int(o) for o in offsets] or None
+        elif self.sqlite is not None:
+            offsets = await self.sqlite.run_in_transaction(self._sqlite_reserve_adjacent, flight, count, owner,
+                                                           expires)
+        else:
+            offsets = self.layout.find_adjacent(bytes(self._local(flight, create=True).bitmap), count)
+            if offsets is not None:
+                await self._reserve_offsets(flight, offsets, owner, hold_seconds)
+        return None if offsets is None else [self.layout.seat(o) for o in offsets]
+
+    async def confirm(self, flight: str, seats: Sequence[str], owner: str) -> bool:
+        """``owner``가 잡아 둔 좌석을 확정 (홀드가 만료되지 않는 예약으로 전환)"""
+        flight, offsets = self._flight(flight), [self.layout.offset(s) for s in seats]
+        if self.redis is not None:
+            return bool(await self._run("confirm", flight, owner, *offsets))
+        if self.sqlite is not None:
+            return await self.sqlite.run_in_transaction(self._sqlite_confirm, flight, offsets, owner)
+        state = self._local(flight)
+        if state is None or any(state.owners.get(o) != owner or o not in state.holds for o in offsets):
+            return False
+        for offset in offsets:
+            del state.holds[offset]
+        state.expires_at = self._clock() + self.flight_ttl_seconds
+        return True
+
+    async def release(self, flight: str, seats: Sequence[str], owner: str) -> int:
+        """``owner``의 좌석(홀드 또는 확정)을 풀고 해제한 좌석 수를 반환"""
+        flight, offsets = self._flight(flight), [self.layout.offset(s) for s in seats]
+        if self.redis is not None:
+            return int(await self._run("release", flight, owner, *offsets))
+        if self.sqlite is not None:
+            return await self.sqlite.run_in_transaction(self._sqlite_release, flight, offsets, owner)
+        state = self._local(flight)
+        if state is None:
+            return 0
+        mine = [o for o in offsets if state.owners.get(o) == owner]
+        for offset in mine:
+            self._clear(state, offset)
+        state.expires_at = self._clock() + self.flight_ttl_seconds
+        return len(mine)
+
+    async def _snapshot(self, flight: str) -> bytes:
+        flight = self._flight(flight)
+        if self.redis is not None:
+            bitmap, expired = await self._run("snapshot", flight)
+            bitmap = bytearray(bitmap)
+            for offset in map(int, expired):
+                bitmap[offset >> 3] &= ~_SEAT_BITS[offset & 7]
+            return bytes(bitmap)
+        if self.sqlite is not None:
+            return await self.sqlite.run_in_transaction(self._sqlite_snapshot, flight, mode="DEFERRED")
+        state = self._local(flight)
+        return self.layout.empty if state is None else bytes(state.bitmap)
+
+    async def occupied(self, flight: str) -> List[str]:
+        """점유된(홀드 또는 확정) 좌석 번호 목록"""
+        bitmap = await self._snapshot(flight)
+        return [f"{row + 1}{letter}"
+                for row, letters in enumerate(self.layout.rows)
+                for i, letter in enumerate(letters) if bitmap[row] & _SEAT_BITS[i]]
+
+    async def available(self, flight: str) -> int:
+        """남은 빈 좌석 수"""
+        bitmap = await self._snapshot(flight)
+        return len(bitmap) * 8 - int.from_bytes(bitmap, "big").bit_count()
+
+
+# 프로세스 공용 인스턴스 (Redis/SQLite 저장소를 사용하면 api.py에서 공유 계층을 연결)
+seat_inventory = SeatInventory()
@@ -0,0 +1,115 @@
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from contextvars import ContextVar
+from typing import Optional, Any, Dict
+
+# 로그 형식 (json: 한 줄에 JSON 객체 하나 / text: 사람이 읽는 형식)과 레벨
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+# 전체 실행 결과(RunResult) 덤프를 남길 요청 비율 (0이면 끔, 1이면 모든 요청)
+LOG_RUN_SAMPLE_RATE = float(os.getenv("LOG_RUN_SAMPLE_RATE", "0.01"))
+
+# 현재 요청의 대화 ID (모든 로그 레코드에 자동으로 붙음)
+conversation_id: ContextVar[Optional[str]] = ContextVar("conversation_id", default=None)
+
+# LogRecord 기본 속성 (이 외의 속성은 extra 필드로 출력)
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """LogRecord를 한 줄짜리 JSON으로 변환 (extra 필드 포함, 직렬화 불가 값은 repr)"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=repr)
+
+
+class _ContextFilter(logging.Filter):
+    """Attach the caller's conversation_id before the record leaves the event loop thread."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "conversation_id"):
+            record.conversation_id = conversation_id.get()
+        return True
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """포맷을 리스너 스레드로 미루는 QueueHandler
+
+    기본 QueueHandler는 큐에 넣기 전에 호출한 스레드에서 메시지를 포맷하므로
+    큰 객체의 repr 비용이 이벤트 루프에 남습니다. 여기서는 예외 트레이스백만 미리
+    문자열로 만들고 나머지(메시지 인자, extra 값)는 리스너 스레드에서 포맷합니다.
+    따라서 로그 인자로는 이후 변경되지 않는 객체만 넘겨야 합니다.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 같은 레코드를 받는 다른 핸들러에 영향이 없도록 복사본을 큐에 넣음
+        record = copy.copy(record)
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_handler: Optional[DeferredQueueHandler] = None
+
+
+def configure_logging(stream=None, log_format: str = LOG_FORMAT, level: str = LOG_LEVEL) -> None:
+    """루트 로거에 큐 기반 핸들러를 설치 (여러 번 호출해도 한 번만 설치)
+
+    로그 레코드는 호출 스레드에서 큐에 넣기만 하고, 포맷과 stdout 기록은
+    백그라운드 리스너 스레드가 처리합니다.
+    """
+    global _listener, _handler
+    if _listener is not None:
+        return
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter() if log_format == "json" else logging.Formatter(
+        "%(asctime)s %(levelname)s %(name)s [%(conversation_id)s] %(message)s"))
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    _handler = DeferredQueueHandler(log_queue)
+    _handler.addFilter(_ContextFilter())
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(_handler)
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    # 종료 시 큐에 남은 레코드를 모두 기록
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """핸들러를 제거하고 큐에 남은 레코드를 모두 기록한 뒤 리스너 종료"""
+    global _listener, _handler
+    if _listener is not None:
+        logging.getLogger().removeHandler(_handler)
+        _listener.stop()
+        _listener, _handler = None, None
+
+
+def should_dump_run(rate: Optional[float] = None) -> bool:
+    """이번 요청의 전체 실행 결과를 덤프할지 (LOG_RUN_SAMPLE_RATE 비율로 샘플링)"""
+    rate = LOG_RUN_SAMPLE_RATE if rate is None else rate
+    return rate > 0 and (rate >= 1 or random.random() < rate)
+
@@ -0,0 +1,49 @@
+"""agent_registry.py 테스트"""
+
+import json
+
+import pytest
+from agents import Agent, handoff
+
+from agent_registry import AgentRegistry
+from main import agent_registry, triage_agent, faq_agent, tech_agent
+
+
+def test_registry_follows_handoffs_from_the_root():
+    assert list(agent_registry.agents) == [
+        "트라이에이지 에이전트", "FAQ 에이전트", "자기소개 에이전트",
+        "경력 에이전트", "프로젝트 에이전트", "기술스택 에이전트"]
+    assert agent_registry.get("FAQ 에이전트") is faq_agent
+    assert agent_registry.get("없는 에이전트") is triage_agent
+    with pytest.raises(TypeError):
+        agent_registry.agents["새 에이전트"] = tech_agent
+
+
+def test_catalog_is_serialized_once_with_a_content_version():
+    entry = json.loads(agent_registry.catalog_json)[1]
+    assert entry == agent_registry.catalog[1]
+    assert entry["handoffs"] == ["트라이에이지 에이전트"]
+    assert entry["tools"] == ["faq_lookup_tool"]
+    assert entry["input_guardrails"] == ["Relevance Guardrail", "Jailbreak Guardrail"]
+
+    assert agent_registry.catalog_for(agent_registry.version) is None
+    assert agent_registry.catalog_for(None) == list(agent_registry.catalog)
+    assert agent_registry.matches(f'W/{agent_registry.etag}, "other"')
+    assert not agent_registry.matches('"other"')
+
+    # 같은 그래프면 같은 버전, 그래프가 바뀌면 버전도 바뀜
+    known = list(agent_registry.agents.values())
+    assert AgentRegistry.from_graph(triage_agent, known).version == agent_registry.version
+    extra = Agent(name="추가 에이전트", instructions="")
+    changed = triage_agent.clone(handoffs=[*triage_agent.handoffs, handoff(extra)])
+    assert AgentRegistry.from_graph(changed, [*known, extra]).version != agent_registry.version
+
+
+def test_handoff_targets_come_from_the_declared_agents():
+    """handoff()의 대상은 선언 때 넘긴 에이전트 목록에서 찾고, 목록에 없으면 시작 시 실패해야 함"""
+    extra = Agent(name="추가 에이전트", instructions="")
+    root = Agent(name="루트", instructions="", handoffs=[handoff(extra), tech_agent])
+    registry = AgentRegistry.from_graph(root, agents=[extra])
+    assert registry.get("추가 에이전트") is extra and registry.get("기술스택 에이전트") is tech_agent
+    with pytest.raises(ValueError):
+        AgentRegistry.from_graph(root)
@@ -0,0 +1,575 @@
+"""api.py 엔드포인트 테스트 (모델 호출 없이 Runner를 대역으로 교체)"""
+
+import asyncio
+import json
+
+import pytest
+from agents import GuardrailFunctionOutput, InputGuardrail
+
+import api
+import main
+from main import DeveloperProfileContext, RelevanceOutput
+from conversation_store import (
+    ConversationConflictError,
+    InMemoryConversationStore,
+    RedisConversationStore,
+    SQLiteConversationStore,
+)
+from guardrail_cache import GuardrailVerdictCache
+from profile_store import ProfileChanges, ProfileStore
+from seat_inventory import SeatInventory
+
+
+class FakeRunResult:
+    def __init__(self, input_items):
+        self.new_items = []
+        self._input_items = list(input_items)
+
+    def to_input_list(self):
+        return self._input_items + [
+            {"role": "assistant", "content": f"답변: {self._input_items[-1]['content']}"}]
+
+
+class FakeRunner:
+    """모델 지연을 흉내내고 입력을 그대로 되돌려주는 Runner 대역"""
+
+    calls = 0
+    seen_history = []
+
+    @classmethod
+    async def run(cls, agent, input_items, context=None, run_config=None):
+        cls.calls += 1
+        cls.seen_history.append(len(input_items))
+        await asyncio.sleep(0.01)
+        return FakeRunResult(input_items)
+
+
+async def asgi_request(method, path, body=b"", headers=()):
+    """Call the ASGI app directly (middleware included) and return (status, headers, body)."""
+    scope = {"type": "http", "method": method, "path": path, "raw_path": path.encode(),
+             "query_string": b"", "headers": [(b"content-type", b"application/json"), *headers],
+             "http_version": "1.1", "scheme": "http", "server": ("test", 80), "client": ("test", 1)}
+    messages, sent = [{"type": "http.request", "body": body}], []
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    await api.app(scope, receive, send)
+    start = next(m for m in sent if m["type"] == "http.response.start")
+    body = b"".join(m.get("body", b"") for m in sent if m["type"] == "http.response.body")
+    return start["status"], dict(start["headers"]), body
+
+
+@pytest.fixture
+def fake_runner(monkeypatch):
+    FakeRunner.calls = 0
+    FakeRunner.seen_history = []
+    monkeypatch.setattr(api, "Runner", FakeRunner)
+    # 가드레일도 모델을 호출하므로 제거
+    for agent in (main.triage_agent, main.faq_agent, main.intro_agent,
+                  main.career_agent, main.project_agent, main.tech_agent):
+        monkeypatch.setattr(agent, "input_guardrails", [])
+    return FakeRunner
+
+
+@pytest.mark.parametrize("backend", ["memory", "redis"])
+def test_concurrent_chat_turns_on_one_conversation(backend, fake_runner, fake_redis_factory, monkeypatch):
+    """같은 대화에 동시에 들어온 턴은 직렬화되어 하나도 유실되지 않아야 함"""
+    async def run():
+        if backend == "memory":
+            store = InMemoryConversationStore()
+        else:
+            store = RedisConversationStore(client=fake_redis_factory(0.001))
+        monkeypatch.setattr(api, "conversation_store", store)
+        await asyncio.gather(*(
+            api.chat_endpoint(api.ChatRequest(conversation_id="double-submit", message=f"메시지 {i}"))
+            for i in range(5)))
+        return await store.get("double-submit")
+
+    state = asyncio.run(run())
+    user_messages = [item["content"] for item in state["input_items"]
+                     if item["role"] == "user"]
+    assert sorted(user_messages) == sorted(f"메시지 {i}" for i in range(5))
+    assert len(state["input_items"]) == 10
+    assert fake_runner.calls == 5
+    # 각 턴은 앞선 턴(사용자 + 답변)을 모두 본 상태에서 실행되어야 함
+    assert fake_runner.seen_history == [1, 3, 5, 7, 9]
+
+
+def _store(backend, fake_redis_factory):
+    if backend == "memory":
+        return InMemoryConversationStore()
+    return RedisConversationStore(client=fake_redis_factory(0.001))
+
+
+@pytest.mark.parametrize("backend", ["memory", "redis"])
+def test_idempotent_duplicates_share_one_run(backend, fake_runner, fake_redis_factory, monkeypatch):
+    """같은 idempotency 키의 동시 요청은 진행 중인 실행에 합류해야 함"""
+    async def run():
+        store = _store(backend, fake_redis_factory)
+        monkeypatch.setattr(api, "conversation_store", store)
+        req = api.ChatRequest(conversation_id="dup", message="포트폴리오 피드백 부탁해요", idempotency_key="retry-1")
+        responses = await asyncio.gather(*(api.chat_endpoint(req) for _ in range(4)))
+        return responses, await store.get(responses[0].conversation_id)
+
+    responses, state = asyncio.run(run())
+    assert fake_runner.calls == 1
+    assert all(r == responses[0] for r in responses)
+    assert len(state["input_items"]) == 2
+
+
+@pytest.mark.parametrize("backend", ["memory", "redis"])
+def test_completed_response_is_replayed(backend, fake_runner, fake_redis_factory, monkeypatch):
+    """완료 후 재시도(다른 인스턴스 포함)는 캐시된 응답을 재전송해야 함"""
+    async def run():
+        store = _store(backend, fake_redis_factory)
+        monkeypatch.setattr(api, "conversation_store", store)
+        req = api.ChatRequest(conversation_id="replay", message="포트폴리오 팁", idempotency_key="retry-2")
+        first = await api.chat_endpoint(req)
+        # 다른 인스턴스에서 받은 재시도처럼 진행 중 목록을 비운 상태
+        api._inflight_turns.clear()
+        second = await api.chat_endpoint(req)
+        return first, second, await store.get("replay")
+
+    first, second, state = asyncio.run(run())
+    assert fake_runner.calls == 1
+    assert first == second
+    assert len(state["input_items"]) == 2
+
+
+def test_idempotency_key_is_scoped_to_conversation(fake_runner, monkeypatch):
+    """다른 대화가 같은 키·메시지를 보내도 상대 대화의 응답을 재전송하거나 합류하면 안 됨"""
+    async def run():
+        store = InMemoryConversationStore()
+        monkeypatch.setattr(api, "conversation_store", store)
+        requests = [api.ChatRequest(conversation_id=cid, message="포트폴리오 팁", idempotency_key="shared")
+                    for cid in ("alice", "bob")]
+        concurrent = await asyncio.gather(*(api.chat_endpoint(req) for req in requests))
+        replayed = await api.chat_endpoint(requests[1])
+        return concurrent, replayed, await store.get("alice"), await store.get("bob")
+
+    (alice, bob), replayed, alice_state, bob_state = asyncio.run(run())
+    assert fake_runner.calls == 2
+    assert (alice.conversation_id, bob.conversation_id) == ("alice", "bob")
+    assert replayed == bob
+    assert len(alice_state["input_items"]) == len(bob_state["input_items"]) == 2
+
+
+def test_response_is_not_cached_when_save_conflicts(fake_runner, monkeypatch):
+    """저장이 충돌(409)한 턴의 응답은 캐시되지 않아 재시도가 새로 실행되어야 함"""
+    async def run():
+        store = InMemoryConversationStore()
+        monkeypatch.setattr(api, "conversation_store", store)
+        original_append = store.append
+
+        async def conflicting_append(*args, **kwargs):
+            raise ConversationConflictError("lock lost")
+
+        req = api.ChatRequest(conversation_id="conflict", message="포트폴리오 팁", idempotency_key="retry-4")
+        monkeypatch.setattr(store, "append", conflicting_append)
+        with pytest.raises(api.HTTPException) as exc_info:
+            await api.chat_endpoint(req)
+        cached = await store.get_cached_response(api._idempotency_scope("conflict", "retry-4"))
+        monkeypatch.setattr(store, "append", original_append)
+        await api.chat_endpoint(req)
+        return exc_info.value, cached, await store.get("conflict")
+
+    error, cached, state = asyncio.run(run())
+    assert error.status_code == 409
+    assert cached is None
+    assert fake_runner.calls == 2
+    assert len(state["input_items"]) == 2
+
+
+def test_idempotency_key_reuse_with_different_message_is_rejected(fake_runner, monkeypatch):
+    async def run():
+        monkeypatch.setattr(api, "conversation_store", InMemoryConversationStore())
+        await api.chat_endpoint(api.ChatRequest(conversation_id="reuse", message="첫 메시지",
+                                                idempotency_key="retry-3"))
+        with pytest.raises(api.HTTPException) as exc_info:
+            await api.chat_endpoint(api.ChatRequest(conversation_id="reuse", message="다른 메시지",
+                                                    idempotency_key="retry-3"))
+        return exc_info.value
+
+    assert asyncio.run(run()).status_code == 422
+    assert fake_runner.calls == 1
+
+
+def test_idempotency_key_requires_conversation_id(fake_runner, monkeypatch):
+    """키만 보낸 요청은 거부해야 함 (같은 키를 고른 다른 클라이언트의 대화와 섞이지 않도록)"""
+    async def run():
+        monkeypatch.setattr(api, "conversation_store", InMemoryConversationStore())
+        with pytest.raises(api.HTTPException) as exc_info:
+            await api.chat_endpoint(api.ChatRequest(message="포트폴리오 팁", idempotency_key="1"))
+        return exc_info.value
+
+    assert asyncio.run(run()).status_code == 400
+    assert fake_runner.calls == 0
+
+
+def test_guardrail_tripwire_refuses_without_committing_context(fake_runner, monkeypatch):
+    """트립와이어가 걸린 턴은 거절 메시지만 남기고 가드레일별 소요 시간을 보고해야 함"""
+    async def tripped(context, agent, input):
+        await asyncio.sleep(0.01)
+        return GuardrailFunctionOutput(output_info=RelevanceOutput(
+            reasoning="개발자 프로필과 무관", is_relevant=False), tripwire_triggered=True)
+
+    async def passed(context, agent, input):
+        await asyncio.sleep(0.05)
+        return GuardrailFunctionOutput(output_info=None, tripwire_triggered=False)
+
+    monkeypatch.setattr(api.triage_agent, "input_guardrails", [
+        InputGuardrail(guardrail_function=tripped, name="Relevance Guardrail"),
+        InputGuardrail(guardrail_function=passed, name="Jailbreak Guardrail"),
+    ])
+
+    async def run():
+        store = InMemoryConversationStore()
+        monkeypatch.setattr(api, "conversation_store", store)
+        response = await api.chat_endpoint(api.ChatRequest(conversation_id="off-topic", message="날씨 어때?"))
+        return response, await store.get("off-topic")
+
+    response, state = asyncio.run(run())
+    relevance, jailbreak = response.guardrails
+    assert (relevance.name, relevance.passed, relevance.reasoning) == (
+        "Relevance Guardrail", False, "개발자 프로필과 무관")
+    assert jailbreak.passed
+    assert relevance.duration_ms is not None and relevance.duration_ms < 50
+    assert response.messages[0].content.startswith("Sorry")
+    # 에이전트 실행은 취소되고 대화에는 거절만 남음 (상태는 저장하지 않음)
+    assert state is None
+    assert fake_runner.calls == 1
+
+
+def test_greeting_fast_path_skips_model(fake_runner, monkeypatch):
+    """인사말은 모델 없이 현재 에이전트 이름으로 답하고 기록에 남아야 함"""
+    monkeypatch.setattr(api, "fast_path_stats", {"turns": 0, "greeting": 0, "faq": 0})
+
+    async def run():
+        store = InMemoryConversationStore()
+        monkeypatch.setattr(api, "conversation_store", store)
+        greeting = await api.chat_endpoint(api.ChatRequest(conversation_id="fast", message="안녕하세요!"))
+        await api.chat_endpoint(api.ChatRequest(conversation_id="fast", message="포트폴리오 피드백 부탁해요"))
+        return greeting, await store.get("fast")
+
+    greeting, state = asyncio.run(run())
+    assert fake_runner.calls == 1
+    assert fake_runner.seen_history == [3]  # 인사 턴(사용자 + 답변) 뒤에 실행
+    assert greeting.messages[0].agent == api.triage_agent.name
+    assert greeting.events == []
+    assert state["input_items"][:2] == [
+        {"role": "user", "content": "안녕하세요!"},
+        {"role": "assistant", "content": api.GREETING_REPLY},
+    ]
+    assert api._fast_path_summary()["hit_ratio"] == 0.5
+
+
+def test_exact_faq_hit_is_attributed_to_current_agent(fake_runner, monkeypatch):
+    """FAQ 정확 일치는 핸드오프 없이 현재 에이전트 답변으로 처리하고 가드레일은 로컬 판정으로 보고해야 함"""
+    monkeypatch.setattr(api.triage_agent, "input_guardrails",
+                        [api.relevance_guardrail, api.jailbreak_guardrail])
+    monkeypatch.setattr(api, "conversation_store", InMemoryConversationStore())
+    question = api.get_faq_index().exact_match("기술스택 작성법").question
+
+    response = asyncio.run(api.chat_endpoint(api.ChatRequest(message=question)))
+
+    assert fake_runner.calls == 0
+    assert response.current_agent == api.triage_agent.name
+    assert response.messages[0].agent == api.triage_agent.name
+    assert response.messages[0].content.startswith("기술스택은")
+    assert response.events == []
+    assert [(g.name, g.passed, g.source) for g in response.guardrails] == [
+        ("Relevance Guardrail", True, "local"), ("Jailbreak Guardrail", True, "local")]
+
+
+def test_fast_path_defers_to_model_when_guardrail_is_not_local(fake_runner, monkeypatch):
+    async def model_only(context, agent, input):
+        return GuardrailFunctionOutput(output_info=None, tripwire_triggered=False)
+
+    monkeypatch.setattr(api.triage_agent, "input_guardrails",
+                        [InputGuardrail(guardrail_function=model_only, name="Custom Guardrail")])
+    monkeypatch.setattr(api, "conversation_store", InMemoryConversationStore())
+
+    asyncio.run(api.chat_endpoint(api.ChatRequest(message="안녕하세요")))
+    assert fake_runner.calls == 1
+
+
+@pytest.mark.parametrize("backend", ["memory", "redis"])
+def test_long_conversation_history_stays_bounded(backend, fake_runner, fake_redis_factory, monkeypatch):
+    """오래된 턴은 요약으로 접혀 모델 입력과 저장 크기가 늘어나지 않아야 함"""
+    monkeypatch.setattr(api, "history_policy", api.HistoryPolicy(max_items=8, keep_items=4))
+
+    async def run():
+        store = _store(backend, fake_redis_factory)
+        monkeypatch.setattr(api, "conversation_store", store)
+        for i in range(20):
+            await api.chat_endpoint(api.ChatRequest(conversation_id="long", message=f"경력 {i}번째 질문"))
+        return await store.get("long")
+
+    state = asyncio.run(run())
+    assert max(fake_runner.seen_history) <= 8 + 2
+    assert len(state["input_items"]) <= 9
+    assert state["input_items"][0]["content"].startswith("이전 대화 요약")
+    assert "- 사용자: 경력 0번째 질문" in state["input_items"][0]["content"]
+    assert state["input_items"][-2:] == [
+        {"role": "user", "content": "경력 19번째 질문"},
+        {"role": "assistant", "content": "답변: 경력 19번째 질문"},
+    ]
+
+
+def test_chat_reports_server_timing_and_metrics(fake_runner, monkeypatch):
+    """/chat 응답에 단계별 Server-Timing 헤더가 붙고 /metrics에 턴이 집계되어야 함"""
+    monkeypatch.setattr(api, "conversation_store", InMemoryConversationStore())
+    before = api.metrics.turn_seconds.count(path="model")
+
+    _, headers, _ = asyncio.run(asgi_request("POST", "/chat", '{"message": "포트폴리오 피드백 부탁해요"}'.encode()))
+    phases = [entry.split(";")[0] for entry in headers[b"server-timing"].decode().split(", ")]
+    assert phases[:2] == ["lock", "store_load"]
+    assert {"fast_path", "agent", "extract", "context_diff", "store_save"} <= set(phases)
+    assert phases[-1] == "total"
+
+    _, _, body = asyncio.run(asgi_request("GET", "/metrics"))
+    assert api.metrics.turn_seconds.count(path="model") == before + 1
+    assert b'chat_phase_seconds_count{phase="store_save"}' in body
+
+
+def test_agents_catalog_is_cacheable_and_omitted_when_client_is_current(fake_runner, monkeypatch):
+    """/agents는 ETag로 304를 돌려주고, 최신 버전을 가진 클라이언트에는 /chat이 목록을 생략해야 함"""
+    monkeypatch.setattr(api, "conversation_store", InMemoryConversationStore())
+    status, headers, catalog = asyncio.run(asgi_request("GET", "/agents"))
+    etag = headers[b"etag"]
+    assert status == 200 and json.loads(catalog)[0]["name"] == api.triage_agent.name
+    status, _, body = asyncio.run(asgi_request("GET", "/agents", headers=[(b"if-none-match", etag)]))
+    assert status == 304 and body == b""
+
+    async def run():
+        first = await api.chat_endpoint(api.ChatRequest(message="포트폴리오 피드백 부탁해요"))
+        second = await api.chat_endpoint(api.ChatRequest(
+            conversation_id=first.conversation_id, message="프로젝트도 봐 주세요",
+            agents_version=first.agents_version))
+        return first, second
+
+    first, second = asyncio.run(run())
+    # 버전을 보내지 않는 기존 클라이언트는 항상 전체 목록을 받음
+    assert first.agents == json.loads(catalog)
+    assert etag.decode() == f'"{first.agents_version}"'
+    assert second.agents is None and second.agents_version == first.agents_version
+
+
+def test_client_with_current_context_version_receives_only_changed_keys(fake_runner, monkeypatch):
+    """context_version을 보낸 클라이언트에는 바뀐 키만, 보내지 않은 클라이언트에는 전체 컨텍스트"""
+    monkeypatch.setattr(api, "conversation_store", InMemoryConversationStore())
+
+    class EmailRunner(FakeRunner):
+        @classmethod
+        async def run(cls, agent, input_items, context=None, run_config=None):
+            # 프로필 도구처럼 필요할 때 읽은 뒤 수정
+            await context.load()
+            context.email = f"dev{len(input_items)}@example.com"
+            return FakeRunResult(input_items)
+
+    monkeypatch.setattr(api, "Runner", EmailRunner)
+
+    async def run():
+        first = await api.chat_endpoint(api.ChatRequest(message="이메일 등록해 주세요"))
+        delta = await api.chat_endpoint(api.ChatRequest(
+            conversation_id=first.conversation_id, message="이메일 바꿔 주세요",
+            context_version=first.context_version))
+        stale = await api.chat_endpoint(api.ChatRequest(
+            conversation_id=first.conversation_id, message="한 번 더 바꿔 주세요",
+            context_version=first.context_version))
+        return first, delta, stale
+
+    first, delta, stale = asyncio.run(run())
+    assert first.context["email"] == "dev1@example.com" and first.context_delta is None
+    assert delta.context is None and delta.context_delta == {"email": "dev3@example.com"}
+    assert delta.context_version != first.context_version
+    # 클라이언트의 버전이 서버와 다르면 전체 컨텍스트로 다시 맞춤
+    assert stale.context_delta is None and stale.context["email"] == "dev5@example.com"
+    assert stale.context["github"] == first.context["github"]
+
+
+def test_profile_is_read_only_when_needed(fake_runner, fake_redis_factory, monkeypatch):
+    """프로필을 쓰지 않는 턴은 프로필 저장소를 읽지 않고, 다른 곳의 변경은 도구가 읽을 때 반영"""
+    client = fake_redis_factory(0.0)
+    store = ProfileStore(redis_client=client)
+    monkeypatch.setattr(main, "profile_store", store)
+    monkeypatch.setattr(api, "conversation_store", RedisConversationStore(client=client))
+
+    class ProfileRunner(FakeRunner):
+        @classmethod
+        async def run(cls, agent, input_items, context=None, run_config=None):
+            if "프로필" in input_items[-1]["content"]:
+                await context.load()
+            return FakeRunResult(input_items)
+
+    monkeypatch.setattr(api, "Runner", ProfileRunner)
+
+    async def run():
+        first = await api.chat_endpoint(api.ChatRequest(message="포트폴리오 팁"))
+        loads = store.loads
+        client.calls.clear()
+        quiet = await api.chat_endpoint(api.ChatRequest(
+            conversation_id=first.conversation_id, message="경력 정리 팁", context_version=first.context_version))
+        quiet_round_trips = client.round_trips
+        greeting = await api.chat_endpoint(api.ChatRequest(
+            conversation_id=first.conversation_id, message="안녕하세요", context_version=first.context_version))
+        quiet_loads = store.loads - loads
+        # 대화 상태 밖에서 이 대화의 프로필이 바뀜 (다른 워커, 상태 저장에 실패한 턴 등)
+        await store.apply(first.conversation_id, ProfileChanges(fields={"name": "홍길동"}))
+        changed = await api.chat_endpoint(api.ChatRequest(
+            conversation_id=first.conversation_id, message="프로필 보여줘", context_version=first.context_version))
+        return first, quiet, quiet_round_trips, greeting, quiet_loads, changed
+
+    first, quiet, quiet_round_trips, greeting, quiet_loads, changed = asyncio.run(run())
+    assert quiet_loads == 0
+    # 락, 조회, 기록, 락 해제 + 델타 판단 전 리비전 확인(HGET) 하나 (프로필 본문은 읽지 않음)
+    assert quiet_round_trips == 5 and client.calls.count("hget") >= 1
+    assert quiet.context_delta == {} and greeting.context_delta == {}
+    assert quiet.context_version == greeting.context_version == first.context_version
+    # 버전이 같아도 다른 곳에서 바뀐 프로필은 전체 컨텍스트로 다시 맞춤
+    assert changed.context_delta is None and changed.context["name"] == "홍길동"
+    assert changed.context_version != first.context_version
+
+
+@pytest.mark.parametrize("backend", ["local", "redis"])
+def test_delta_client_sees_profile_changed_outside_the_conversation(backend, fake_runner, fake_redis_factory,
+                                                                    monkeypatch):
+    """프로필을 읽지 않는 턴이라도 저장소의 리비전이 바뀌었으면 빈 델타 대신 전체 컨텍스트를 보내야 함"""
+    client = fake_redis_factory(0.0)
+    store = ProfileStore(redis_client=client if backend == "redis" else None)
+    monkeypatch.setattr(main, "profile_store", store)
+    monkeypatch.setattr(api, "conversation_store", InMemoryConversationStore())
+
+    async def run():
+        first = await api.chat_endpoint(api.ChatRequest(conversation_id="conv-a", message="포트폴리오 팁"))
+        # 다른 대화(또는 워커)가 같은 프로필을 기록
+        other = main.DeveloperProfileContext(user_id="conv-a")
+        await other.load(store)
+        other.name = "홍길동"
+        await other.commit(store)
+        changed = await api.chat_endpoint(api.ChatRequest(
+            conversation_id="conv-a", message="경력 정리 팁", context_version=first.context_version))
+        quiet = await api.chat_endpoint(api.ChatRequest(
+            conversation_id="conv-a", message="기술스택 정리 팁", context_version=changed.context_version))
+        return first, changed, quiet
+
+    first, changed, quiet = asyncio.run(run())
+    assert changed.context_delta is None and changed.context["name"] == "홍길동"
+    assert changed.context_version != first.context_version
+    # 새 버전을 받은 클라이언트는 다시 델타만 받음
+    assert quiet.context_delta == {} and quiet.context_version == changed.context_version
+
+
+def test_profile_changes_are_saved_per_conversation_only_when_guardrails_pass(fake_runner, monkeypatch):
+    """도구의 프로필 변경은 가드레일 통과 후에만 기록되고, 클라이언트가 보낸 user_id로 다른 대화의 프로필을 열 수 없음"""
+    store = ProfileStore()
+    monkeypatch.setattr(main, "profile_store", store)
+    monkeypatch.setattr(api, "conversation_store", InMemoryConversationStore())
+    verdicts = iter([True, False])
+
+    async def relevance(context, agent, input):
+        await asyncio.sleep(0.02)
+        return GuardrailFunctionOutput(output_info=RelevanceOutput(
+            reasoning="", is_relevant=True), tripwire_triggered=next(verdicts))
+
+    class ProjectRunner(FakeRunner):
+        @classmethod
+        async def run(cls, agent, input_items, context=None, run_config=None):
+            profile = await context.load()
+            profile.put_record("projects", f"p{len(input_items)}", {"name": input_items[-1]["content"]})
+            return FakeRunResult(input_items)
+
+    monkeypatch.setattr(api, "Runner", ProjectRunner)
+    monkeypatch.setattr(api.triage_agent, "input_guardrails", [
+        InputGuardrail(guardrail_function=relevance, name="Relevance Guardrail")])
+
+    async def run():
+        refused = await api.chat_endpoint(api.ChatRequest(conversation_id="dev-1", message="거절될 프로젝트"))
+        saved = await api.chat_endpoint(api.ChatRequest(conversation_id="dev-1", message="저장될 프로젝트"))
+        # 요청 본문의 user_id는 받지 않음 (무시되고 새 대화의 프로필을 씀)
+        other = await api.chat_endpoint(api.ChatRequest.model_validate({"message": "안녕하세요", "user_id": "dev-1"}))
+        return refused, saved, other, await store.load("dev-1")
+
+    refused, saved, other, profile = asyncio.run(run())
+    assert refused.messages[0].content.startswith("Sorry") and refused.context["projects"] is None
+    assert saved.context["projects"] == "저장될 프로젝트"
+    assert [e.metadata["changes"] for e in saved.events] == [{"projects": "저장될 프로젝트"}]
+    assert list(profile["projects"].values()) == [{"name": "저장될 프로젝트"}]
+    assert other.conversation_id != saved.conversation_id
+    assert other.context["projects"] is None
+
+
+def test_stored_foreign_user_id_is_rebound_to_the_conversation(fake_runner, monkeypatch):
+    """이전에 요청의 user_id로 만든 대화 상태도 다른 사람의 프로필을 보여주지 않아야 함"""
+    store, conversations = ProfileStore(), InMemoryConversationStore()
+    monkeypatch.setattr(main, "profile_store", store)
+    monkeypatch.setattr(api, "conversation_store", conversations)
+
+    async def run():
+        await store.apply("victim", ProfileChanges(fields={"email": "victim@example.com"}))
+        await conversations.save("legacy", {
+            "input_items": [], "context": DeveloperProfileContext(user_id="victim", profile_revision=1),
+            "current_agent": api.triage_agent.name})
+        response = await api.chat_endpoint(api.ChatRequest(conversation_id="legacy", message="포트폴리오 팁"))
+        return response, await conversations.get("legacy")
+
+    response, state = asyncio.run(run())
+    assert response.context["email"] is None
+    assert state["context"].user_id == "legacy"
+
+
+@pytest.mark.parametrize("backend", ["redis", "sqlite"])
+def test_connect_store_shares_profiles_and_seats(backend, monkeypatch, tmp_path, fake_redis_factory):
+    """공유 저장소(Redis/SQLite)를 쓰면 프로필과 좌석 재고도 워커 간에 공유되어야 함"""
+    profiles, seats = ProfileStore(), SeatInventory()
+    monkeypatch.setattr(api, "profile_store", profiles)
+    monkeypatch.setattr(api, "seat_inventory", seats)
+    monkeypatch.setattr(api, "verdict_cache", GuardrailVerdictCache())
+    if backend == "sqlite":
+        monkeypatch.setenv("CONVERSATION_STORE", "sqlite")
+        monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "shared.db"))
+    else:
+        # L1 캐시 없이 Redis 저장소를 그대로 쓰는 경우
+        client = fake_redis_factory(0.0)
+
+        async def connect(codec=None):
+            return RedisConversationStore(client=client, codec=codec)
+        monkeypatch.setattr(api, "connect_conversation_store", connect)
+
+    store = asyncio.run(api._connect_store())
+    if backend == "sqlite":
+        assert isinstance(store, SQLiteConversationStore)
+        assert profiles.sqlite is store and seats.sqlite is store and api.verdict_cache.redis is None
+        # 같은 파일을 여는 다른 워커가 기록을 봄
+        other = ProfileStore()
+        other.sqlite = SQLiteConversationStore(path=store.path)
+
+        async def run():
+            await profiles.apply("u1", ProfileChanges(fields={"name": "홍길동"}))
+            assert await seats.reserve("KE001", ["1A"], "alice")
+            other_seats = SeatInventory()
+            other_seats.sqlite = other.sqlite
+            return await other.load("u1"), await other_seats.reserve("KE001", ["1A"], "bob")
+
+        try:
+            profile, double_booked = asyncio.run(run())
+        finally:
+            other.sqlite.close()
+            store.close()
+        assert profile["fields"] == {"name": "홍길동"} and not double_booked
+    else:
+        assert profiles.redis is client and seats.redis is client and api.verdict_cache.redis is client
+
+
+def test_flight_seats_rejects_malformed_flight_numbers(monkeypatch):
+    monkeypatch.setattr(api, "seat_inventory", SeatInventory())
+    monkeypatch.setattr(api, "conversation_store", InMemoryConversationStore())
+    status, _, body = asyncio.run(asgi_request("GET", "/flights/" + "x" * 64 + "/seats"))
+    ok, _, seats = asyncio.run(asgi_request("GET", "/flights/KE001/seats"))
+    assert status == 400
+    assert ok == 200 and json.loads(seats)["occupied"] == []
+    assert api.seat_inventory._flights == {}
@@ -0,0 +1,38 @@
+"""콜드 스타트 테스트: api.py import 시간 예산과 지연 초기화"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+# 프로젝트 모듈(api, main 등) import에 허용하는 시간
+# 서드파티 패키지(agents SDK, FastAPI 등) import는 미리 끝낸 뒤 측정하므로 여기에 포함되지 않음
+IMPORT_TIME_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "500"))
+
+PROBE = """
+import json, time
+import agents, agents.extensions.handoff_prompt, dotenv, fastapi, openai, pydantic, redis.asyncio
+started = time.perf_counter()
+import api
+elapsed_ms = (time.perf_counter() - started) * 1000
+print(json.dumps({
+    "import_ms": elapsed_ms,
+    "store_initialized": api.conversation_store.initialized,
+    "faq_loaded": api.get_faq_index.cache_info().currsize > 0,
+}))
+"""
+
+
+def test_api_import_stays_within_budget_and_defers_setup():
+    # 연결을 시도하면 타임아웃까지 멈추는 주소(TEST-NET-3)로 import가 네트워크를 쓰지 않는지 확인
+    env = {**os.environ, "REDIS_URL": "redis://203.0.113.1:6379/0", "LOG_LEVEL": "ERROR"}
+    env.pop("UPSTASH_REDIS_URL", None)
+    completed = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=Path(__file__).parent, env=env,
+        capture_output=True, text=True, timeout=60, check=True)
+    probe = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    assert not probe["store_initialized"] and not probe["faq_loaded"]
+    assert probe["import_ms"] < IMPORT_TIME_BUDGET_MS, (
+        f"api import took {probe['import_ms']:.0f} ms (budget {IMPORT_TIME_BUDGET_MS:.0f} ms)")
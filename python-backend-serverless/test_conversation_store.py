@@ -0,0 +1,608 @@
+"""ConversationStore 단위 테스트"""
+
+import asyncio
+import json
+import sqlite3
+import time
+
+import pytest
+
+from conversation_store import (
+    ConversationBusyError,
+    ConversationConflictError,
+    InMemoryConversationStore,
+    LazyConversationStore,
+    RedisConversationStore,
+    SQLiteConversationStore,
+    StateCodec,
+    TieredConversationStore,
+    connect_conversation_store,
+)
+from main import DeveloperProfileContext
+
+
+def _state(agent: str = "test_agent"):
+    return {
+        "input_items": [{"content": "테스트 메시지", "role": "user"}],
+        "context": {"test": "data"},
+        "current_agent": agent,
+    }
+
+
+def test_in_memory_store_roundtrip():
+    store = InMemoryConversationStore()
+
+    async def run():
+        await store.save("mem-1", _state())
+        loaded = await store.get("mem-1")
+        await store.touch("mem-1")
+        await store.delete("mem-1")
+        return loaded, await store.get("mem-1")
+
+    loaded, deleted = asyncio.run(run())
+    assert loaded["current_agent"] == "test_agent"
+    assert deleted is None
+
+
+def test_in_memory_store_get_isolates_unsaved_changes():
+    """저장하지 않은 턴(거절/실패)의 변경은 저장된 상태와 크기 계산에 반영되지 않아야 함"""
+    store = InMemoryConversationStore()
+
+    async def run():
+        await store.save("mem-2", _state())
+        size = store.stats()["bytes"]
+        loaded = await store.get("mem-2")
+        loaded["input_items"].append({"content": "거절된 메시지", "role": "user"})
+        loaded["context"]["test"] = "changed"
+        return size, await store.get("mem-2")
+
+    size, reloaded = asyncio.run(run())
+    assert reloaded["input_items"] == _state()["input_items"]
+    assert reloaded["context"] == {"test": "data"}
+    assert store.stats()["bytes"] == size
+
+
+def test_redis_store_roundtrip(fake_redis_factory):
+    async def run():
+        store = RedisConversationStore(client=fake_redis_factory())
+        await store.save("redis-1", _state())
+        await store.touch("redis-1")
+        loaded = await store.get("redis-1")
+        await store.delete("redis-1")
+        return loaded, await store.get("redis-1")
+
+    loaded, deleted = asyncio.run(run())
+    assert loaded["input_items"][0]["content"] == "테스트 메시지"
+    assert deleted is None
+
+
+def test_redis_store_does_not_serialize_concurrent_requests(fake_redis_factory):
+    """Redis 왕복이 이벤트 루프를 막지 않으면 동시 요청이 겹쳐서 처리되어야 함"""
+    latency = 0.05
+    concurrency = 20
+
+    async def run():
+        store = RedisConversationStore(client=fake_redis_factory(latency))
+        await asyncio.gather(*(store.save(f"c{i}", _state(f"agent-{i}"))
+                               for i in range(concurrency)))
+        start = time.perf_counter()
+        states = await asyncio.gather(*(store.get(f"c{i}")
+                                        for i in range(concurrency)))
+        return states, time.perf_counter() - start
+
+    states, elapsed = asyncio.run(run())
+    assert [s["current_agent"] for s in states] == [
+        f"agent-{i}" for i in range(concurrency)]
+    # 직렬화되었다면 latency * concurrency (1초) 이상 걸림
+    assert elapsed < latency * concurrency / 4
+
+
+def test_redis_store_turn_costs_one_read_and_one_write(fake_redis_factory):
+    """한 턴(조회 + 저장)은 최대 1회 읽기, 1회 쓰기 왕복만 사용해야 함"""
+    async def run():
+        client = fake_redis_factory()
+        store = RedisConversationStore(client=client)
+        await store.save("turn-1", _state())
+        client.calls.clear()
+
+        state = await store.get("turn-1")
+        new_items = [{"content": "응답", "role": "assistant"}]
+        state["input_items"].extend(new_items)
+        await store.append("turn-1", state, new_items)
+        return client
+
+    client = asyncio.run(run())
+    assert client.round_trips == 2
+    assert client.calls == ["pipeline", "pipeline"]
+
+
+def test_redis_store_get_refreshes_ttl(fake_redis_factory):
+    async def run():
+        client = fake_redis_factory()
+        store = RedisConversationStore(client=client)
+        await store.save("ttl-1", _state())
+        await client.expire("conversation:ttl-1:meta", 10)
+        await client.expire("conversation:ttl-1:items", 10)
+        await store.get("ttl-1")
+        return min(await client.ttl("conversation:ttl-1:meta"),
+                   await client.ttl("conversation:ttl-1:items"))
+
+    assert asyncio.run(run()) > 10
+
+
+def test_redis_store_append_writes_only_new_items(fake_redis_factory, monkeypatch):
+    """append는 전체 기록이 아니라 이번 턴의 항목만 전송해야 함"""
+    serialized = []
+    codec = StateCodec()
+    encode = codec.encode
+    monkeypatch.setattr(codec, "encode",
+                        lambda value: serialized.append(value) or encode(value))
+
+    async def run():
+        client = fake_redis_factory()
+        store = RedisConversationStore(client=client, codec=codec)
+        state = _state()
+        await store.save("log-1", state)
+        serialized.clear()
+        for turn in range(5):
+            new_items = [{"content": f"질문 {turn}", "role": "user"},
+                         {"content": f"답변 {turn}", "role": "assistant"}]
+            state["input_items"].extend(new_items)
+            state["current_agent"] = f"agent-{turn}"
+            await store.append("log-1", state, new_items)
+        return client, await store.get("log-1")
+
+    client, loaded = asyncio.run(run())
+    # 턴마다 새 항목 2개 + 헤더 컨텍스트 1개만 직렬화
+    assert len(serialized) == 5 * 3
+    assert loaded["current_agent"] == "agent-4"
+    assert len(loaded["input_items"]) == 11
+    assert loaded["input_items"][-1] == {"content": "답변 4", "role": "assistant"}
+
+
+def test_state_codec_roundtrips_typed_context():
+    codec = StateCodec(models=[DeveloperProfileContext])
+    context = DeveloperProfileContext(user_id="user-1")
+    decoded = codec.decode(codec.encode({"context": context, "items": [1, 2]}))
+    assert isinstance(decoded["context"], DeveloperProfileContext)
+    assert decoded["context"] == context
+    assert decoded["items"] == [1, 2]
+    # 프로필 본문은 프로필 저장소에 있으므로 대화 상태에는 user_id만 저장
+    profile = DeveloperProfileContext(user_id="user-1", name="홍길동", github="github.com/hong")
+    assert b"github.com/hong" not in codec.encode({"context": profile})
+
+
+def test_state_codec_compresses_large_payloads_only():
+    codec = StateCodec(compress_threshold=256)
+    small = codec.encode({"content": "안녕하세요"})
+    large_value = [{"role": "user", "content": "자기소개서를 작성하고 싶어요. " * 20}] * 20
+    large = codec.encode(large_value)
+    assert small[3] == StateCodec.COMPRESSION_NONE
+    assert large[3] != StateCodec.COMPRESSION_NONE
+    assert len(large) < len(json.dumps(large_value, ensure_ascii=False).encode("utf-8")) / 4
+    assert codec.decode(large) == large_value
+
+
+def test_state_codec_decode_many_mixes_compressed_and_plain():
+    codec = StateCodec(compress_threshold=64)
+    values = [{"content": "짧은 메시지"}, {"content": "긴 메시지 " * 50}]
+    assert codec.decode_many([codec.encode(v) for v in values]) == values
+    assert codec.decode_many([codec.encode(values[0])] * 3) == [values[0]] * 3
+
+
+def test_state_codec_reads_legacy_json():
+    codec = StateCodec()
+    legacy = json.dumps({"role": "user", "content": "안녕"}, ensure_ascii=False)
+    assert codec.decode(legacy) == {"role": "user", "content": "안녕"}
+
+
+def test_redis_store_restores_typed_context(fake_redis_factory):
+    async def run():
+        store = RedisConversationStore(
+            client=fake_redis_factory(),
+            codec=StateCodec(models=[DeveloperProfileContext]))
+        state = _state()
+        state["context"] = DeveloperProfileContext(user_id="user-1")
+        await store.save("typed-1", state)
+        return await store.get("typed-1")
+
+    loaded = asyncio.run(run())
+    assert isinstance(loaded["context"], DeveloperProfileContext)
+    assert loaded["context"].user_id == "user-1"
+    assert loaded["current_agent"] == "test_agent"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_in_memory_store_evicts_least_recently_used():
+    store = InMemoryConversationStore(max_entries=2)
+
+    async def run():
+        await store.save("a", _state("a"))
+        await store.save("b", _state("b"))
+        await store.get("a")  # a를 최근 사용으로 갱신
+        await store.save("c", _state("c"))
+        return [await store.get(cid) for cid in ("a", "b", "c")]
+
+    a, b, c = asyncio.run(run())
+    assert a is not None and c is not None
+    assert b is None
+    assert store.stats()["evictions"] == 1
+
+
+def test_in_memory_store_enforces_byte_budget():
+    item = {"role": "user", "content": "가" * 300}
+    item_bytes = len(StateCodec().encode(item))
+    store = InMemoryConversationStore(max_bytes=item_bytes * 5)
+
+    async def run():
+        for i in range(10):
+            state = _state()
+            state["input_items"] = [item, item]
+            await store.save(f"conv-{i}", state)
+
+    asyncio.run(run())
+    stats = store.stats()
+    assert stats["bytes"] <= item_bytes * 5
+    assert stats["entries"] == 2
+    assert stats["evictions"] == 8
+
+
+def test_in_memory_store_append_accumulates_size():
+    store = InMemoryConversationStore()
+    codec = StateCodec()
+
+    async def run():
+        state = _state()
+        await store.save("grow", state)
+        new_items = [{"role": "assistant", "content": "응답"}]
+        state["input_items"].extend(new_items)
+        await store.append("grow", state, new_items)
+        return state
+
+    state = asyncio.run(run())
+    expected = (sum(len(codec.encode(i)) for i in state["input_items"])
+                + len(codec.encode(state["context"])))
+    assert store.stats()["bytes"] == expected
+
+
+def test_in_memory_store_expires_lazily_and_periodically():
+    clock = FakeClock()
+    store = InMemoryConversationStore(ttl_seconds=100, sweep_interval=50, clock=clock)
+
+    async def run():
+        await store.save("lazy", _state())
+        await store.save("swept", _state())
+        clock.now += 60
+        assert await store.get("lazy") is not None  # 조회 시 TTL 갱신
+        clock.now += 60
+        # swept는 만료, lazy는 갱신되어 살아 있음
+        assert await store.get("lazy") is not None
+        assert "swept" not in store._conversations
+        clock.now += 101
+        assert await store.get("lazy") is None
+
+    asyncio.run(run())
+    stats = store.stats()
+    assert stats["expirations"] == 2
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+
+
+def test_tiered_store_serves_l1_after_version_check(fake_redis_factory):
+    async def run():
+        client = fake_redis_factory()
+        store = TieredConversationStore(RedisConversationStore(client=client))
+        await store.save("tier-1", _state())
+        client.calls.clear()
+        first = await store.get("tier-1")
+        second = await store.get("tier-1")
+        return client, first, second, store.stats()
+
+    client, first, second, stats = asyncio.run(run())
+    assert first == second
+    # backend는 항상 지표 라벨이고 내부 저장소는 inner
+    store = TieredConversationStore(RedisConversationStore(client=client))
+    assert store.backend == "redis" and store.inner.redis is client
+    # 버전 확인용 작은 파이프라인 2회만 사용 (전체 로드 없음)
+    assert client.calls == ["pipeline", "pipeline"]
+    assert stats["l1_hits"] == 2
+    assert stats["l1_misses"] == 0
+    assert stats["l1_hit_rate"] == 1.0
+
+
+def test_tiered_store_never_serves_stale_l1(fake_redis_factory):
+    """다른 인스턴스가 이전 턴을 처리했다면 L1 대신 Redis 상태를 반환해야 함"""
+    async def run():
+        client = fake_redis_factory()
+        worker_a = TieredConversationStore(RedisConversationStore(client=client))
+        worker_b = TieredConversationStore(RedisConversationStore(client=client))
+
+        state = _state()
+        await worker_a.save("tier-2", state)
+        state_b = await worker_b.get("tier-2")
+        new_items = [{"content": "다른 워커의 답변", "role": "assistant"}]
+        state_b["input_items"].extend(new_items)
+        state_b["current_agent"] = "worker-b"
+        await worker_b.append("tier-2", state_b, new_items)
+
+        loaded = await worker_a.get("tier-2")
+        await worker_b.delete("tier-2")
+        gone = await worker_a.get("tier-2")
+        return loaded, gone, worker_a.stats()
+
+    loaded, gone, stats = asyncio.run(run())
+    assert loaded["current_agent"] == "worker-b"
+    assert loaded["input_items"][-1]["content"] == "다른 워커의 답변"
+    assert gone is None
+    assert stats["l1_stale"] == 2
+
+
+def test_tiered_store_isolates_cached_state_from_callers(fake_redis_factory):
+    async def run():
+        store = TieredConversationStore(
+            RedisConversationStore(client=fake_redis_factory()))
+        await store.save("tier-3", _state())
+        state = await store.get("tier-3")
+        # 저장하지 않은 수정(예: 실패한 실행)은 캐시에 반영되면 안 됨
+        state["input_items"].append({"content": "저장 안 됨", "role": "user"})
+        state["context"]["test"] = "changed"
+        return await store.get("tier-3")
+
+    loaded = asyncio.run(run())
+    assert len(loaded["input_items"]) == 1
+    assert loaded["context"] == {"test": "data"}
+
+
+async def _locked_turn(store, conversation_id: str, message: str, seen: list):
+    """락을 잡고 조회 → (모델 실행 대신) 대기 → 저장하는 한 턴"""
+    async with store.lock(conversation_id) as turn_lock:
+        state = await store.get(conversation_id) or dict(_state(), input_items=[])
+        state = dict(state, input_items=list(state["input_items"]))
+        seen.append(len(state["input_items"]))
+        await asyncio.sleep(0.01)
+        new_items = [{"content": message, "role": "user"}]
+        state["input_items"].extend(new_items)
+        await store.append(conversation_id, state, new_items, lock=turn_lock)
+
+
+@pytest.mark.parametrize("backend", ["memory", "redis"])
+def test_concurrent_turns_on_one_conversation_are_serialized(backend, fake_redis_factory):
+    async def run():
+        if backend == "memory":
+            store = InMemoryConversationStore()
+        else:
+            store = RedisConversationStore(client=fake_redis_factory(0.001))
+        await asyncio.gather(*(_locked_turn(store, "race", f"턴 {i}", seen)
+                               for i in range(8)))
+        return await store.get("race")
+
+    seen = []
+    state = asyncio.run(run())
+    contents = [item["content"] for item in state["input_items"]]
+    # 모든 턴이 기록되고, 각 턴은 앞선 턴을 모두 본 상태에서 실행되어야 함
+    assert sorted(contents) == sorted(f"턴 {i}" for i in range(8))
+    assert seen == list(range(8))
+
+
+@pytest.mark.parametrize("backend", ["memory", "redis"])
+def test_lock_wait_timeout_raises_busy(backend, fake_redis_factory):
+    async def run():
+        if backend == "memory":
+            store = InMemoryConversationStore()
+        else:
+            store = RedisConversationStore(client=fake_redis_factory())
+        async with store.lock("busy"):
+            with pytest.raises(ConversationBusyError):
+                async with store.lock("busy", wait_timeout=0.05):
+                    pass
+
+    asyncio.run(run())
+
+
+def test_redis_lock_fencing_rejects_expired_holder(fake_redis_factory):
+    """락이 만료된 뒤 다른 요청이 넘겨받으면 이전 보유자의 기록은 거부되어야 함"""
+    async def run():
+        store = RedisConversationStore(client=fake_redis_factory())
+        await store.save("fenced", _state("original"))
+        async with store.lock("fenced", ttl_seconds=0.05) as stale_lock:
+            await asyncio.sleep(0.1)
+            async with store.lock("fenced", wait_timeout=0.1) as fresh_lock:
+                assert fresh_lock.token > stale_lock.token
+                with pytest.raises(ConversationConflictError):
+                    await store.append("fenced", _state("stale"), [], lock=stale_lock)
+                await store.append("fenced", _state("fresh"), [], lock=fresh_lock)
+        return await store.get("fenced")
+
+    assert asyncio.run(run())["current_agent"] == "fresh"
+
+
+@pytest.mark.parametrize("backend", ["memory", "redis", "sqlite"])
+def test_write_keeps_lock_until_exit(backend, fake_redis_factory, tmp_path):
+    """기록은 락을 풀지 않고, 락은 lock() 블록을 벗어날 때 해제되어야 함"""
+    async def run():
+        if backend == "memory":
+            store = InMemoryConversationStore()
+        elif backend == "redis":
+            store = RedisConversationStore(client=fake_redis_factory())
+        else:
+            store = SQLiteConversationStore(path=str(tmp_path / "lock.db"))
+        async with store.lock("held") as turn_lock:
+            await store.save("held", _state("first"), lock=turn_lock)
+            with pytest.raises(ConversationBusyError):
+                async with store.lock("held", wait_timeout=0.05):
+                    pass
+            await store.append("held", _state("second"), [], lock=turn_lock)
+        async with store.lock("held", wait_timeout=0.05):
+            pass
+        return await store.get("held")
+
+    assert asyncio.run(run())["current_agent"] == "second"
+
+
+def test_lazy_store_connects_once_on_first_use():
+    """지연 저장소는 첫 사용 때 한 번만 초기화하고, 동시에 온 첫 요청들은 같은 초기화를 기다려야 함"""
+    created = []
+
+    async def factory():
+        await asyncio.sleep(0.01)
+        created.append(InMemoryConversationStore())
+        return created[-1]
+
+    store = LazyConversationStore(factory)
+    assert not store.initialized and store.stats() == {"initialized": False}
+
+    async def run():
+        await asyncio.gather(*(store.get(f"lazy-{i}") for i in range(5)))
+        async with store.lock("lazy-1") as lock:
+            await store.save("lazy-1", _state(), lock=lock)
+        return await store.get("lazy-1")
+
+    assert asyncio.run(run())["current_agent"] == "test_agent"
+    assert len(created) == 1 and store.initialized
+    assert store.stats()["entries"] == 1
+
+
+def test_connect_falls_back_to_memory_when_redis_is_unreachable(monkeypatch):
+    monkeypatch.setenv("REDIS_URL", "redis://127.0.0.1:1/0")
+    store = asyncio.run(connect_conversation_store())
+    assert isinstance(store, InMemoryConversationStore)
+
+
+@pytest.fixture
+def sqlite_store(tmp_path):
+    store = SQLiteConversationStore(path=str(tmp_path / "conversations.db"))
+    yield store
+    store.close()
+
+
+def test_sqlite_store_roundtrip_and_append(sqlite_store):
+    async def run():
+        assert await sqlite_store.get("sq-1") is None
+        state = _state()
+        first = await sqlite_store.save("sq-1", state)
+        new_items = [{"content": "두 번째", "role": "user"}]
+        state["input_items"].extend(new_items)
+        second = await sqlite_store.append("sq-1", state, new_items)
+        return first, second, await sqlite_store.get("sq-1")
+
+    first, second, loaded = asyncio.run(run())
+    assert (first, second) == (1, 2)
+    assert [item["content"] for item in loaded["input_items"]] == ["테스트 메시지", "두 번째"]
+    assert loaded["context"] == {"test": "data"} and loaded["current_agent"] == "test_agent"
+    journal_mode = sqlite3.connect(sqlite_store.path).execute("PRAGMA journal_mode").fetchone()[0]
+    assert journal_mode == "wal"
+
+
+def test_sqlite_store_is_shared_between_workers(tmp_path):
+    """같은 파일을 여는 저장소(워커)끼리 대화와 턴 락을 공유해야 함"""
+    path = str(tmp_path / "shared.db")
+    workers = [SQLiteConversationStore(path=path) for _ in range(2)]
+
+    async def run():
+        await asyncio.gather(*(_locked_turn(workers[i % 2], "race", f"턴 {i}", seen) for i in range(8)))
+        async with workers[0].lock("busy"):
+            with pytest.raises(ConversationBusyError):
+                async with workers[1].lock("busy", wait_timeout=0.05):
+                    pass
+        await workers[0].cache_response("retry-1", {"message": "안녕"})
+        return await workers[1].get("race"), await workers[1].get_cached_response("retry-1")
+
+    seen = []
+    try:
+        state, cached = asyncio.run(run())
+    finally:
+        for worker in workers:
+            worker.close()
+    assert sorted(item["content"] for item in state["input_items"]) == sorted(f"턴 {i}" for i in range(8))
+    assert seen == list(range(8))
+    assert cached == {"message": "안녕"}
+
+
+def test_sqlite_lock_fencing_rejects_expired_holder(sqlite_store):
+    async def run():
+        await sqlite_store.save("fenced", _state("original"))
+        async with sqlite_store.lock("fenced", ttl_seconds=0.05) as stale_lock:
+            await asyncio.sleep(0.1)
+            async with sqlite_store.lock("fenced", wait_timeout=0.1) as fresh_lock:
+                assert fresh_lock.token > stale_lock.token
+                with pytest.raises(ConversationConflictError):
+                    await sqlite_store.append("fenced", _state("stale"), [], lock=stale_lock)
+                await sqlite_store.append("fenced", _state("fresh"), [], lock=fresh_lock)
+        return await sqlite_store.get("fenced")
+
+    assert asyncio.run(run())["current_agent"] == "fresh"
+
+
+def test_sqlite_store_expires_and_sweeps_in_batches(tmp_path):
+    now = [1_000.0]
+    store = SQLiteConversationStore(path=str(tmp_path / "ttl.db"), ttl_seconds=60,
+                                    sweep_interval=10, sweep_batch=2, clock=lambda: now[0])
+
+    async def run():
+        for i in range(5):
+            await store.save(f"old-{i}", _state())
+        now[0] += 30
+        await store.save("fresh", _state())
+        # 기록하면 TTL이 갱신되어 만료되지 않음 (조회는 TTL을 바꾸지 않음)
+        assert await store.get("old-1") is not None
+        await store.append("old-0", _state(), [])
+        now[0] += 45
+        assert await store.get("old-1") is None
+        # 정리는 기록 때 실행
+        await store.append("fresh", _state(), [])
+        return await store.get("old-0"), await store.get("fresh")
+
+    try:
+        old, fresh = asyncio.run(run())
+        db = sqlite3.connect(store.path)
+        remaining = sorted(row[0] for row in db.execute("SELECT id FROM conversations"))
+        orphans = db.execute("SELECT COUNT(*) FROM conversation_items WHERE conversation_id LIKE 'old-%' "
+                             "AND conversation_id != 'old-0'").fetchone()[0]
+    finally:
+        store.close()
+    assert old is not None and fresh is not None
+    # 만료된 4개는 2개씩 나눠 항목과 함께 삭제
+    assert remaining == ["fresh", "old-0"] and orphans == 0
+    assert store.stats()["expirations"] == 4
+
+
+def test_sqlite_reads_do_not_take_the_write_lock(tmp_path):
+    """다른 워커가 쓰기 트랜잭션을 잡고 있어도 조회는 막히지 않고, 기록/락은 409(Busy)로 끝나야 함"""
+    store = SQLiteConversationStore(path=str(tmp_path / "busy.db"), busy_timeout=0.05)
+    asyncio.run(store.save("busy", _state("before")))
+    writer = sqlite3.connect(store.path, isolation_level=None)
+    writer.execute("BEGIN IMMEDIATE")
+
+    async def run():
+        state = await store.get("busy")
+        with pytest.raises(ConversationBusyError):
+            await store.append("busy", _state("blocked"), [])
+        with pytest.raises(ConversationBusyError):
+            async with store.lock("busy", wait_timeout=0.1):
+                pass
+        return state
+
+    try:
+        state = asyncio.run(run())
+    finally:
+        writer.execute("ROLLBACK")
+        writer.close()
+        store.close()
+    assert state["current_agent"] == "before"
+
+
+def test_connect_selects_sqlite_store_by_env(monkeypatch, tmp_path):
+    monkeypatch.setenv("CONVERSATION_STORE", "sqlite")
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "env.db"))
+    store = asyncio.run(connect_conversation_store())
+    try:
+        assert isinstance(store, SQLiteConversationStore) and store.path.endswith("env.db")
+    finally:
+        store.close()
@@ -0,0 +1,88 @@
+"""fake_model.py 테스트"""
+
+import asyncio
+
+from agents import Runner, RunConfig, HandoffCallItem, ToolCallItem, MessageOutputItem
+
+import api
+import main
+from conversation_store import InMemoryConversationStore
+from fake_model import FakeModel, FakeModelProvider, ScriptRule, create_run_config
+
+
+def fake_config(**kwargs):
+    model = FakeModel(latency=0, token_latency=0, **kwargs)
+    return model, RunConfig(model_provider=FakeModelProvider(model), tracing_disabled=True)
+
+
+def test_scripted_handoff_then_tool_call_then_reply(monkeypatch):
+    model, config = fake_config(reply_tokens=4)
+    # 로컬에서 판정되지 않는 입력이므로 가드레일 판정도 같은 가짜 모델로
+    monkeypatch.setattr(main, "run_config", config)
+
+    async def run():
+        return await Runner.run(main.triage_agent, [{"role": "user", "content": "프로젝트를 추가해 주세요"}],
+                                context=main.create_initial_context(), run_config=config)
+
+    result = asyncio.run(run())
+    assert [type(item) for item in result.new_items if isinstance(
+        item, (HandoffCallItem, ToolCallItem, MessageOutputItem))] == [HandoffCallItem, ToolCallItem, MessageOutputItem]
+    assert result.last_agent is main.project_agent
+    assert len(result.final_output.split()) == 4
+    # 핸드오프, 도구 호출, 답변 (가드레일 판정도 같은 가짜 모델을 사용할 수 있음)
+    assert model.calls >= 3
+
+
+def test_unmatched_message_is_answered_directly():
+    _, config = fake_config(script=[ScriptRule(r"없는 패턴", handoff="프로젝트 에이전트")])
+
+    async def run():
+        return await Runner.run(main.triage_agent.clone(input_guardrails=[]), "포트폴리오 피드백 부탁해요",
+                                run_config=config)
+
+    result = asyncio.run(run())
+    assert result.last_agent.name == main.triage_agent.name
+    assert [type(item) for item in result.new_items] == [MessageOutputItem]
+
+
+def test_streams_reply_token_by_token():
+    _, config = fake_config(reply_tokens=6)
+
+    async def run():
+        result = Runner.run_streamed(main.career_agent.clone(input_guardrails=[]), "경력 정리",
+                                     context=main.create_initial_context(), run_config=config)
+        deltas = [event.data.delta async for event in result.stream_events()
+                  if event.type == "raw_response_event"
+                  and event.data.type == "response.output_text.delta"]
+        return deltas, result.final_output
+
+    deltas, final = asyncio.run(run())
+    assert len(deltas) == 6
+    assert "".join(deltas) == final
+
+
+def test_structured_output_passes_guardrails():
+    _, config = fake_config()
+
+    async def run():
+        return await Runner.run(main.jailbreak_guardrail_agent, "아무 메시지", run_config=config)
+
+    verdict = asyncio.run(run()).final_output_as(main.JailbreakOutput)
+    assert verdict.is_safe is True
+
+
+def test_chat_endpoint_runs_end_to_end_without_openai(monkeypatch):
+    _, config = fake_config()
+    monkeypatch.setattr(api, "run_config", config)
+    monkeypatch.setattr(main, "run_config", config)
+    monkeypatch.setattr(api, "conversation_store", InMemoryConversationStore())
+
+    response = asyncio.run(api.chat_endpoint(api.ChatRequest(message="기술스택을 정리하고 싶어요")))
+    assert response.messages and response.messages[-1].agent == main.tech_agent.name
+    assert all(check.passed for check in response.guardrails)
+
+
+def test_run_config_from_provider_name():
+    assert create_run_config("openai") is None
+    config = create_run_config("fake")
+    assert isinstance(config.model_provider.get_model("gpt-4.1"), FakeModel)
@@ -0,0 +1,97 @@
+"""faq_index.py 테스트"""
+
+import json
+import os
+
+import pytest
+
+import faq_index
+from faq_index import FaqIndex, load_faq_index, tokenize, FAQ_DATA_PATH
+
+
+@pytest.fixture(scope="module")
+def index():
+    return load_faq_index(cache_path="")
+
+
+def test_tokenize_uses_hangul_bigrams_and_words():
+    assert tokenize("포트폴리오에는 GitHub!") == ["포트", "트폴", "폴리", "리오", "오에", "에는", "github"]
+    assert tokenize("네") == ["네"]
+
+
+@pytest.mark.parametrize("query, expected_id", [
+    ("GitHub 어떻게 관리해요?", "github"),
+    ("포트폴리오에 뭐 넣어요", "portfolio"),
+    ("기술스택 작성", "tech-stack"),
+    ("경력 없는 신입인데 뭘 써요", "newcomer"),
+    ("README", "readme"),
+])
+def test_search_ranks_relevant_entry_first(index, query, expected_id):
+    assert index.search(query)[0].entry.id == expected_id
+
+
+def test_answer_prefers_exact_match_and_rejects_unrelated(index):
+    assert index.exact_match(" 포트폴리오 구성! ").id == "portfolio"
+    assert index.answer("기술스택 작성법") == index.exact_match("기술스택 작성법").answer
+    assert index.answer("오늘 날씨 어때?") is None
+    assert index.search("") == []
+
+
+def test_cached_index_is_reused_until_data_changes(tmp_path):
+    data_path = tmp_path / "faq.json"
+    cache_path = tmp_path / "faq_index.json"
+    with open(FAQ_DATA_PATH, encoding="utf-8") as f:
+        records = json.load(f)
+    data_path.write_text(json.dumps(records[:3], ensure_ascii=False), encoding="utf-8")
+
+    built = load_faq_index(str(data_path), str(cache_path))
+    assert cache_path.exists() and len(built) == 3
+    mtime = os.path.getmtime(cache_path)
+
+    reloaded = load_faq_index(str(data_path), str(cache_path))
+    assert reloaded.source_digest == built.source_digest
+    assert os.path.getmtime(cache_path) == mtime
+    assert reloaded.answer("GitHub 관리") == built.answer("GitHub 관리")
+
+    # 데이터가 바뀌면 캐시를 무시하고 다시 빌드
+    data_path.write_text(json.dumps(records, ensure_ascii=False), encoding="utf-8")
+    rebuilt = load_faq_index(str(data_path), str(cache_path))
+    assert len(rebuilt) == len(records)
+
+
+def test_cache_is_json_and_validated_before_use(tmp_path):
+    """캐시는 코드 실행 없이 읽는 JSON이며, 헤더/본문 해시가 맞지 않으면 버리고 다시 빌드해야 함"""
+    data_path = tmp_path / "faq.json"
+    cache_path = tmp_path / "faq_index.json"
+    with open(FAQ_DATA_PATH, encoding="utf-8") as f:
+        data_path.write_text(json.dumps(json.load(f)[:3], ensure_ascii=False), encoding="utf-8")
+    built = load_faq_index(str(data_path), str(cache_path))
+
+    header, body = cache_path.read_bytes().split(b"\n", 1)
+    assert json.loads(header)["source_digest"] == built.source_digest
+    assert len(json.loads(body)["entries"]) == 3
+    assert oct(os.stat(cache_path).st_mode & 0o777) == oct(0o600)
+
+    # 본문이 변조되면 해시가 맞지 않으므로 역직렬화하지 않고 다시 빌드
+    cache_path.write_bytes(header + b"\n" + body.replace("포트폴리오".encode(), "변조".encode()))
+    rebuilt = load_faq_index(str(data_path), str(cache_path))
+    assert rebuilt.answer("GitHub 관리") == built.answer("GitHub 관리")
+    # pickle 등 다른 형식의 파일은 헤더에서 거부
+    cache_path.write_bytes(b"\x80\x05not-json")
+    assert len(load_faq_index(str(data_path), str(cache_path))) == 3
+
+
+def test_default_cache_dir_is_private(tmp_path, monkeypatch):
+    monkeypatch.setattr(faq_index.tempfile, "gettempdir", lambda: str(tmp_path))
+    path = faq_index.default_cache_path()
+    assert path is not None and os.path.dirname(path).startswith(str(tmp_path))
+    assert os.stat(os.path.dirname(path)).st_mode & 0o777 == 0o700
+
+    # 다른 사용자도 쓸 수 있는 디렉터리면 사용하지 않음
+    os.chmod(os.path.dirname(path), 0o777)
+    assert faq_index.default_cache_path() is None
+
+
+def test_build_handles_empty_records():
+    empty = FaqIndex.build([])
+    assert empty.search("포트폴리오") == [] and empty.answer("포트폴리오") is None
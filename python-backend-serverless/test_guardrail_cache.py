@@ -0,0 +1,100 @@
+"""guardrail_cache.py 테스트"""
+
+import asyncio
+
+from agents import Agent, RunContextWrapper
+
+import main
+from guardrail_cache import GuardrailVerdictCache
+from main import RelevanceOutput
+
+VERDICT = {"reasoning": "개발자 프로필과 무관", "is_relevant": False}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_normalized_inputs_share_a_key():
+    key = GuardrailVerdictCache.key
+    assert key("Relevance Guardrail", "Thank  you!") == key("Relevance Guardrail", " thank you! ")
+    assert key("Relevance Guardrail", "감사합니다") != key("Jailbreak Guardrail", "감사합니다")
+    # 최신 사용자 메시지만 키에 반영
+    history = [{"role": "user", "content": "이전 질문"}, {"role": "assistant", "content": "답"},
+               {"role": "user", "content": "감사합니다"}]
+    assert key("Relevance Guardrail", history) == key("Relevance Guardrail", "감사합니다")
+    assert key("Relevance Guardrail", "가" * 600) is None
+
+
+def test_punctuation_is_part_of_the_key():
+    """문장부호만 다른 주입 시도와 무해한 문장이 같은 판정을 공유하면 안 됨"""
+    key = GuardrailVerdictCache.key
+    assert key("Jailbreak Guardrail", "1' OR '1'='1") != key("Jailbreak Guardrail", "1 or 1=1")
+    assert key("Jailbreak Guardrail", "select * from users; --") != key("Jailbreak Guardrail", "select from users")
+    assert key("Jailbreak Guardrail", "감사합니다!") != key("Jailbreak Guardrail", "감사합니다")
+
+
+def test_local_lru_and_ttl():
+    clock = FakeClock()
+    cache = GuardrailVerdictCache(max_entries=2, ttl_seconds=60, clock=clock)
+
+    async def run():
+        await cache.set("g", "하나", VERDICT)
+        await cache.set("g", "둘", VERDICT)
+        assert await cache.get("g", "하나") == VERDICT
+        await cache.set("g", "셋", VERDICT)  # 가장 오래 안 쓴 "둘" 제거
+        assert await cache.get("g", "둘") is None
+        clock.now += 61
+        assert await cache.get("g", "하나") is None
+
+    asyncio.run(run())
+    stats = cache.stats()
+    assert (stats["local_hits"], stats["misses"], stats["entries"]) == (1, 2, 1)
+
+
+def test_redis_tier_is_shared_between_instances(fake_redis_factory):
+    redis_client = fake_redis_factory(0)
+    first = GuardrailVerdictCache(redis_client=redis_client, ttl_seconds=60)
+    second = GuardrailVerdictCache(redis_client=redis_client, ttl_seconds=60)
+
+    async def run():
+        await first.set("Relevance Guardrail", "오늘  점심 뭐 먹지?", VERDICT)
+        hit = await second.get("Relevance Guardrail", "오늘 점심 뭐 먹지?")
+        again = await second.get("Relevance Guardrail", "오늘 점심 뭐 먹지?")
+        ttl = await redis_client.ttl(first.key("Relevance Guardrail", "오늘 점심 뭐 먹지?"))
+        return hit, again, ttl
+
+    hit, again, ttl = asyncio.run(run())
+    assert hit == again == VERDICT
+    assert 0 < ttl <= 60
+    assert (second.redis_hits, second.local_hits) == (1, 1)
+
+
+def test_repeated_input_skips_guardrail_model(monkeypatch):
+    class CountingRunner:
+        calls = 0
+
+        @classmethod
+        async def run(cls, agent, input, context=None, run_config=None):
+            cls.calls += 1
+            return type("Result", (), {
+                "final_output_as": lambda self, cls_: RelevanceOutput(**VERDICT)})()
+
+    monkeypatch.setattr(main, "Runner", CountingRunner)
+    monkeypatch.setattr(main, "verdict_cache", GuardrailVerdictCache())
+    agent = Agent(name="테스트")
+    wrapper = RunContextWrapper(context=None)
+
+    async def run():
+        first = await main.relevance_guardrail.run(agent, "오늘 점심 뭐 먹지?", wrapper)
+        second = await main.relevance_guardrail.run(agent, " 오늘 점심  뭐 먹지?", wrapper)
+        return first.output, second.output
+
+    first, second = asyncio.run(run())
+    assert CountingRunner.calls == 1
+    assert (first.source, second.source) == ("model", "cache")
+    assert second.tripwire_triggered and second.output_info == RelevanceOutput(**VERDICT)
@@ -0,0 +1,97 @@
+"""guardrail_runner.py 테스트 (모델 호출 없이 가드레일/에이전트를 대역으로 교체)"""
+
+import asyncio
+import time
+
+from agents import Agent, GuardrailFunctionOutput, InputGuardrail
+
+from guardrail_runner import run_guarded
+from main import DeveloperProfileContext, JailbreakOutput
+
+
+def fake_guardrail(name, delay, trip=False):
+    async def check(context, agent, input):
+        await asyncio.sleep(delay)
+        return GuardrailFunctionOutput(
+            output_info=JailbreakOutput(reasoning=f"{name} 판정", is_safe=not trip),
+            tripwire_triggered=trip)
+    return InputGuardrail(guardrail_function=check, name=name)
+
+
+class FakeAgentRun:
+    """모델 지연 후 컨텍스트를 바꾸는 Runner.run 대역"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.started = []
+        self.cancelled = False
+        self.finished = False
+
+    async def __call__(self, agent, input_items, context=None):
+        self.started.append(agent)
+        try:
+            context.name = "홍길동"
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        self.finished = True
+        return "에이전트 결과"
+
+
+def _agent(*guardrails):
+    return Agent(name="테스트 에이전트", input_guardrails=list(guardrails))
+
+
+def test_guardrails_run_concurrently_with_agent():
+    """가드레일과 에이전트는 동시에 실행되어 전체 시간이 합이 아닌 최댓값이어야 함"""
+    run = FakeAgentRun(0.2)
+    agent = _agent(fake_guardrail("relevance", 0.2), fake_guardrail("jailbreak", 0.2))
+    context = DeveloperProfileContext()
+
+    started = time.perf_counter()
+    guarded = asyncio.run(run_guarded(agent, [{"role": "user", "content": "안녕"}], context, run=run))
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 0.45
+    assert guarded.result == "에이전트 결과"
+    assert guarded.tripped is None
+    # SDK가 가드레일을 다시 실행하지 않도록 가드레일 없는 복제본으로 실행
+    assert run.started[0].input_guardrails == []
+    # 에이전트의 변경은 사본에만 적용되고 통과 후 반환됨
+    assert guarded.context.name == "홍길동"
+    assert context.name is None
+    assert [o.guardrail.name for o in guarded.outcomes] == ["relevance", "jailbreak"]
+    assert all(o.duration_ms >= 150 for o in guarded.outcomes)
+
+
+def test_tripwire_cancels_agent_run():
+    """트립와이어가 걸리면 에이전트 실행과 남은 가드레일을 즉시 취소해야 함"""
+    run = FakeAgentRun(1.0)
+    agent = _agent(fake_guardrail("relevance", 1.0), fake_guardrail("jailbreak", 0.02, trip=True))
+    context = DeveloperProfileContext()
+
+    started = time.perf_counter()
+    guarded = asyncio.run(run_guarded(agent, [{"role": "user", "content": "drop table"}], context, run=run))
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 0.5
+    assert run.cancelled and not run.finished
+    assert guarded.result is None
+    assert guarded.context is context and context.name is None
+    relevance, jailbreak = guarded.outcomes
+    assert guarded.tripped is jailbreak
+    assert jailbreak.reasoning == "jailbreak 판정"
+    assert relevance.output is None and not relevance.tripped
+
+
+def test_sdk_mode_delegates_to_runner():
+    run = FakeAgentRun(0.01)
+    agent = _agent(fake_guardrail("relevance", 0.01))
+    context = DeveloperProfileContext()
+
+    guarded = asyncio.run(run_guarded(agent, [], context, run=run, mode="sdk"))
+
+    assert run.started == [agent]
+    assert guarded.context is context and context.name == "홍길동"
+    assert [o.tripped for o in guarded.outcomes] == [False]
@@ -0,0 +1,79 @@
+"""history_policy.py 테스트"""
+
+from history_policy import HistoryPolicy, is_summary, is_handoff_call
+
+
+def user(text):
+    return {"role": "user", "content": text}
+
+
+def answer(text):
+    return {"id": f"msg_{text}", "type": "message", "role": "assistant", "status": "completed",
+            "content": [{"type": "output_text", "text": text, "annotations": []}]}
+
+
+def tool_turn(n, name="update_profile", handoff=False):
+    call_name = "transfer_to_faq_agent" if handoff else name
+    return [
+        user(f"질문 {n}"),
+        {"type": "function_call", "name": call_name, "call_id": f"call_{n}", "arguments": "{}"},
+        {"type": "function_call_output", "call_id": f"call_{n}",
+         "output": '{"assistant": "FAQ 에이전트"}' if handoff else "프로필 정보가 업데이트되었습니다."},
+        answer(f"답변 {n}"),
+    ]
+
+
+def test_short_history_is_unchanged():
+    items = [user("안녕"), answer("안녕하세요")]
+    compacted = HistoryPolicy(max_items=4, keep_items=2).compact(items)
+    assert compacted.items is items and not compacted.folded
+
+
+def test_folds_older_turns_into_summary_at_turn_boundary():
+    items = [item for n in range(4) for item in tool_turn(n)]  # 16 항목
+    compacted = HistoryPolicy(max_items=10, keep_items=5).compact(items)
+
+    assert compacted.folded
+    summary, *window = compacted.items
+    assert is_summary(summary)
+    assert "- 사용자: 질문 0" in summary["content"]
+    assert "- 도구 update_profile({})" in summary["content"]
+    # 창은 사용자 메시지로 시작하고 도구 호출/결과 쌍이 갈라지지 않음
+    assert window == tool_turn(3)
+
+
+def test_no_orphan_tool_outputs_after_folding():
+    items = [item for n in range(6) for item in tool_turn(n)]
+    for keep in range(1, 12):
+        compacted = HistoryPolicy(max_items=12, keep_items=keep).compact(items)
+        calls = {i["call_id"] for i in compacted.items if i.get("type") == "function_call"}
+        outputs = {i["call_id"] for i in compacted.items if i.get("type") == "function_call_output"}
+        assert calls == outputs
+
+
+def test_latest_handoff_chain_is_kept_verbatim():
+    items = tool_turn(0, handoff=True) + tool_turn(1, handoff=True) + [
+        item for n in range(2, 6) for item in [user(f"질문 {n}"), answer(f"답변 {n}")]]
+    compacted = HistoryPolicy(max_items=8, keep_items=2).compact(items)
+
+    kept_handoffs = [i for i in compacted.items if is_handoff_call(i)]
+    assert [i["call_id"] for i in kept_handoffs] == ["call_1"]
+    assert {"type": "function_call_output", "call_id": "call_1",
+            "output": '{"assistant": "FAQ 에이전트"}'} in compacted.items
+    # 이전 체인은 요약으로 접힘
+    assert "(에이전트 전환)" in compacted.items[0]["content"]
+
+
+def test_summary_is_incremental_and_bounded():
+    policy = HistoryPolicy(max_items=6, keep_items=2, summary_max_chars=120)
+    items = []
+    for n in range(40):
+        items = policy.compact(items + [user(f"질문 {n}"), answer(f"답변 {n}")]).items
+        assert len(items) <= 7
+        assert len(items[0]["content"]) <= 120 + len("이전 대화 요약 (이전 999줄 생략)\n")
+
+    summary = items[0]["content"]
+    assert summary.startswith("이전 대화 요약 (이전 ")
+    # 가장 최근에 접힌 턴이 요약 끝에 이어짐
+    first_kept = int(items[1]["content"].split()[-1])
+    assert summary.split("\n")[-1] == f"- 답변: 답변 {first_kept - 1}"
@@ -0,0 +1,81 @@
+"""metrics.py 테스트"""
+
+import asyncio
+
+from conversation_store import RedisConversationStore, SQLiteConversationStore
+import metrics
+
+
+def test_prometheus_text_format():
+    registry = metrics.MetricsRegistry()
+    counter = registry.counter("demo_total", "Demo counter")
+    histogram = registry.histogram("demo_seconds", "Demo histogram", buckets=(0.1, 1.0))
+    counter.inc(agent='FAQ "에이전트"')
+    counter.inc(2, agent='FAQ "에이전트"')
+    for value in (0.05, 0.5, 3.0):
+        histogram.observe(value, phase="agent")
+
+    lines = registry.render().splitlines()
+    assert "# TYPE demo_total counter" in lines
+    assert 'demo_total{agent="FAQ \\"에이전트\\""} 3' in lines
+    # 버킷은 누적, +Inf 버킷은 전체 개수
+    assert 'demo_seconds_bucket{phase="agent",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{phase="agent",le="1"} 2' in lines
+    assert 'demo_seconds_bucket{phase="agent",le="+Inf"} 3' in lines
+    assert 'demo_seconds_sum{phase="agent"} 3.55' in lines
+    assert 'demo_seconds_count{phase="agent"} 3' in lines
+
+
+def test_phases_accumulate_into_current_request_timings():
+    timings = metrics.TurnTimings()
+    token = metrics.current_timings.set(timings)
+    try:
+        before = metrics.phase_seconds.count(phase="store_load")
+        for _ in range(2):
+            with metrics.phase("store_load"):
+                pass
+        metrics.record_phase("agent", 0.25)
+    finally:
+        metrics.current_timings.reset(token)
+
+    assert metrics.phase_seconds.count(phase="store_load") == before + 2
+    header = timings.server_timing()
+    assert header.startswith("store_load;dur=")
+    assert "agent;dur=250.0" in header and "total;dur=" in header
+
+
+def test_redis_store_records_round_trips_and_bytes(fake_redis_factory):
+    store = RedisConversationStore(client=fake_redis_factory(0.0))
+    state = {"input_items": [{"role": "user", "content": "안녕"}], "context": {}, "current_agent": "트라이에이지 에이전트"}
+    writes = metrics.store_bytes.count(op="write")
+    reads = metrics.store_bytes.count(op="read")
+    timings = metrics.TurnTimings()
+
+    async def run():
+        metrics.current_timings.set(timings)
+        async with store.lock("metrics") as lock:
+            await store.save("metrics", state, lock=lock)
+        return await store.get("metrics")
+
+    assert asyncio.run(run())["input_items"] == state["input_items"]
+    assert metrics.store_bytes.count(op="write") == writes + 1
+    assert metrics.store_bytes.count(op="read") == reads + 1
+    assert {"redis_lock", "redis_write", "redis_get"} <= set(timings.phases)
+
+
+def test_store_latency_is_labelled_by_backend(fake_redis_factory, tmp_path):
+    """저장소 종류별 지연이 하나의 시계열로 섞이지 않아야 함"""
+    stores = [RedisConversationStore(client=fake_redis_factory(0.0)),
+              SQLiteConversationStore(path=str(tmp_path / "metrics.db"))]
+    before = {store.backend: metrics.store_seconds.count(backend=store.backend, op="get") for store in stores}
+
+    async def run():
+        for store in stores:
+            await store.get("missing")
+
+    asyncio.run(run())
+    stores[1].close()
+    assert [store.backend for store in stores] == ["redis", "sqlite"]
+    for store in stores:
+        assert metrics.store_seconds.count(backend=store.backend, op="get") == before[store.backend] + 1
+    assert 'store_operation_seconds_count{backend="sqlite",op="get"}' in metrics.registry.render()
@@ -0,0 +1,189 @@
+"""profile_store.py 테스트"""
+
+import asyncio
+
+import pytest
+
+import main
+from main import DeveloperProfileContext, create_initial_context
+from conversation_store import SQLiteConversationStore
+from profile_store import ProfileChanges, ProfileStore
+
+
+@pytest.fixture(params=["local", "redis", "sqlite"])
+def store(request, fake_redis_factory, tmp_path):
+    store = ProfileStore(redis_client=fake_redis_factory(0.0) if request.param == "redis" else None)
+    if request.param == "sqlite":
+        store.sqlite = SQLiteConversationStore(path=str(tmp_path / "profiles.db"))
+    yield store
+    if store.sqlite is not None:
+        store.sqlite.close()
+
+
+def test_apply_writes_only_changed_fields_and_records(store):
+    async def run():
+        first = await store.apply("u1", ProfileChanges(
+            fields={"name": "홍길동", "email": "hong@example.com"},
+            records={("projects", "p1"): {"name": "A", "description": "첫 프로젝트"},
+                     ("tech_stack", "python"): {"name": "Python"}}))
+        second = await store.apply("u1", ProfileChanges(
+            fields={"email": None},
+            records={("projects", "p1"): {"name": "A", "description": "수정"},
+                     ("tech_stack", "python"): None}))
+        assert await store.apply("u1", ProfileChanges()) is None
+        return (first, second), await store.load("u1"), await store.load("nobody")
+
+    revisions, profile, empty = asyncio.run(run())
+    assert profile["fields"] == {"name": "홍길동"}
+    assert profile["projects"] == {"p1": {"name": "A", "description": "수정"}}
+    assert profile["tech_stack"] == {} and profile["career"] == {}
+    assert empty == {"fields": {}, "projects": {}, "career": {}, "tech_stack": {}, "revision": 0}
+    assert revisions == (1, 2) and profile["revision"] == 2
+    assert store.writes == 2
+
+
+def test_redis_profile_is_split_into_indexed_hashes(fake_redis_factory):
+    client = fake_redis_factory(0.0)
+    store = ProfileStore(redis_client=client, ttl_seconds=60)
+
+    async def run():
+        await store.apply("u2", ProfileChanges(records={("career", "c1"): {"company": "회사"}}))
+        client.calls.clear()
+        await store.apply("u2", ProfileChanges(fields={"phone": "010"}))
+        round_trips = client.round_trips
+        return round_trips, (await client.hgetall("profile:u2"), await client.hkeys("profile:u2:career"),
+                             await client.ttl("profile:u2:career"))
+
+    round_trips, (fields, career, ttl) = asyncio.run(run())
+    assert fields == {b"phone": b"010", b"_revision": b"2"} and career == [b"c1"]
+    assert 0 < ttl <= 60
+    # 변경 하나당 트랜잭션 한 번 (전체 프로필을 다시 쓰지 않음)
+    assert round_trips == 1
+
+
+def test_redis_load_skips_records_while_revision_is_unchanged(fake_redis_factory):
+    """캐시한 리비전이 그대로면 리비전만 확인하고, 다른 인스턴스가 기록했으면 다시 읽어야 함"""
+    client = fake_redis_factory(0.0)
+    store, other = ProfileStore(redis_client=client), ProfileStore(redis_client=client)
+
+    async def run():
+        await store.apply("u5", ProfileChanges(records={("projects", "p1"): {"name": "A"}}))
+        first = await store.load("u5")
+        client.calls.clear()
+        cached = await store.load("u5")
+        cached_calls = list(client.calls)
+        await other.apply("u5", ProfileChanges(fields={"name": "홍길동"}))
+        return first, cached, cached_calls, await store.load("u5")
+
+    first, cached, cached_calls, reloaded = asyncio.run(run())
+    assert cached == first and store.cache_hits == 1
+    assert cached_calls == ["hget"]
+    assert reloaded["fields"] == {"name": "홍길동"} and reloaded["revision"] == 2
+
+
+def test_sqlite_profiles_are_shared_between_workers_and_expire(tmp_path):
+    """같은 SQLite 파일을 여는 워커가 서로의 프로필 기록을 보고, TTL이 지나면 레코드가 사라져야 함"""
+    class Clock:
+        now = 1000.0
+
+        def __call__(self):
+            return self.now
+
+    clock = Clock()
+    path = str(tmp_path / "shared.db")
+    store, other = (ProfileStore(ttl_seconds=60, sweep_interval=30, wall_clock=clock) for _ in range(2))
+    store.sqlite, other.sqlite = SQLiteConversationStore(path=path), SQLiteConversationStore(path=path)
+
+    async def run():
+        await store.apply("u6", ProfileChanges(fields={"name": "홍길동"},
+                                               records={("projects", "p1"): {"name": "A"}}))
+        seen = await other.load("u6")
+        cached = await other.load("u6")
+        await store.apply("u6", ProfileChanges(records={("projects", "p1"): None}))
+        reloaded = await other.load("u6")
+        clock.now += 61
+        expired = await other.load("u6")
+        await store.apply("u6", ProfileChanges(fields={"email": "hong@example.com"}))
+        return seen, cached, reloaded, expired, await other.load("u6")
+
+    try:
+        seen, cached, reloaded, expired, restarted = asyncio.run(run())
+    finally:
+        store.sqlite.close()
+        other.sqlite.close()
+    assert seen["fields"] == {"name": "홍길동"} and seen["projects"] == {"p1": {"name": "A"}}
+    assert cached == seen and other.cache_hits == 1
+    assert reloaded["projects"] == {} and reloaded["revision"] == 2
+    assert expired["fields"] == {} and expired["revision"] == 0
+    # 만료 후 첫 기록 때 정리(sweep)되어 이전 레코드 없이 새 프로필로 시작
+    assert restarted["fields"] == {"email": "hong@example.com"} and restarted["revision"] == 1
+    assert store.expirations == 1 and store.stats()["shared"]
+
+
+def test_local_profiles_are_bounded_by_ttl_and_lru():
+    """익명 대화마다 생기는 로컬 프로필이 무한히 쌓이지 않아야 함"""
+    class Clock:
+        now = 1000.0
+
+        def __call__(self):
+            return self.now
+
+    clock = Clock()
+    store = ProfileStore(ttl_seconds=60, max_entries=2, sweep_interval=30, clock=clock)
+    change = ProfileChanges(fields={"name": "홍길동"})
+
+    async def run():
+        for user_id in ("a", "b"):
+            await store.apply(user_id, change)
+        await store.load("a")  # a를 최근 사용으로
+        await store.apply("c", change)
+        evicted = (await store.load("b"))["revision"], (await store.load("a"))["revision"]
+        clock.now += 61
+        expired = (await store.load("a"))["revision"]
+        return evicted, expired
+
+    (evicted_b, kept_a), expired_a = asyncio.run(run())
+    assert (evicted_b, kept_a) == (0, 1) and store.evictions == 1
+    assert expired_a == 0 and store.stats()["local_profiles"] == 0
+    assert store.expirations == 2
+
+
+def test_context_tracks_tool_changes_until_commit(monkeypatch):
+    store = ProfileStore()
+    monkeypatch.setattr(main, "profile_store", store)
+
+    async def run():
+        context = await create_initial_context("u3").load()
+        loaded_version = context.version
+        context.email = "dev@example.com"
+        context.github = context.github  # 같은 값은 변경이 아님
+        context.put_record("projects", "p1", {"name": "포트폴리오"})
+        staged, changed = context.pending_changes(), context.changed_view()
+        before = await store.load("u3")
+        await context.commit()
+        fresh = await DeveloperProfileContext(user_id="u3").load()
+        return loaded_version, staged, changed, before, context, fresh
+
+    loaded_version, staged, changed, before, context, fresh = asyncio.run(run())
+    # 바뀐 필드/레코드만 기록하고 이벤트에도 바뀐 키만 보냄
+    assert staged.fields == {"email": "dev@example.com"}
+    assert changed == {"email": "dev@example.com", "projects": "포트폴리오"}
+    assert before["projects"] == {}
+    assert fresh.email == "dev@example.com" and fresh.view()["projects"] == "포트폴리오"
+    assert not fresh.dirty and not context.dirty
+    assert context.version == fresh.version != loaded_version
+
+
+def test_legacy_context_fields_move_to_the_store(monkeypatch):
+    store = ProfileStore()
+    monkeypatch.setattr(main, "profile_store", store)
+
+    async def run():
+        # 이전 형식의 대화 상태는 프로필 필드를 직접 담고 있었음
+        context = await DeveloperProfileContext.model_validate({"user_id": "u4", "name": "홍길동"}).load()
+        changes = await context.commit()
+        return changes, await store.load("u4")
+
+    changes, profile = asyncio.run(run())
+    assert changes.fields == {"name": "홍길동"}
+    assert profile["fields"] == {"name": "홍길동"}
@@ -4,6 +4,7 @@ Redis 연결 테스트 스크립트
 서버리스 배포 전에 Redis 설정이 올바른지 확인합니다.
 """
 
+import asyncio
 import os
 import sys
 from dotenv import load_dotenv
@@ -101,31 +102,34 @@ def test_conversation_store():
             "current_agent": "test_agent"
         }
 
-        # 저장 테스트
-        store.save(test_conversation_id, test_state)
-        print("✅ 상태 저장 테스트 성공")
-
-        # 조회 테스트
-        retrieved_state = store.get(test_conversation_id)
-        if retrieved_state:
-            print("✅ 상태 조회 테스트 성공")
-
-            # 데이터 일치 확인
-            if retrieved_state.get("current_agent") == "test_agent":
-                print("✅ 데이터 일치 확인 성공")
+        # 스토어 API는 비동기이므로 하나의 이벤트 루프에서 실행
+        async def exercise_store() -> bool:
+            # 저장 테스트
+            await store.save(test_conversation_id, test_state)
+            print("✅ 상태 저장 테스트 성공")
+
+            # 조회 테스트
+            retrieved_state = await store.get(test_conversation_id)
+            if retrieved_state:
+                print("✅ 상태 조회 테스트 성공")
+
+                # 데이터 일치 확인
+                if retrieved_state.get("current_agent") == "test_agent":
+                    print("✅ 데이터 일치 확인 성공")
+                else:
+                    print("❌ 데이터 불일치 발견")
+                    return False
             else:
-                print("❌ 데이터 불일치 발견")
+                print("❌ 상태 조회 실패")
                 return False
-        else:
-            print("❌ 상태 조회 실패")
-            return False
 
-        # 정리
-        if hasattr(store, 'delete'):
-            store.delete(test_conversation_id)
+            # 정리
+            await store.delete(test_conversation_id)
             print("✅ 테스트 데이터 정리 완료")
 
-        return True
+            return True
+
+        return asyncio.run(exercise_store())
 
     except Exception as e:
         print(f"❌ ConversationStore 테스트 실패: {e}")
@@ -0,0 +1,180 @@
+"""seat_inventory.py 테스트"""
+
+import asyncio
+
+import pytest
+
+from conversation_store import SQLiteConversationStore
+from seat_inventory import DEFAULT_LAYOUT, SeatInventory, SeatLayout
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(params=["local", "redis", "sqlite"])
+def inventory(request, fake_redis_factory, tmp_path):
+    clock = Clock()
+    client = fake_redis_factory(0.0) if request.param == "redis" else None
+    inventory = SeatInventory(redis_client=client, hold_seconds=60, clock=clock)
+    inventory.clock = clock
+    if request.param == "sqlite":
+        inventory.sqlite = SQLiteConversationStore(path=str(tmp_path / "seats.db"))
+    yield inventory
+    if inventory.sqlite is not None:
+        inventory.sqlite.close()
+
+
+def test_layout_offsets_and_adjacent_search():
+    layout = SeatLayout(["ABCD", "ABCDEF"])
+    assert layout.offset("2C") == 10 and layout.seat(10) == "2C"
+    with pytest.raises(ValueError):
+        layout.offset("1E")
+    # 없는 좌석 자리(1열 E/F)는 점유로 취급
+    assert layout.find_adjacent(layout.empty, 5) == [8, 9, 10, 11, 12]
+    bitmap = bytes([layout.empty[0] | 0b0010_0000, 0b0001_0000 | layout.empty[1]])
+    assert layout.find_adjacent(bitmap, 2) == [0, 1]
+    assert layout.find_adjacent(bitmap, 3) == [8, 9, 10]
+    assert layout.find_adjacent(bitmap, 4) is None
+
+
+def test_reserve_is_all_or_nothing(inventory):
+    async def run():
+        assert await inventory.reserve("KE001", ["12A", "12B"], "alice")
+        assert not await inventory.reserve("KE001", ["12B", "12C"], "bob")
+        assert await inventory.reserve("KE001", ["12C"], "bob")
+        return await inventory.occupied("KE001"), await inventory.available("KE001")
+
+    occupied, available = asyncio.run(run())
+    assert occupied == ["12A", "12B", "12C"]
+    assert available == DEFAULT_LAYOUT.capacity - 3
+    assert inventory.conflicts == 1
+
+
+def test_holds_expire_unless_confirmed(inventory):
+    async def run():
+        await inventory.reserve("KE002", ["1A"], "alice")
+        await inventory.reserve("KE002", ["1B"], "bob")
+        assert await inventory.confirm("KE002", ["1A"], "alice")
+        assert not await inventory.confirm("KE002", ["1B"], "alice")
+        inventory.clock.now += 61
+        # 확정하지 않은 홀드는 만료되어 다른 사람이 잡을 수 있음
+        assert await inventory.occupied("KE002") == ["1A"]
+        assert not await inventory.confirm("KE002", ["1B"], "bob")
+        assert await inventory.reserve("KE002", ["1B"], "carol")
+        assert await inventory.release("KE002", ["1A", "1B"], "alice") == 1
+        return await inventory.occupied("KE002")
+
+    assert asyncio.run(run()) == ["1B"]
+
+
+def test_reads_do_not_create_flight_state(inventory):
+    """없는 항공편을 조회해도 저장소/메모리에 아무것도 남기지 않고, 형식이 아닌 번호는 거부해야 함"""
+    async def state():
+        if inventory.redis is not None:
+            return sorted(await inventory.redis.keys("*"))
+        if inventory.sqlite is not None:
+            return await inventory.sqlite.run_in_transaction(
+                lambda db: db.execute("SELECT * FROM seat_holds").fetchall(), mode="DEFERRED")
+        return list(inventory._flights)
+
+    async def run():
+        occupied = [await inventory.occupied(f"KE{n:03d}") for n in range(50)]
+        available = await inventory.available("KE999")
+        with pytest.raises(ValueError):
+            await inventory.occupied("../../" + "x" * 100)
+        with pytest.raises(ValueError):
+            await inventory.reserve("not a flight", ["1A"], "alice")
+        return occupied, available, await state()
+
+    occupied, available, stored = asyncio.run(run())
+    assert occupied == [[]] * 50 and available == DEFAULT_LAYOUT.capacity
+    assert stored == []
+
+
+def test_flight_state_expires_after_last_change(inventory):
+    """예약이 만든 상태는 마지막 변경부터 flight_ttl_seconds 뒤에 확정 좌석까지 사라져야 함"""
+    inventory.flight_ttl_seconds = 3600
+
+    async def run():
+        await inventory.reserve("KE006", ["1A"], "alice")
+        assert await inventory.confirm("ke006", ["1A"], "alice")
+        # 확정 후에는 홀드 정렬 집합이 비어 사라지므로 비트맵과 예약자 해시만 남음
+        ttls = [ttl for key in inventory._keys("KE006")
+                if (ttl := await inventory.redis.ttl(key)) != -2] if inventory.redis else []
+        inventory.clock.now += 3000
+        kept = await inventory.occupied("KE006")
+        inventory.clock.now += 601
+        return ttls, kept, await inventory.occupied("KE006")
+
+    ttls, kept, expired = asyncio.run(run())
+    # Redis는 키 TTL로 지우므로 (fakeredis는 실제 시간 기준) TTL이 붙었는지만 확인
+    assert all(0 < ttl <= 3600 for ttl in ttls) and len(ttls) in (0, 2)
+    assert kept == ["1A"]
+    if inventory.redis is None:
+        assert expired == []
+
+
+def test_reserve_adjacent_until_sold_out(inventory):
+    async def run():
+        first = await inventory.reserve_adjacent("KE003", 3, "group-1")
+        await inventory.reserve("KE003", ["5B"], "single")
+        second = await inventory.reserve_adjacent("KE003", 3, "group-2")
+        # 6좌석 열 20개 + 4좌석 열 4개는 세 명 그룹 44개
+        groups = [await inventory.reserve_adjacent("KE003", 3, f"g{i}") for i in range(50)]
+        return first, second, groups
+
+    first, second, groups = asyncio.run(run())
+    assert first == ["1A", "1B", "1C"]
+    assert second == ["2A", "2B", "2C"]
+    assert sum(g is not None for g in groups) == 44 - 2 - 1
+    assert groups[-1] is None
+
+
+def test_parallel_bookers_never_share_a_seat(fake_redis_factory):
+    inventory = SeatInventory(redis_client=fake_redis_factory(0.001))
+
+    async def booker(i):
+        seats = []
+        while (got := await inventory.reserve_adjacent("KE004", 1 + i % 3, f"user-{i}")) is not None:
+            seats += got
+        return seats
+
+    async def run():
+        return await asyncio.gather(*(booker(i) for i in range(20))), await inventory.available("KE004")
+
+    bookings, available = asyncio.run(run())
+    seats = [seat for booking in bookings for seat in booking]
+    assert len(seats) == len(set(seats)) == DEFAULT_LAYOUT.capacity - available
+    assert available < 3
+
+
+def test_sqlite_workers_share_the_seat_map(tmp_path):
+    """같은 SQLite 파일을 여는 워커들(저장소 인스턴스 2개)이 같은 좌석을 나눠 갖지 않아야 함"""
+    path = str(tmp_path / "shared.db")
+    workers = [SeatInventory() for _ in range(2)]
+    for inventory in workers:
+        inventory.sqlite = SQLiteConversationStore(path=path)
+
+    async def booker(i):
+        inventory, seats = workers[i % 2], []
+        while (got := await inventory.reserve_adjacent("KE005", 1 + i % 3, f"user-{i}")) is not None:
+            seats += got
+        return seats
+
+    async def run():
+        bookings = await asyncio.gather(*(booker(i) for i in range(10)))
+        return bookings, await workers[0].available("KE005"), await workers[1].occupied("KE005")
+
+    try:
+        bookings, available, occupied = asyncio.run(run())
+    finally:
+        for inventory in workers:
+            inventory.sqlite.close()
+    seats = [seat for booking in bookings for seat in booking]
+    assert len(seats) == len(set(seats)) == len(occupied) == DEFAULT_LAYOUT.capacity - available
+    assert available < 3
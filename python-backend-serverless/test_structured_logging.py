@@ -0,0 +1,77 @@
+"""structured_logging.py 테스트"""
+
+import io
+import json
+import logging
+import threading
+
+import structured_logging
+from structured_logging import configure_logging, shutdown_logging, should_dump_run
+
+
+class ThreadRecordingRepr:
+    """repr이 어느 스레드에서 계산되었는지 기록"""
+
+    def __init__(self):
+        self.threads = []
+
+    def __repr__(self):
+        self.threads.append(threading.current_thread())
+        return "<큰 실행 결과>"
+
+
+def capture_logs(emit):
+    """Run ``emit`` with a fresh pipeline writing to a buffer and return the parsed JSON lines."""
+    shutdown_logging()
+    stream = io.StringIO()
+    configure_logging(stream=stream, log_format="json")
+    try:
+        emit()
+    finally:
+        shutdown_logging()
+        configure_logging()
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_json_lines_carry_conversation_id_and_extra_fields():
+    def emit():
+        token = structured_logging.conversation_id.set("conv-1")
+        logging.getLogger("test").info("turn %s", "completed", extra={"path": "model", "duration_ms": 12.5})
+        structured_logging.conversation_id.reset(token)
+        logging.getLogger("test").warning("Redis 조회 오류: %s", "timeout")
+
+    first, second = capture_logs(emit)
+    assert first["message"] == "turn completed" and first["level"] == "INFO"
+    assert first["conversation_id"] == "conv-1"
+    assert first["path"] == "model" and first["duration_ms"] == 12.5
+    assert second["conversation_id"] is None and second["message"] == "Redis 조회 오류: timeout"
+
+
+def test_large_values_are_formatted_off_the_calling_thread():
+    value = ThreadRecordingRepr()
+
+    def emit():
+        logging.getLogger("test").info("run dump", extra={"run": value})
+        assert value.threads == []
+
+    entry, = capture_logs(emit)
+    assert entry["run"] == "<큰 실행 결과>"
+    assert value.threads and value.threads[0] is not threading.main_thread()
+
+
+def test_exception_traceback_is_kept():
+    def emit():
+        try:
+            raise ValueError("깨진 상태")
+        except ValueError:
+            logging.getLogger("test").exception("streaming run failed")
+
+    entry, = capture_logs(emit)
+    assert "ValueError: 깨진 상태" in entry["exc"]
+
+
+def test_run_dump_sampling_rate():
+    assert not should_dump_run(0)
+    assert should_dump_run(1)
+    hits = sum(should_dump_run(0.1) for _ in range(5000))
+    assert 300 < hits < 700
@@ -51,4 +51,5 @@ export interface GuardrailCheck {
   reasoning: string;
   passed: boolean;
   timestamp: Date;
+  duration_ms?: number;
 }